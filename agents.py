@@ -81,20 +81,38 @@
 #     )
 
 
+import asyncio
+import json
 import os
 import sys
+import threading
+import weakref
+from typing import Any, AsyncGenerator, Mapping, Optional, Sequence, Union
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 from autogen_agentchat.agents import AssistantAgent
-from autogen_core.tools import FunctionTool
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelInfo, RequestUsage
+from autogen_core.tools import FunctionTool, Tool, ToolSchema
 from dotenv import load_dotenv
+from pydantic import BaseModel
 
-# Import GitHub tools directly (no subprocess needed)
-from githubmcp import (
-    get_latest_commit,
+import model_cache
+import telemetry
+
+# Import GitHub tools directly (no subprocess needed); the async variants share
+# one connection pool and don't block the event loop
+from githubmcp_async import (
+    get_latest_commit_async,
+    get_recent_commits_async
+)
+# Diff and file tools fit their output to a token budget before the model sees it
+from tool_output import (
     get_commit_diff,
-    get_recent_commits,
-    get_file_content
+    get_commit_diffs,
+    get_file_content,
+    get_file_contents
 )
+from stats_index import get_author_contribution
 
 load_dotenv()
 
@@ -102,65 +120,248 @@ AZURE_API_KEY=os.getenv("AZURE_API_KEY")
 AZURE_API_ENDPOINT=os.getenv("AZURE_API_ENDPOINT")
 AZURE_DEPLOYMENT=os.getenv("AZURE_DEPLOYMENT")
 
-if not AZURE_API_KEY or not AZURE_API_ENDPOINT or not AZURE_DEPLOYMENT:
-    raise ValueError("Azure API credentials are not set.")
+MODEL_NAME = "gpt-4o-2024-05-13"
+
+# Model turns that may request tools before the agent must answer
+AGENT_MAX_TOOL_ITERATIONS = int(os.getenv("AGENT_MAX_TOOL_ITERATIONS", "1"))
+
+# Sent first on every model call, ahead of the tool schemas and the task. Keep it
+# free of per-request values so the provider can reuse its cached prompt prefix.
+SYSTEM_MESSAGE = (
+    "You are a technical writer describing one author's contributions to a GitHub repository. "
+    "Each task gives you the repository, the author and a contribution report whose commit counts, "
+    "percentage and rating were already computed by the service.\n\n"
+
+    "Write a short narrative (one to three paragraphs of plain prose) about the author's work: "
+    "the areas of the code they touched, the kind of changes they made and how their work fits the project. "
+    "Use the available tools (commit diffs, file contents, branch details) when you need detail about the changes.\n\n"
+
+    "IMPORTANT: Do not recount commits and do not restate, recalculate or change the numbers or the rating "
+    "from the report; they are shown next to your text. "
+    "Do not repeat the report's fields, headings or a \"Contribution Rating\" line. "
+    "Reply with the narrative text only."
+)
+
+# Built once per process (tools) / per event loop (model client) and reused by every agent
+_github_tools = None
+_model_clients = weakref.WeakKeyDictionary()
+_shared_lock = threading.Lock()
+
+logger = telemetry.get_logger("agents")
+
+
+def _call_phase(kwargs) -> str:
+    # The agent's reflection call (summarizing tool results) offers no tools
+    return "reflection" if kwargs.get("tool_choice") == "none" else "turn"
+
+
+class TracedAzureOpenAIChatCompletionClient(AzureOpenAIChatCompletionClient):
+    """Azure OpenAI client whose model calls are traced: latency, phase and token usage."""
+
+    @property
+    def model_label(self) -> str:
+        return (self.model_info or {}).get("family", "unknown")
+
+    async def create(self, *args, **kwargs) -> CreateResult:
+        phase = _call_phase(kwargs)
+        model = self.model_label
+        with telemetry.span("llm.call", model=model, phase=phase, stream=False) as span:
+            result = await super().create(*args, **kwargs)
+            telemetry.record_llm_usage(span, model, phase, result.usage)
+            return result
+
+    async def create_stream(self, *args, **kwargs):
+        phase = _call_phase(kwargs)
+        model = self.model_label
+        span = telemetry.open_span("llm.call", model=model, phase=phase, stream=True)
+        try:
+            async for chunk in super().create_stream(*args, **kwargs):
+                if "first_token_ms" not in span.attributes:
+                    span.set(first_token_ms=round(span.duration * 1000, 2))
+                if isinstance(chunk, CreateResult):
+                    telemetry.record_llm_usage(span, model, phase, chunk.usage)
+                yield chunk
+        except BaseException as e:
+            telemetry.close_span(span, e)
+            raise
+        telemetry.close_span(span)
+
+
+class CachingChatCompletionClient(ChatCompletionClient):
+    """
+    Model client that answers repeated calls from the model-call cache.
+
+    Calls are looked up by model_cache.model_call_key (model, messages, tool
+    schemas, temperature and the other call options). A hit is returned
+    without calling the wrapped client, marked as cached; a miss is forwarded
+    and its answer stored. Streamed hits arrive as a single chunk.
+    """
+
+    def __init__(self, client: ChatCompletionClient, cache: "model_cache.ModelCache", model: str,
+                 temperature: Optional[float] = None):
+        self.client = client
+        self.cache = cache
+        self.model = model
+        self.temperature = temperature
+
+    def _key(self, messages: Sequence[LLMMessage], tools: Sequence[Tool | ToolSchema], tool_choice: Any,
+             json_output: Any, extra_create_args: Mapping[str, Any]) -> str:
+        if isinstance(json_output, type) and issubclass(json_output, BaseModel):
+            json_output = json.dumps(json_output.model_json_schema(), sort_keys=True)
+        return model_cache.model_call_key(
+            self.model,
+            [message.model_dump(mode="json") for message in messages],
+            [tool.schema if isinstance(tool, Tool) else tool for tool in tools],
+            extra_create_args.get("temperature", self.temperature),
+            tool_choice=tool_choice.name if isinstance(tool_choice, Tool) else tool_choice,
+            json_output=json_output,
+            extra_create_args={name: value for name, value in extra_create_args.items() if name != "temperature"},
+        )
+
+    def _lookup(self, key: str) -> Optional[CreateResult]:
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        result = CreateResult.model_validate(cached)
+        result.cached = True
+        return result
+
+    async def create(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = [],
+                     tool_choice: Any = "auto", json_output: Optional[Any] = None,
+                     extra_create_args: Mapping[str, Any] = {},
+                     cancellation_token: Optional[CancellationToken] = None) -> CreateResult:
+        key = self._key(messages, tools, tool_choice, json_output, extra_create_args)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+        result = await self.client.create(
+            messages, tools=tools, tool_choice=tool_choice, json_output=json_output,
+            extra_create_args=extra_create_args, cancellation_token=cancellation_token
+        )
+        self.cache.set(key, result.model_dump(mode="json"))
+        return result
+
+    async def create_stream(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = [],
+                            tool_choice: Any = "auto", json_output: Optional[Any] = None,
+                            extra_create_args: Mapping[str, Any] = {},
+                            cancellation_token: Optional[CancellationToken] = None,
+                            **kwargs: Any) -> AsyncGenerator[Union[str, CreateResult], None]:
+        key = self._key(messages, tools, tool_choice, json_output, extra_create_args)
+        result = self._lookup(key)
+        if result is not None:
+            if isinstance(result.content, str) and result.content:
+                yield result.content
+            yield result
+            return
+        async for chunk in self.client.create_stream(
+            messages, tools=tools, tool_choice=tool_choice, json_output=json_output,
+            extra_create_args=extra_create_args, cancellation_token=cancellation_token, **kwargs
+        ):
+            if isinstance(chunk, CreateResult):
+                self.cache.set(key, chunk.model_dump(mode="json"))
+            yield chunk
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self.client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self.client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self):
+        return self.client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self.client.model_info
+
 
 
 async def create_model_client():
     """Create Azure OpenAI model client"""
-    return AzureOpenAIChatCompletionClient(
+    # Checked on first use, not at import, so a misconfigured model only fails narrative requests
+    if not AZURE_API_KEY or not AZURE_API_ENDPOINT or not AZURE_DEPLOYMENT:
+        raise ValueError("Azure API credentials are not set.")
+    return TracedAzureOpenAIChatCompletionClient(
         api_key=AZURE_API_KEY,
-        model="gpt-4o-2024-05-13",
+        model=MODEL_NAME,
         azure_deployment=AZURE_DEPLOYMENT,
         azure_endpoint=AZURE_API_ENDPOINT,
         api_version="2023-03-15-preview"
     )
 
 
-async def create_mcp_agent():
-    """Create MCP agent with GitHub tools"""
-    print("Initializing Agent with GitHub tools...")
-
-    # Convert Python functions to AutoGen tools
-    github_tools = [
-        FunctionTool(get_latest_commit, description="Get the latest commit from a repository branch"),
-        FunctionTool(get_commit_diff, description="Get detailed diff for a specific commit"),
-        FunctionTool(get_recent_commits, description="Get recent commits from a repository"),
-        FunctionTool(get_file_content, description="Get content of a specific file from repository")
+def create_github_tools() -> list:
+    """Convert the GitHub functions to AutoGen tools"""
+    # Each tool call is traced as a "tool.<name>" span
+    traced = telemetry.traced_tool
+    return [
+        FunctionTool(traced(get_latest_commit_async, "get_latest_commit"), name="get_latest_commit", description="Get the latest commit from a repository branch"),
+        FunctionTool(traced(get_commit_diff), description="Get a commit's changed files with per-file line counts; pass files=[...] or detail='sampled'/'full' to see patches"),
+        FunctionTool(traced(get_recent_commits_async, "get_recent_commits"), name="get_recent_commits", description="Get recent commits from a repository"),
+        FunctionTool(traced(get_file_content), description="Get content of a specific file from repository, a window of lines at a time (continue from next_start_line)"),
+        FunctionTool(traced(get_commit_diffs), description="Get changed files for several commits at once (fetched concurrently); detail='sampled' adds budgeted patches"),
+        FunctionTool(traced(get_file_contents), description="Get the beginning of several files at once (fetched concurrently)"),
+        FunctionTool(traced(get_author_contribution), description="Get an author's precomputed commit count, percentage and rating (author may be a login, email or name)")
     ]
-    
-    print(f"Loaded {len(github_tools)} GitHub tools")
-    
-    model_client = await create_model_client()
+
+
+def get_github_tools() -> list:
+    """Return the shared tool set; tools hold no per-request state so one set serves every agent"""
+    global _github_tools
+    if _github_tools is None:
+        with _shared_lock:
+            if _github_tools is None:
+                _github_tools = create_github_tools()
+                telemetry.log_event(logger, "GitHub tools loaded", tools=len(_github_tools))
+    return _github_tools
+
+
+async def get_model_client():
+    """Return the shared model client for the running event loop (its HTTP pool is bound to that loop)"""
+    loop = asyncio.get_running_loop()
+    with _shared_lock:
+        model_client = _model_clients.get(loop)
+    if model_client is None:
+        model_client = await create_model_client()
+        cache = model_cache.get_model_cache()
+        if cache is not None:
+            model_client = CachingChatCompletionClient(model_client, cache, model=MODEL_NAME)
+        with _shared_lock:
+            model_client = _model_clients.setdefault(loop, model_client)
+    return model_client
+
+
+async def create_mcp_agent(stream: bool = False, reflect: bool = True,
+                           max_tool_iterations: int = AGENT_MAX_TOOL_ITERATIONS):
+    """
+    Create an agent with GitHub tools.
+
+    The model client and tools are shared across calls; only the agent itself
+    (and with it the conversation history) is new, so requests never see each
+    other's messages. With `stream` the model's tokens are emitted as they arrive.
+
+    The agent makes at most `max_tool_iterations` tool-calling turns. With
+    `reflect` it then asks the model to write up the tool results; without,
+    the results are the answer (a ToolCallSummaryMessage), one model call fewer.
+    """
+    model_client = await get_model_client()
     
     return AssistantAgent(
         name="github_agent",
         model_client=model_client,
-        tools=github_tools,
-        reflect_on_tool_use=True,
-        system_message=(
-            "You are an intelligent assistant with access to modify/read/list out all the repositories on a Github account. "
-            "Use the available tools to help users with their commit file diffs, code analysis, branch details, etc. "
-            
-            "CRITICAL: When analyzing author contributions using get_recent_commits tool, you MUST follow this EXACT output format:\n\n"
-            "Project name: [project_name]\n"
-            "Author name: [name]\n"
-            "Total commits: [number]\n"
-            "No of commits by author: [number]\n\n"
-            
-            "CONTRIBUTION RATING SCALE (out of 6):\n"
-            "- 0-10% contribution: Rating 1\n"
-            "- 11-25% contribution: Rating 2\n"
-            "- 26-40% contribution: Rating 3\n"
-            "- 41-55% contribution: Rating 4\n"
-            "- 56-75% contribution: Rating 5\n"
-            "- 76-100% contribution: Rating 6\n\n"
-            
-            "IMPORTANT: Even if the author has exactly 50% of commits, provide them a GOOD rating (Rating 4) because half the project is done by him. "
-            "Calculate contribution percentage as: (commits_by_author / total_commits) * 100. "
-            "Be fair and generous in rating - significant contributions deserve recognition. "
-            "Always provide the rating at the end in this format: Contribution Rating: [X]/6\n\n"
-            
-            "Always provide clear and helpful responses with accurate contribution analysis."
-        ),
+        tools=get_github_tools(),
+        reflect_on_tool_use=reflect,
+        max_tool_iterations=max_tool_iterations,
+        model_client_stream=stream,
+        system_message=SYSTEM_MESSAGE,
     )
\ No newline at end of file
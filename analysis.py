@@ -0,0 +1,632 @@
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+from datetime import datetime
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+
+from author_identity import normalize_author
+from contribution import (
+    GITHUB_COMMITS_BACKEND,
+    CommitAggregator,
+    aggregate_commits_async,
+    contribution_percentage,
+    contribution_rating,
+    contribution_result
+)
+from githubmcp import github_token_context
+from githubmcp_async import gather_bounded
+from github_graphql import iter_histories_async
+from tool_output import track_tool_tokens, tool_token_stats
+import github_cache
+import diff_cache
+import jobs
+import model_cache
+import rate_limit
+import result_cache
+import stats_index
+import telemetry
+
+# Limits for /api/analyze-contribution/batch
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Narrative agent limits: a request may ask for a shorter deadline, never a longer one
+AGENT_TIMEOUT = float(os.getenv("AGENT_TIMEOUT", "60"))
+# Without reflection the agent returns its tool results as they are, saving a model turn
+AGENT_REFLECT = os.getenv("AGENT_REFLECT", "true").lower() in ("1", "true", "yes")
+
+# Part of every cached result's key: bump it when narrative_task or the agent's
+# system message changes, so results produced by the old prompt are not served
+PROMPT_VERSION = "4"
+
+logger = telemetry.get_logger("analysis")
+
+
+TRUE_VALUES = ("1", "true", "yes")
+FALSE_VALUES = ("0", "false", "no")
+
+
+def _parse_flag(data: Dict[str, Any], name: str, default: bool) -> bool:
+    """A boolean field: JSON true/false, 0/1 or "true"/"false"/"yes"/"no"/"1"/"0"."""
+    value = data.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in TRUE_VALUES + FALSE_VALUES:
+        return value.strip().lower() in TRUE_VALUES
+    raise ValueError(f"{name} must be a boolean")
+
+
+def _parse_max_commits(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ValueError("max_commits must be a positive integer")
+    return value
+
+
+def _parse_since(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    try:
+        if not isinstance(value, str):
+            raise ValueError(value)
+        datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        raise ValueError("since must be an ISO-8601 date or timestamp (e.g. 2024-01-31T00:00:00Z)") from None
+    return value
+
+
+def parse_analysis_request(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract and validate the analyze-contribution request fields.
+
+    Raises:
+        ValueError: If project, author or owner is missing, narrative/reflect is not a boolean,
+            max_commits is not a positive integer, since is not ISO-8601, or agent_timeout
+            is not a positive number
+    """
+    data = data if isinstance(data, dict) else {}
+    params = {
+        "project": data.get('project'),
+        "author": data.get('author'),
+        "owner": data.get('owner'),
+        "github_token": data.get('github_token'),
+        "branch": data.get('branch') or 'main',
+        "narrative": _parse_flag(data, 'narrative', False),
+        "since": _parse_since(data.get('since')),
+        "max_commits": _parse_max_commits(data.get('max_commits')),
+        "reflect": _parse_flag(data, 'reflect', AGENT_REFLECT),
+        "agent_timeout": AGENT_TIMEOUT,
+    }
+    if not all([params["project"], params["author"], params["owner"]]):
+        raise ValueError("Missing required fields: project, author, and owner are required")
+    if data.get('agent_timeout') is not None:
+        try:
+            agent_timeout = float(data['agent_timeout'])
+        except (TypeError, ValueError):
+            agent_timeout = 0
+        if agent_timeout <= 0:
+            raise ValueError("agent_timeout must be a positive number of seconds")
+        params["agent_timeout"] = min(agent_timeout, AGENT_TIMEOUT)
+    return params
+
+
+def log_analysis_request(params: Dict[str, Any]):
+    """Log received request data (mask token for security)."""
+    github_token = params["github_token"]
+    if github_token:
+        token = f"{'*' * 20}{github_token[-4:] if len(github_token) > 4 else '****'}"
+    else:
+        token = "Using .env token"
+    telemetry.log_event(
+        logger, "Analysis request received", project=params["project"], author=params["author"],
+        owner=params["owner"], branch=params["branch"], narrative=params["narrative"], github_token=token
+    )
+
+
+def log_tool_tokens(usage: Dict[str, int]):
+    """Log how many tokens output shaping kept out of the model context for one request."""
+    if usage["calls"]:
+        telemetry.log_event(
+            logger, "Tool output tokens", calls=usage["calls"], sent=usage["returned_tokens"],
+            saved=usage["original_tokens"] - usage["returned_tokens"]
+        )
+
+
+def narrative_task(params: Dict[str, Any], report: str) -> str:
+    """
+    Agent task asking for narrative text around already computed numbers.
+
+    The fixed instruction comes first and the request's details last, so
+    consecutive tasks share the longest possible prompt prefix.
+    """
+    return (
+        "Write a short narrative of the author's contributions to the repository below. "
+        "The contribution numbers are already computed, do not recount them.\n\n"
+        f"Repository: {params['owner']}/{params['project']}\n"
+        f"Author: {params['author']}\n\n{report}"
+    )
+
+
+async def _aggregate(params: Dict[str, Any], head: Optional[str] = None) -> CommitAggregator:
+    with telemetry.span("aggregate", repo=f"{params['owner']}/{params['project']}") as span:
+        aggregator = await _aggregate_commits(params, head)
+        span.set(commits=aggregator.total_commits)
+        return aggregator
+
+
+async def _aggregate_commits(params: Dict[str, Any], head: Optional[str] = None) -> CommitAggregator:
+    # Full-history analyses are served incrementally from the stats index
+    if stats_index.get_stats_index() is not None and not params["since"] and not params["max_commits"]:
+        return await stats_index.indexed_aggregator_async(
+            params["owner"], params["project"], params["branch"], head=head
+        )
+    # A resolved head SHA pins the history to exactly what a cached result is keyed on
+    return await aggregate_commits_async(
+        params["owner"], params["project"], branch=head or params["branch"],
+        since=params["since"], max_commits=params["max_commits"]
+    )
+
+
+async def _compute_contribution(params: Dict[str, Any], head: Optional[str] = None) -> Dict[str, Any]:
+    return contribution_result(params["project"], params["author"], await _aggregate(params, head))
+
+
+def load_agent_runtime():
+    """
+    Import the agent modules (autogen, openai) and return them.
+
+    They are not imported with this module: they take most of a cold start
+    and only narrative analyses need them, so health checks, numbers-only
+    analyses and job polls start without them.
+    """
+    import agents
+    import utils
+    return agents, utils
+
+
+async def _agent_runtime():
+    if "utils" in sys.modules:
+        return load_agent_runtime()
+    # The first import takes most of a second: keep it off the event loop
+    with telemetry.span("agent.import"):
+        return await asyncio.to_thread(load_agent_runtime)
+
+
+async def _build_agent(params: Dict[str, Any], stream: bool = False):
+    """Fresh agent (empty history) on the shared model client and tools."""
+    agents, _ = await _agent_runtime()
+    with telemetry.span("agent.build"):
+        return await agents.create_mcp_agent(stream=stream, reflect=params["reflect"])
+
+
+class NarrativeUnavailable(Exception):
+    """
+    The narrative agent failed or ran out of time.
+
+    Raised instead of returning, so the result cache never stores a report
+    without its narrative; `result` is the report with the error appended.
+    """
+
+    def __init__(self, report: str, error: str):
+        super().__init__(error)
+        self.result = f"{report}\n\nNarrative unavailable: {error}"
+
+
+async def _compute_result(params: Dict[str, Any], head: Optional[str] = None) -> str:
+    contribution = await _compute_contribution(params, head)
+    result = contribution["report"]
+
+    if params["narrative"]:
+        mcp_agent = await _build_agent(params)
+        _, utils = await _agent_runtime()
+        with track_tool_tokens() as usage:
+            narrative_text = await utils.run_mcp_agent(
+                mcp_agent, narrative_task(params, result), timeout=params["agent_timeout"]
+            )
+        log_tool_tokens(usage)
+        if not isinstance(narrative_text, str):
+            error = narrative_text.get("error") if isinstance(narrative_text, dict) else None
+            raise NarrativeUnavailable(result, error or "the agent returned no response")
+        result = f"{result}\n\n{narrative_text}"
+    return result
+
+
+async def analyze(params: Dict[str, Any]) -> str:
+    """
+    Run a contribution analysis for parsed request params.
+
+    Counts and rating are computed natively; the agent is only involved when
+    narrative text is requested. The caller's token is scoped to this call's
+    context, so concurrent analyses never see each other's token.
+
+    With the result cache enabled, the branch head is resolved first and a
+    result already computed at that head is returned as is; concurrent
+    identical requests share one computation. When the narrative fails, the
+    numbers are returned with the error and nothing is cached.
+    """
+    with github_token_context(params["github_token"]):
+        cache = result_cache.get_result_cache()
+        try:
+            if cache is None:
+                result = await _compute_result(params)
+            else:
+                head = await stats_index.branch_head_async(params["owner"], params["project"], params["branch"])
+                key = result_cache.result_key(
+                    params["owner"], params["project"], head, params["author"], PROMPT_VERSION,
+                    narrative=params["narrative"], since=params["since"], max_commits=params["max_commits"],
+                    reflect=params["narrative"] and params["reflect"]
+                )
+                result = await cache.get_or_compute(key, lambda: _compute_result(params, head))
+        except NarrativeUnavailable as e:
+            telemetry.log_event(logger, "Narrative unavailable", logging.WARNING, error=str(e))
+            result = e.result
+
+    telemetry.log_event(logger, "Result to frontend", logging.DEBUG, result=result)
+    return result
+
+
+async def analyze_stream(params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run a contribution analysis, yielding progress events as they happen.
+
+    The natively computed stats and rating are sent first; with narrative
+    enabled the agent's tool calls and model tokens follow as they stream.
+    The last event is "result" (the same text the JSON endpoint returns) or
+    "error".
+    """
+    try:
+        with github_token_context(params["github_token"]):
+            contribution = await _compute_contribution(params)
+            result = contribution["report"]
+            yield {"event": "stats", "data": contribution["stats"]}
+            yield {"event": "rating", "data": {"rating": contribution["stats"]["rating"], "report": result}}
+
+            if params["narrative"]:
+                mcp_agent = await _build_agent(params, stream=True)
+                _, utils = await _agent_runtime()
+                with track_tool_tokens() as usage:
+                    async for event in utils.stream_mcp_agent(
+                        mcp_agent, narrative_task(params, result), timeout=params["agent_timeout"]
+                    ):
+                        if event["event"] == "final_response":
+                            result = f"{result}\n\n{event['data']['content']}"
+                        else:
+                            yield event
+                log_tool_tokens(usage)
+                yield {"event": "tool_tokens", "data": usage}
+
+        telemetry.log_event(logger, "Result to frontend", logging.DEBUG, result=result)
+        yield {"event": "result", "data": {"content": result}}
+    except Exception as e:
+        telemetry.log_event(logger, "Analysis failed", logging.ERROR, exc_info=True, error=str(e))
+        yield {"event": "error", "data": {"success": False, "error": str(e)}}
+
+
+def parse_batch_request(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extract and validate the jobs of a batch analyze-contribution request.
+
+    Each job takes the same fields as a single request; a top-level
+    github_token or branch applies to every job that doesn't set its own.
+
+    Raises:
+        ValueError: If jobs is missing, empty, too long, or a job is invalid
+    """
+    data = data if isinstance(data, dict) else {}
+    jobs = data.get('jobs')
+    if not isinstance(jobs, list) or not jobs:
+        raise ValueError("Missing required field: jobs must be a non-empty list")
+    if len(jobs) > BATCH_MAX_JOBS:
+        raise ValueError(f"Too many jobs: at most {BATCH_MAX_JOBS} per batch")
+
+    parsed = []
+    for position, job in enumerate(jobs):
+        job = dict(job) if isinstance(job, dict) else {}
+        job.setdefault('github_token', data.get('github_token'))
+        job.setdefault('branch', data.get('branch'))
+        try:
+            params = parse_analysis_request(job)
+        except ValueError as e:
+            raise ValueError(f"Job {position}: {str(e)}")
+        # Batches report numbers only; a narrative per repository would cost a model call each
+        params["narrative"] = False
+        parsed.append(params)
+    return parsed
+
+
+def log_batch_request(jobs: List[Dict[str, Any]]):
+    """Log a one-line summary per batch job (tokens are never logged)."""
+    telemetry.log_event(
+        logger, "Batch request received", jobs=len(jobs),
+        summary=[f"{params['owner']}/{params['project']}@{params['branch']} by {params['author']}" for params in jobs]
+    )
+
+
+def _repository_key(params: Dict[str, Any]) -> tuple:
+    """Jobs with equal keys read exactly the same history, so they share one fetch."""
+    return (params["owner"].lower(), params["project"].lower(), params["branch"],
+            params["since"], params["max_commits"], params["github_token"])
+
+
+async def _batched_histories(repositories: Dict[tuple, Dict[str, Any]]) -> Dict[tuple, Any]:
+    """
+    Count several repositories' histories with shared GraphQL queries.
+
+    Covers the repositories a batch would otherwise read in full one at a
+    time: those outside the stats index (since/max_commits set, or the index
+    disabled) and those not indexed yet, which are counted from their
+    current head and indexed at it. Indexed repositories are left to
+    _aggregate, which only fetches what their head gained.
+
+    Returns:
+        Aggregator, or the repository's error, by repository key; keys left
+        out (including every repository of a query that failed) fall back to _aggregate
+    """
+    index = stats_index.get_stats_index()
+    groups = {}
+    for key, params in repositories.items():
+        indexed = index is not None and not params["since"] and not params["max_commits"]
+        if indexed and index.load(params["owner"], params["project"], params["branch"]) is not None:
+            continue
+        group = (params["since"], params["max_commits"], params["github_token"])
+        groups.setdefault(group, []).append((key, params, indexed))
+
+    results = {}
+    for (since, max_commits, token), members in groups.items():
+        try:
+            # Indexed rows must be tagged with the exact head the history was counted from
+            heads = [
+                await stats_index.branch_head_async(params["owner"], params["project"], params["branch"], token)
+                if indexed else None
+                for _, params, indexed in members
+            ]
+            specs = [
+                {"owner": params["owner"], "repo": params["project"], "branch": head or params["branch"]}
+                for (_, params, _), head in zip(members, heads)
+            ]
+            aggregators: List[Any] = [CommitAggregator() for _ in members]
+            with telemetry.span("aggregate_batch", repos=len(specs)):
+                async for position, commits in iter_histories_async(specs, since=since, max_commits=max_commits,
+                                                                    token=token):
+                    if isinstance(commits, Exception):
+                        aggregators[position] = commits
+                    else:
+                        aggregators[position].consume(commits)
+        except Exception as e:
+            telemetry.log_event(logger, "Batched history fetch failed", logging.WARNING, error=str(e))
+            continue
+        for (key, params, indexed), head, aggregator in zip(members, heads, aggregators):
+            if indexed and isinstance(aggregator, CommitAggregator):
+                aggregator = stats_index.store_rebuilt(params["owner"], params["project"], params["branch"],
+                                                       head, aggregator)
+            results[key] = aggregator
+    return results
+
+
+def batch_profile(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate profile per author across a batch's successful results."""
+    profiles = {}
+    for result in results:
+        if not result["success"]:
+            continue
+        stats = result["stats"]
+        profile = profiles.setdefault(normalize_author(result["author"]), {
+            "author": result["author"],
+            "repos": 0,
+            "active_repos": 0,
+            "total_commits": 0,
+            "author_commits": 0,
+            "ratings": [],
+            "repositories": [],
+        })
+        profile["repos"] += 1
+        profile["active_repos"] += 1 if stats["author_commits"] else 0
+        profile["total_commits"] += stats["total_commits"]
+        profile["author_commits"] += stats["author_commits"]
+        profile["ratings"].append(stats["rating"])
+        profile["repositories"].append({
+            "repo": f"{result['owner']}/{result['project']}",
+            "author_commits": stats["author_commits"],
+            "percentage": stats["percentage"],
+            "rating": stats["rating"],
+        })
+
+    authors = []
+    for profile in profiles.values():
+        ratings = profile.pop("ratings")
+        # Share of all commits across the repositories, so big repos weigh more than small ones
+        percentage = contribution_percentage(profile["author_commits"], profile["total_commits"])
+        profile.update({
+            "overall_percentage": percentage,
+            "overall_rating": contribution_rating(percentage),
+            "average_rating": statistics.mean(ratings),
+            "best_rating": max(ratings),
+        })
+        profile["repositories"].sort(key=lambda repo: repo["author_commits"], reverse=True)
+        authors.append(profile)
+
+    return {
+        "repos_analyzed": sum(1 for result in results if result["success"]),
+        "repos_failed": sum(1 for result in results if not result["success"]),
+        "authors": authors,
+    }
+
+
+async def analyze_batch(jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Run contribution analyses for a list of parsed jobs.
+
+    Jobs reading the same history (e.g. several authors on one repository)
+    share a single fetch, and distinct repositories are fetched concurrently,
+    at most BATCH_CONCURRENCY at a time. With the GraphQL backend, histories
+    read in full are fetched together, several repositories per query. A
+    repository that fails is reported in its own result without affecting
+    the others.
+
+    Returns:
+        Dictionary with per-job results (in request order) and the aggregate profile
+    """
+    repositories = {}
+    for params in jobs:
+        repositories.setdefault(_repository_key(params), params)
+
+    async def aggregate(params):
+        with github_token_context(params["github_token"]):
+            return await _aggregate(params)
+
+    keys = list(repositories)
+    by_key = await _batched_histories(repositories) if GITHUB_COMMITS_BACKEND.lower() == "graphql" else {}
+    remaining = [key for key in keys if key not in by_key]
+    aggregates = await gather_bounded(
+        [lambda params=repositories[key]: aggregate(params) for key in remaining], limit=BATCH_CONCURRENCY
+    )
+    by_key.update(zip(remaining, aggregates))
+
+    results = []
+    for params in jobs:
+        aggregator = by_key[_repository_key(params)]
+        result = {
+            "owner": params["owner"],
+            "project": params["project"],
+            "author": params["author"],
+            "branch": params["branch"],
+        }
+        if isinstance(aggregator, BaseException):
+            result.update({"success": False, "error": str(aggregator)})
+        else:
+            result.update({"success": True, **contribution_result(params["project"], params["author"], aggregator)})
+        results.append(result)
+
+    return {
+        "success": True,
+        "repos_fetched": len(keys),
+        "results": results,
+        "profile": batch_profile(results),
+    }
+
+
+def _public_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Request params safe to store with a job (the token stays in memory only)."""
+    return {name: value for name, value in params.items() if name != "github_token"}
+
+
+def _job_token(params: Dict[str, Any]) -> str:
+    return params["github_token"] or os.getenv("GITHUB_TOKEN") or ""
+
+
+def submit_analysis_job(data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Queue a single or batch analysis as a background job.
+
+    A body with "jobs" is a batch (same fields as the batch endpoint),
+    anything else a single analysis. Submitting the same work as a job that
+    is still queued or running returns that job.
+
+    Returns:
+        (job snapshot, True if an existing job was reused)
+
+    Raises:
+        ValueError: If the request fields are invalid
+        JobsUnavailable: If job mode is disabled (the default on serverless deployments)
+    """
+    if not jobs.JOBS_ENABLED:
+        raise jobs.JobsUnavailable(
+            "Background jobs need a long-running server; use /api/analyze-contribution "
+            "or /api/analyze-contribution/batch on this deployment."
+        )
+    queue = jobs.get_job_queue()
+    if isinstance(data, dict) and "jobs" in data:
+        batch = parse_batch_request(data)
+        log_batch_request(batch)
+        token = "\n".join(sorted({_job_token(params) for params in batch}))
+        return queue.submit(
+            "batch", {"jobs": [_public_params(params) for params in batch]},
+            lambda: analyze_batch(batch), token=token
+        )
+
+    params = parse_analysis_request(data)
+    log_analysis_request(params)
+
+    async def run():
+        return {"success": True, "result": await analyze(params)}
+
+    return queue.submit("analyze", _public_params(params), run, token=_job_token(params))
+
+
+def get_analysis_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Current snapshot of a background job, or None if it is unknown or expired."""
+    return jobs.get_job_queue().get(job_id)
+
+
+async def job_events(job_id: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Status events for a background job, in analyze_stream's event format.
+
+    A "status" event is sent on every status change; the last event is
+    "result" with the finished job or "error" if it failed.
+    """
+    async for job in jobs.get_job_queue().watch(job_id):
+        if job["status"] == "succeeded":
+            yield {"event": "result", "data": job}
+        elif job["status"] == "failed":
+            yield {"event": "error", "data": {"success": False, **job}}
+        else:
+            yield {"event": "status", "data": job}
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode an analyze_stream event as a Server-Sent Events frame."""
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def debug_info() -> Dict[str, Any]:
+    """Runtime and cache details served by /debug."""
+    return {
+        "python_executable": sys.executable,
+        "python_version": sys.version,
+        "python_path": sys.path,
+        "cwd": os.getcwd(),
+        "env_vars": {
+            "GITHUB_TOKEN": "***" if os.getenv("GITHUB_TOKEN") else None,
+            "GITHUB_API_BASE": os.getenv("GITHUB_API_BASE")
+        },
+        "github_cache": github_cache.cache_stats(),
+        "content_cache": diff_cache.get_content_cache().stats(),
+        "github_rate_limits": rate_limit.get_scheduler().budgets(),
+        "stats_index": stats_index.index_stats(),
+        "result_cache": result_cache.result_cache_stats(),
+        "model_cache": model_cache.model_cache_stats(),
+        "tool_output_tokens": tool_token_stats(),
+        "jobs": jobs.get_job_queue().stats(),
+        # False until the first narrative: the agent stack is imported on demand
+        "agent_loaded": "agents" in sys.modules
+    }
+
+
+__all__ = [
+    'NarrativeUnavailable',
+    'load_agent_runtime',
+    'parse_analysis_request',
+    'log_analysis_request',
+    'analyze',
+    'analyze_stream',
+    'parse_batch_request',
+    'log_batch_request',
+    'analyze_batch',
+    'batch_profile',
+    'submit_analysis_job',
+    'get_analysis_job',
+    'job_events',
+    'format_sse',
+    'debug_info'
+]
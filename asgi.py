@@ -0,0 +1,220 @@
+"""
+ASGI entry point serving the same API as index.py.
+
+Analyses run natively on the server's event loop, so a single worker can
+multiplex many concurrent I/O-bound requests instead of pinning a thread per
+request. Run with any ASGI server, e.g.:
+
+    uvicorn asgi:app --port 8765
+
+The agent stack (autogen, openai) is imported on the first narrative
+request; set AGENT_PRELOAD=true to load it in the background at startup
+instead, for long-running servers where startup time matters less.
+
+Job mode (/api/jobs) runs analyses in the background after answering 202
+and keeps their status in the serving process (or JOB_DB_PATH's SQLite
+file), so it needs a long-lived server such as this one. On serverless
+deployments (the Vercel build in vercel.json) the function may be frozen
+once the response is sent and a status poll may reach another instance,
+so POST /api/jobs answers 503 there unless JOBS_ENABLED=true.
+"""
+import asyncio
+import contextlib
+import logging
+import os
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from analysis import (
+    load_agent_runtime,
+    parse_analysis_request, log_analysis_request, analyze, analyze_stream, format_sse, debug_info,
+    parse_batch_request, log_batch_request, analyze_batch,
+    submit_analysis_job, get_analysis_job, job_events
+)
+from githubmcp_async import close_async_client
+from jobs import JobsUnavailable
+import telemetry
+
+logger = telemetry.get_logger("http")
+
+AGENT_PRELOAD = os.getenv("AGENT_PRELOAD", "false").lower() not in ("0", "false", "no", "off")
+
+
+async def analyze_contribution(request: Request) -> JSONResponse:
+    try:
+        # Get JSON data from request
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+
+        # Extract and validate fields
+        try:
+            params = parse_analysis_request(data)
+        except ValueError as e:
+            return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+
+        log_analysis_request(params)
+
+        result = await analyze(params)
+        return JSONResponse(result, status_code=200)
+
+    except Exception as e:
+        telemetry.log_event(logger, "Request failed", logging.ERROR, exc_info=True, error=str(e))
+
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+async def analyze_contribution_stream(request: Request):
+    """Same analysis as /api/analyze-contribution, streamed as Server-Sent Events."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+
+    try:
+        params = parse_analysis_request(data)
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+
+    log_analysis_request(params)
+
+    async def events():
+        async for event in analyze_stream(params):
+            yield format_sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+async def analyze_contribution_batch(request: Request) -> JSONResponse:
+    """Analyze many (owner, project, author) jobs in one request."""
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+
+        try:
+            jobs = parse_batch_request(data)
+        except ValueError as e:
+            return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+
+        log_batch_request(jobs)
+
+        return JSONResponse(await analyze_batch(jobs), status_code=200)
+
+    except Exception as e:
+        telemetry.log_event(logger, "Request failed", logging.ERROR, exc_info=True, error=str(e))
+
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+def job_accepted(job: dict, coalesced: bool) -> dict:
+    return {
+        "success": True,
+        "job_id": job["id"],
+        "status": job["status"],
+        "coalesced": coalesced,
+        "status_url": f"/api/jobs/{job['id']}",
+        "events_url": f"/api/jobs/{job['id']}/events",
+    }
+
+
+async def create_job(request: Request) -> JSONResponse:
+    """Queue a single or batch analysis; poll status_url or subscribe to events_url for the result."""
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+
+        try:
+            job, coalesced = submit_analysis_job(data)
+        except ValueError as e:
+            return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+        except JobsUnavailable as e:
+            return JSONResponse({"success": False, "error": str(e)}, status_code=503)
+
+        return JSONResponse(job_accepted(job, coalesced), status_code=202)
+
+    except Exception as e:
+        telemetry.log_event(logger, "Request failed", logging.ERROR, exc_info=True, error=str(e))
+
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+async def get_job(request: Request) -> JSONResponse:
+    job = get_analysis_job(request.path_params['job_id'])
+    if job is None:
+        return JSONResponse({"success": False, "error": "Job not found"}, status_code=404)
+    return JSONResponse(job, status_code=200)
+
+
+async def job_status_events(request: Request):
+    """Job status changes as Server-Sent Events, ending with the result."""
+    job_id = request.path_params['job_id']
+    if get_analysis_job(job_id) is None:
+        return JSONResponse({"success": False, "error": "Job not found"}, status_code=404)
+
+    async def events():
+        async for event in job_events(job_id):
+            yield format_sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+async def health_check(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "Backend is running"}, status_code=200)
+
+
+async def debug(request: Request) -> JSONResponse:
+    return JSONResponse(debug_info(), status_code=200)
+
+
+async def metrics(request: Request) -> Response:
+    """Prometheus metrics of this worker process."""
+    return Response(telemetry.render_metrics(), media_type=telemetry.METRICS_CONTENT_TYPE)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    if AGENT_PRELOAD:
+        # Off the event loop: requests are served while the import runs
+        asyncio.get_running_loop().run_in_executor(None, load_agent_runtime)
+    yield
+    # Release the GitHub connection pool bound to the server's loop
+    await close_async_client()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/analyze-contribution', analyze_contribution, methods=['POST']),
+        Route('/api/analyze-contribution/stream', analyze_contribution_stream, methods=['POST']),
+        Route('/api/analyze-contribution/batch', analyze_contribution_batch, methods=['POST']),
+        Route('/api/jobs', create_job, methods=['POST']),
+        Route('/api/jobs/{job_id}', get_job, methods=['GET']),
+        Route('/api/jobs/{job_id}/events', job_status_events, methods=['GET']),
+        Route('/health', health_check, methods=['GET']),
+        Route('/debug', debug, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+    ],
+    middleware=[
+        # Outermost, so the root span covers everything the request goes through
+        Middleware(telemetry.ASGITelemetryMiddleware),
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,146 @@
+import asyncio
+import contextvars
+import os
+import queue
+import threading
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional
+
+# One long-lived event loop per process, running in a daemon thread. Sync
+# request handlers submit coroutines to it instead of calling asyncio.run,
+# so loop-bound resources (model client, async HTTP pools) survive between requests.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+# Items iterate_async buffers ahead of a slow consumer before the producer waits
+ASYNC_ITERATE_QUEUE_SIZE = int(os.getenv("ASYNC_ITERATE_QUEUE_SIZE", "64"))
+# How often a waiting consumer checks that the producer task is still alive
+_POLL_INTERVAL = 1.0
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop, starting it on first use."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=_run_loop, args=(loop,), name="async-runtime", daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+async def _run_in_context(context: contextvars.Context, coro: Coroutine) -> Any:
+    """Apply the submitting thread's context variables (e.g. the request's GitHub token) to this task."""
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+def run_async(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on the shared loop and block until it finishes.
+
+    Safe to call from any number of threads at once; the coroutines run
+    concurrently on the one loop, each seeing the caller's context variables.
+    """
+    wrapped = _run_in_context(contextvars.copy_context(), coro)
+    future = asyncio.run_coroutine_threadsafe(wrapped, get_loop())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def iterate_async(agen: AsyncIterator) -> Iterator:
+    """
+    Consume an async iterator on the shared loop, yielding its items synchronously.
+
+    The whole iteration runs as one task (so context managers inside the
+    async generator stay in a single context); items are handed over through
+    a bounded queue, and the task waits (off the loop) while it is full, so a
+    slow consumer holds back the producer. Closing the returned iterator
+    early cancels the task.
+    """
+    items: "queue.Queue" = queue.Queue(maxsize=max(1, ASYNC_ITERATE_QUEUE_SIZE))
+    closed = threading.Event()
+    done = object()
+
+    def put_blocking(entry):
+        # Gives up once the consumer has gone, so the worker thread isn't stuck on a full queue
+        while not closed.is_set():
+            try:
+                items.put(entry, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    async def hand_over(entry):
+        try:
+            items.put_nowait(entry)
+        except queue.Full:
+            await asyncio.to_thread(put_blocking, entry)
+
+    async def pump():
+        try:
+            async for item in agen:
+                await hand_over((item, None))
+        except Exception as e:
+            # Re-raised in the consuming thread
+            await hand_over((done, e))
+        else:
+            await hand_over((done, None))
+
+    def take():
+        while True:
+            try:
+                return items.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if task.done():
+                    # Cancelled before it could hand over the end marker
+                    try:
+                        return items.get_nowait()
+                    except queue.Empty:
+                        return done, None
+
+    async def start():
+        return asyncio.ensure_future(_run_in_context(context, pump()))
+
+    context = contextvars.copy_context()
+    task = asyncio.run_coroutine_threadsafe(start(), get_loop()).result()
+    try:
+        while True:
+            item, error = take()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        closed.set()
+        if not task.done():
+            get_loop().call_soon_threadsafe(task.cancel)
+
+
+def _forget_loop_after_fork():
+    """The loop thread does not survive fork; a forked worker starts its own."""
+    global _loop, _loop_lock
+    _loop = None
+    _loop_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_loop_after_fork)
+
+
+__all__ = [
+    'get_loop',
+    'run_async',
+    'iterate_async'
+]
@@ -0,0 +1,162 @@
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# 12345+login@users.noreply.github.com (current form) or login@users.noreply.github.com (legacy)
+NOREPLY_RE = re.compile(r"^(?:\d+\+)?([^@+]+)@users\.noreply\.github\.com$", re.IGNORECASE)
+
+# Addresses many unrelated people commit under; linking through them would merge everyone
+SHARED_EMAILS = {
+    "noreply@github.com",
+    "root@localhost",
+    "none@none",
+    "you@example.com",
+    "your.email@example.com",
+}
+
+
+def normalize_author(name: str) -> str:
+    """Normalize an author name for case/whitespace-insensitive matching."""
+    return " ".join((name or "").split()).casefold()
+
+
+def compact_name(name: str) -> str:
+    """Name variant key: case-folded letters and digits only ("Alice Smith" == "alice.smith")."""
+    return "".join(ch for ch in (name or "").casefold() if ch.isalnum())
+
+
+def noreply_login(email: str) -> Optional[str]:
+    """The GitHub login encoded in a noreply address, if it is one."""
+    match = NOREPLY_RE.match((email or "").strip())
+    return match.group(1).lower() if match else None
+
+
+def commit_aliases(commit: dict) -> List[str]:
+    """Login and email aliases a commit ties its author name to."""
+    aliases = []
+    login = (commit.get("login") or "").strip().lower()
+    if login:
+        aliases.append(f"login:{login}")
+    email = (commit.get("email") or "").strip().lower()
+    if "@" in email and email not in SHARED_EMAILS:
+        aliases.append(f"email:{email}")
+        from_noreply = noreply_login(email)
+        if from_noreply:
+            aliases.append(f"login:{from_noreply}")
+    return aliases
+
+
+class IdentityResolver:
+    """
+    Groups the names, emails and logins a repository's authors commit under.
+
+    Every commit links its author name to its email and login, so all of an
+    author's variants end up in one identity (union-find). Resolving a
+    requested author string is then a few dict lookups, whichever form the
+    caller knows them by.
+    """
+
+    def __init__(self):
+        self._parent: Dict[str, str] = {}
+        self._members: Dict[str, Set[str]] = {}
+        # (alias, author key) pairs seen so far, enough to rebuild the groups
+        self.links: Set[Tuple[str, str]] = set()
+
+    def _find(self, node: str) -> str:
+        parent = self._parent.setdefault(node, node)
+        if parent == node:
+            self._members.setdefault(node, {node})
+            return node
+        root = self._find(parent)
+        self._parent[node] = root
+        return root
+
+    def _union(self, a: str, b: str):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return
+        if len(self._members[root_a]) < len(self._members[root_b]):
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._members[root_a] |= self._members.pop(root_b)
+
+    def add_author(self, author_key: str):
+        """Register an author key (a normalized name) and its name-variant alias."""
+        node = f"author:{author_key}"
+        if node not in self._parent:
+            self._union(node, f"name:{compact_name(author_key)}" if compact_name(author_key) else node)
+
+    def link(self, alias: str, author_key: str):
+        """Tie an alias ("login:..." or "email:...") to an author key."""
+        self.add_author(author_key)
+        if (alias, author_key) not in self.links:
+            self.links.add((alias, author_key))
+            self._union(alias, f"author:{author_key}")
+
+    def add_commit(self, commit: dict, author_key: str):
+        """Record the identities a commit dictionary reveals for its author."""
+        self.add_author(author_key)
+        for alias in commit_aliases(commit):
+            self.link(alias, author_key)
+
+    def merge(self, other: "IdentityResolver") -> "IdentityResolver":
+        """Fold another resolver's links into this one and return self."""
+        for node in other._parent:
+            if node.startswith("author:"):
+                self.add_author(node[len("author:"):])
+        for alias, author_key in other.links:
+            self.link(alias, author_key)
+        return self
+
+    def author_keys(self, author: str) -> Set[str]:
+        """
+        Author keys belonging to the identity `author` refers to.
+
+        `author` may be a login, an email (noreply included) or any name
+        variant. Exact logins and emails take precedence over name matches,
+        so a login never picks up a different person who happens to share a
+        display name.
+        """
+        query = (author or "").strip()
+        lowered = query.lower()
+        exact = [f"login:{lowered.lstrip('@')}", f"email:{lowered}"]
+        if noreply_login(lowered):
+            exact.append(f"login:{noreply_login(lowered)}")
+        by_name = [f"author:{normalize_author(query)}", f"name:{compact_name(query)}"]
+
+        for candidates in (exact, by_name):
+            roots = {self._find(node) for node in candidates if node in self._parent}
+            if roots:
+                return {
+                    member[len("author:"):]
+                    for root in roots for member in self._members[root] if member.startswith("author:")
+                }
+        return set()
+
+    def identities(self) -> List[Dict[str, List[str]]]:
+        """Every identity group as {"authors", "emails", "logins"}."""
+        groups = []
+        for root in {self._find(node) for node in list(self._parent)}:
+            members = self._members[root]
+            groups.append({
+                kind: sorted(member.split(":", 1)[1] for member in members if member.startswith(f"{prefix}:"))
+                for kind, prefix in (("authors", "author"), ("emails", "email"), ("logins", "login"))
+            })
+        return [group for group in groups if group["authors"]]
+
+    @classmethod
+    def from_links(cls, author_keys: Iterable[str], links: Iterable[Tuple[str, str]]) -> "IdentityResolver":
+        """Rebuild a resolver from stored author keys and (alias, author key) links."""
+        resolver = cls()
+        for author_key in author_keys:
+            resolver.add_author(author_key)
+        for alias, author_key in links:
+            resolver.link(alias, author_key)
+        return resolver
+
+
+__all__ = [
+    'normalize_author',
+    'compact_name',
+    'noreply_login',
+    'IdentityResolver'
+]
@@ -0,0 +1,73 @@
+"""
+Per-request agent setup cost: rebuilding everything vs. the shared factory.
+
+Usage:
+    python benchmarks/bench_agent_setup.py [--iterations N]
+
+No network access is needed; agents are constructed but never run. Results
+are printed as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Construction never contacts Azure, placeholder credentials are enough
+os.environ.setdefault("AZURE_API_KEY", "benchmark")
+os.environ.setdefault("AZURE_API_ENDPOINT", "https://benchmark.invalid")
+os.environ.setdefault("AZURE_DEPLOYMENT", "benchmark")
+
+import agents  # noqa: E402
+from async_runtime import run_async  # noqa: E402
+
+
+async def rebuild_everything():
+    """What every request used to pay: new tools, new model client, new agent."""
+    tools = agents.create_github_tools()
+    model_client = await agents.create_model_client()
+    return agents.AssistantAgent(name="github_agent", model_client=model_client, tools=tools)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "iterations": len(samples),
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    rebuild = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        asyncio.run(rebuild_everything())
+        rebuild.append(time.perf_counter() - start)
+
+    # Warm the shared model client and tools once, as the first request would
+    run_async(agents.create_mcp_agent())
+    shared = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        run_async(agents.create_mcp_agent())
+        shared.append(time.perf_counter() - start)
+
+    print(json.dumps({
+        "benchmark": "agent_setup",
+        "rebuild_per_request": summarize(rebuild),
+        "shared_factory": summarize(shared),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
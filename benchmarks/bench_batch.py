@@ -0,0 +1,105 @@
+"""
+Batch analysis: one /api/analyze-contribution/batch call vs one request per repository.
+
+A candidate is evaluated across --repos repositories of the local GitHub stub
+(fixed per-request latency). The per-repository baseline sends the requests
+one after another, as the frontend did; the batch sends them all at once and
+lets the server fetch repositories concurrently. Both go through the ASGI app
+in-process, with response caching and the stats index off so every run
+really fetches the histories.
+
+Usage:
+    python benchmarks/bench_batch.py [--repos N] [--commits N] [--latency SECONDS] [--concurrency C]
+
+Results are printed as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from github_stub import GitHubStub  # noqa: E402
+
+
+async def run(repos: list, concurrency: int, stub: GitHubStub) -> dict:
+    import httpx
+    import analysis
+    import asgi
+
+    analysis.BATCH_CONCURRENCY = concurrency
+    jobs = [{"owner": "bench", "project": name, "author": "Alice"} for name in repos]
+    transport = httpx.ASGITransport(app=asgi.app)
+    results = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://asgi", timeout=None) as client:
+        requests_before = stub.request_count
+        start = time.perf_counter()
+        for job in jobs:
+            response = await client.post("/api/analyze-contribution", json=job)
+            assert response.status_code == 200, response.text
+        elapsed = time.perf_counter() - start
+        results.append({
+            "mode": "sequential single requests",
+            "elapsed_s": elapsed,
+            "repos_per_s": len(jobs) / elapsed,
+            "github_requests": stub.request_count - requests_before,
+        })
+
+        requests_before = stub.request_count
+        start = time.perf_counter()
+        response = await client.post("/api/analyze-contribution/batch", json={"jobs": jobs})
+        elapsed = time.perf_counter() - start
+        body = response.json()
+        assert response.status_code == 200 and body["profile"]["repos_failed"] == 0, response.text
+        results.append({
+            "mode": f"batch (concurrency {concurrency})",
+            "elapsed_s": elapsed,
+            "repos_per_s": len(jobs) / elapsed,
+            "github_requests": stub.request_count - requests_before,
+            "overall_rating": body["profile"]["authors"][0]["overall_rating"],
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repos", type=int, default=30)
+    parser.add_argument("--commits", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated GitHub latency per request")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    repos = [f"repo{i}" for i in range(args.repos)]
+    stub = GitHubStub({name: args.commits for name in repos}, latency=args.latency)
+    base_url = stub.start()
+
+    # Configure before the app modules are imported
+    os.environ["GITHUB_API_BASE"] = base_url
+    os.environ["GITHUB_TOKEN"] = "benchmark"
+    os.environ["GITHUB_CACHE_BACKEND"] = "none"
+    os.environ["STATS_INDEX_ENABLED"] = "false"
+    os.environ.setdefault("AZURE_API_KEY", "benchmark")
+    os.environ.setdefault("AZURE_API_ENDPOINT", "https://benchmark.invalid")
+    os.environ.setdefault("AZURE_DEPLOYMENT", "benchmark")
+
+    try:
+        results = asyncio.run(run(repos, args.concurrency, stub))
+    finally:
+        stub.stop()
+
+    print(json.dumps({
+        "benchmark": "batch",
+        "github_latency_s": args.latency,
+        "repos": args.repos,
+        "commits_per_repo": args.commits,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
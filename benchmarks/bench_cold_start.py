@@ -0,0 +1,142 @@
+"""
+Cold start: import time, memory and first /health response of a fresh process.
+
+Each run starts a new interpreter with `python -X importtime`, imports the
+entry point (index for Flask/Vercel, asgi for uvicorn), serves one /health
+request in-process, and then loads the agent stack a narrative analysis
+needs, recording time and RSS after each step. The slowest imports by
+cumulative time are taken from the importtime report.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--runs N] [--entry index|asgi|all] [--top N]
+
+No network access is needed. Results are printed as JSON.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the fresh interpreter; prints one JSON line on stdout
+CHILD = r"""
+import asyncio, json, os, resource, sys, time
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def health_asgi(app):
+    messages = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    scope = {"type": "http", "method": "GET", "path": "/health", "raw_path": b"/health", "query_string": b"",
+             "headers": [], "http_version": "1.1", "scheme": "http", "server": ("bench", 80),
+             "client": ("bench", 1), "root_path": ""}
+    asyncio.run(app(scope, receive, send))
+    return messages[0]["status"]
+
+result = {"baseline_rss_mb": rss_mb()}
+start = time.perf_counter()
+module = __import__(ENTRY)
+result["import_ms"] = (time.perf_counter() - start) * 1000
+result["import_rss_mb"] = rss_mb()
+
+start = time.perf_counter()
+if ENTRY == "index":
+    response = module.app.test_client().get("/health")
+    status = response.status_code
+    response.close()
+else:
+    status = health_asgi(module.app)
+result["first_health_ms"] = (time.perf_counter() - start) * 1000
+result["health_status"] = status
+result["heavy_modules_loaded"] = sorted(name for name in HEAVY if name in sys.modules)
+
+start = time.perf_counter()
+import analysis
+analysis.load_agent_runtime()
+result["agent_import_ms"] = (time.perf_counter() - start) * 1000
+result["agent_rss_mb"] = rss_mb()
+print(json.dumps(result))
+"""
+
+# Dependencies that only the agent (narrative) path needs
+HEAVY_MODULES = ("autogen_agentchat", "autogen_core", "autogen_ext", "openai", "tiktoken")
+
+
+def parse_importtime(stderr: str, top: int) -> list:
+    """The `top` modules with the largest cumulative import time."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        imports.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    return sorted(imports, key=lambda item: item["cumulative_ms"], reverse=True)[:top]
+
+
+def run_once(entry: str, top: int) -> dict:
+    env = dict(os.environ)
+    env.setdefault("LOG_LEVEL", "WARNING")
+    # Placeholders: the model client is never created, only its modules are imported
+    env.setdefault("AZURE_API_KEY", "benchmark")
+    env.setdefault("AZURE_API_ENDPOINT", "https://benchmark.invalid")
+    env.setdefault("AZURE_DEPLOYMENT", "benchmark")
+    code = f"ENTRY = {entry!r}\nHEAVY = {HEAVY_MODULES!r}\n{CHILD}"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Only the entry point's own import tree, not the agent stack loaded afterwards
+    entry_stderr = completed.stderr.split(f"| {entry}\n")[0] + f"| {entry}\n"
+    result["slowest_imports"] = parse_importtime(entry_stderr, top)
+    return result
+
+
+def summarize(entry: str, runs: list) -> dict:
+    def median(field):
+        return statistics.median(run[field] for run in runs)
+
+    return {
+        "entry": entry,
+        "runs": len(runs),
+        "import_ms": median("import_ms"),
+        "first_health_ms": median("first_health_ms"),
+        "health_status": runs[-1]["health_status"],
+        "baseline_rss_mb": median("baseline_rss_mb"),
+        "import_rss_mb": median("import_rss_mb"),
+        "heavy_modules_loaded_at_startup": runs[-1]["heavy_modules_loaded"],
+        "agent_import_ms": median("agent_import_ms"),
+        "agent_rss_mb": median("agent_rss_mb"),
+        "slowest_imports": runs[-1]["slowest_imports"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--entry", choices=("index", "asgi", "all"), default="all")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to report")
+    args = parser.parse_args()
+
+    entries = ("index", "asgi") if args.entry == "all" else (args.entry,)
+    results = [summarize(entry, [run_once(entry, args.top) for _ in range(args.runs)]) for entry in entries]
+    print(json.dumps({"benchmark": "cold_start", "python": sys.version.split()[0], "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Commit history backends: REST commits endpoint vs GraphQL history pages.
+
+Counts one large repository's history with each backend, then several
+repositories at once (GraphQL batches them into shared queries), and reports
+requests made, bytes received and wall time against the local GitHub stub.
+
+Usage:
+    python benchmarks/bench_commit_backends.py [--commits N] [--repos R] [--latency SECONDS]
+
+Results are printed as JSON.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from github_stub import GitHubStub  # noqa: E402
+
+
+def measure(stub: GitHubStub, name: str, run) -> dict:
+    requests_before, bytes_before = stub.request_count, stub.bytes_sent
+    start = time.perf_counter()
+    commits = run()
+    return {
+        "backend": name,
+        "commits": commits,
+        "requests": stub.request_count - requests_before,
+        "bytes": stub.bytes_sent - bytes_before,
+        "elapsed_s": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commits", type=int, default=5000, help="History size of each repository")
+    parser.add_argument("--repos", type=int, default=10, help="Repositories in the multi-repo scenario")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated GitHub latency per request")
+    args = parser.parse_args()
+
+    names = [f"repo{i}" for i in range(args.repos)]
+    stub = GitHubStub({name: args.commits for name in names}, latency=args.latency)
+    base_url = stub.start()
+
+    # Configure before the app modules are imported; caching is off so every
+    # page is really fetched
+    os.environ["GITHUB_API_BASE"] = base_url
+    os.environ["GITHUB_TOKEN"] = "benchmark"
+    os.environ["GITHUB_CACHE_BACKEND"] = "none"
+
+    from githubmcp import iter_commits
+    from github_graphql import iter_commits_graphql, iter_histories
+
+    def count(commits) -> int:
+        return sum(1 for _ in commits)
+
+    def rest_many() -> int:
+        return sum(count(iter_commits("bench", name)) for name in names)
+
+    def graphql_many() -> int:
+        repos = [{"owner": "bench", "repo": name} for name in names]
+        return sum(len(commits) for _, commits in iter_histories(repos))
+
+    try:
+        results = {
+            "single_repo": [
+                measure(stub, "rest", lambda: count(iter_commits("bench", names[0]))),
+                measure(stub, "graphql", lambda: count(iter_commits_graphql("bench", names[0]))),
+            ],
+            "multi_repo": [
+                measure(stub, "rest", rest_many),
+                measure(stub, "graphql", graphql_many),
+            ],
+        }
+    finally:
+        stub.stop()
+
+    print(json.dumps({
+        "benchmark": "commit_backends",
+        "github_latency_s": args.latency,
+        "commits_per_repo": args.commits,
+        "repos": args.repos,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Local git mirror backend: first clone vs warm reads vs incremental fetch.
+
+Builds a synthetic bare repository (via `git fast-import`), then times
+counting its history through git_mirror: the first run clones, a second run
+within GIT_FETCH_INTERVAL reads the mirror as is, and a third run after new
+commits are pushed fetches only those.
+
+Usage:
+    python benchmarks/bench_git_mirror.py [--commits N] [--new-commits N]
+
+Results are printed as JSON.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+AUTHORS = ("Alice", "Bob", "Carol", "Dave")
+
+
+def fast_import_stream(start: int, count: int, parent: bool) -> bytes:
+    """A fast-import stream appending `count` single-file commits to refs/heads/main."""
+    lines = []
+    for i in range(start, start + count):
+        author = AUTHORS[i % len(AUTHORS)]
+        content = f"change {i}\n".encode("utf-8")
+        message = f"Commit {i}".encode("utf-8")
+        lines.append(b"commit refs/heads/main")
+        lines.append(f"author {author} <{author.lower()}@example.com> {1700000000 + i * 60} +0000".encode("utf-8"))
+        lines.append(f"committer {author} <{author.lower()}@example.com> {1700000000 + i * 60} +0000".encode("utf-8"))
+        lines.append(f"data {len(message)}".encode("utf-8") + b"\n" + message)
+        if i == start and parent:
+            lines.append(b"from refs/heads/main^0")
+        lines.append(f"M 100644 inline src/file_{i % 50}.txt".encode("utf-8"))
+        lines.append(f"data {len(content)}".encode("utf-8") + b"\n" + content)
+        lines.append(b"")
+    return b"\n".join(lines) + b"\n"
+
+
+def add_commits(bare_path: str, start: int, count: int):
+    subprocess.run(
+        ["git", "fast-import", "--quiet"], cwd=bare_path, check=True,
+        input=fast_import_stream(start, count, parent=start > 0)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commits", type=int, default=20000)
+    parser.add_argument("--new-commits", type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hirelens_git_bench_")
+    bare_path = os.path.join(workdir, "origin", "bench", "repo.git")
+    subprocess.run(["git", "init", "--quiet", "--bare", "-b", "main", bare_path], check=True)
+    add_commits(bare_path, 0, args.commits)
+
+    # Configure before the app modules are imported; file:// makes git pack and
+    # transfer objects as it would over the network instead of hardlinking them
+    os.environ["GIT_CLONE_BASE"] = "file://" + os.path.join(workdir, "origin")
+    os.environ["GIT_MIRROR_DIR"] = os.path.join(workdir, "mirrors")
+    os.environ["GIT_FETCH_INTERVAL"] = "3600"
+    os.environ.setdefault("GITHUB_TOKEN", "benchmark")
+
+    import git_mirror
+    from contribution import CommitAggregator
+
+    def timed(name: str) -> dict:
+        start = time.perf_counter()
+        aggregator = CommitAggregator().consume(git_mirror.iter_commits_git("bench", "repo"))
+        return {"run": name, "total_commits": aggregator.total_commits, "elapsed_s": time.perf_counter() - start}
+
+    try:
+        results = [timed("first (clone)"), timed("warm (no fetch)")]
+
+        add_commits(bare_path, args.commits, args.new_commits)
+        # Let the next read fetch again
+        os.utime(git_mirror.GitMirror("bench", "repo")._marker, (0, 0))
+        results.append(timed(f"incremental fetch (+{args.new_commits} commits)"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({
+        "benchmark": "git_mirror",
+        "commits": args.commits,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Load test: Flask (thread per request) vs ASGI (one event loop) for /api/analyze-contribution.
+
+Both apps are driven in-process against the local GitHub stub with a fixed
+per-request latency. The Flask app is served by a bounded thread pool, as a
+threaded WSGI worker would be; the ASGI app runs every request on a single
+event loop.
+
+Usage:
+    python benchmarks/bench_server_load.py [--requests N] [--concurrency C]
+        [--flask-threads T] [--latency SECONDS] [--commits N]
+
+Results are printed as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from github_stub import GitHubStub  # noqa: E402
+
+PAYLOAD = {"owner": "bench", "project": "repo", "author": "Alice"}
+
+
+def summarize(name: str, latencies: list, elapsed: float, errors: int) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "server": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else None,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else None,
+    }
+
+
+def run_flask(total: int, threads: int) -> dict:
+    import index
+
+    client = index.app.test_client()
+
+    def one(_):
+        start = time.perf_counter()
+        response = client.post("/api/analyze-contribution", json=PAYLOAD)
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    return summarize(f"flask ({threads} threads)", [r[0] for r in results], elapsed,
+                     sum(1 for r in results if r[1] != 200))
+
+
+async def run_asgi(total: int, concurrency: int) -> dict:
+    import httpx
+    import asgi
+
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://asgi") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/api/analyze-contribution", json=PAYLOAD)
+                return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+    return summarize(f"asgi (1 event loop, concurrency {concurrency})", [r[0] for r in results], elapsed,
+                     sum(1 for r in results if r[1] != 200))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--flask-threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated GitHub latency per request")
+    parser.add_argument("--commits", type=int, default=300)
+    args = parser.parse_args()
+
+    stub = GitHubStub({"repo": args.commits}, latency=args.latency)
+    base_url = stub.start()
+
+    # Configure before the app modules are imported; caching is off so every
+    # request really waits on the (simulated) network
+    os.environ["GITHUB_API_BASE"] = base_url
+    os.environ["GITHUB_TOKEN"] = "benchmark"
+    os.environ["GITHUB_CACHE_BACKEND"] = "none"
+    os.environ.setdefault("AZURE_API_KEY", "benchmark")
+    os.environ.setdefault("AZURE_API_ENDPOINT", "https://benchmark.invalid")
+    os.environ.setdefault("AZURE_DEPLOYMENT", "benchmark")
+
+    try:
+        flask_result = run_flask(args.requests, args.flask_threads)
+        asgi_result = asyncio.run(run_asgi(args.requests, args.concurrency))
+    finally:
+        stub.stop()
+
+    print(json.dumps({
+        "benchmark": "server_load",
+        "github_latency_s": args.latency,
+        "commits": args.commits,
+        "results": [flask_result, asgi_result],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Offline benchmark suite: end-to-end API scenarios and per-tool microbenchmarks.
+
+GitHub is served by the local stub (synthetic histories, or recorded
+responses with --fixtures) and Azure OpenAI by a deterministic fake model
+client, so runs need no network and are comparable with each other.
+
+End-to-end scenarios drive /api/analyze-contribution through the ASGI app
+in-process:
+    single        one request at a time, numbers only
+    single_agent  one request at a time with a narrative (tool call + reflection)
+    concurrent    --concurrency requests in flight
+    batch         one /api/analyze-contribution/batch call over --batch-repos repositories
+
+Tool microbenchmarks call each githubmcp tool against repositories of every
+size in --sizes (commits of history), reporting the first (cold) call and
+the steady state separately.
+
+Response, result, stats and model-call caches are off so every run does the full work;
+the diff/content cache starts empty in a fresh directory.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 10,100,1000,10000,50000] [--requests N]
+        [--concurrency C] [--batch-repos N] [--commits N] [--latency SECONDS]
+        [--model-latency SECONDS] [--iterations N] [--only e2e|tools]
+        [--fixtures PATH] [--record-from URL] [--output PATH] [--baseline PATH]
+
+Results are printed as JSON (and written to --output). With --baseline, each
+result also carries its change against the matching result of that earlier
+run. --record-from https://api.github.com forwards requests without a fixture
+to GitHub and saves what was received to --fixtures for offline replays.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from github_stub import GitHubStub, commit_sha, load_fixtures, save_fixtures  # noqa: E402
+
+OWNER = "bench"
+AUTHOR = "Alice"
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def latency_stats(samples: list) -> dict:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None, "max_ms": None}
+    return {
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "mean_ms": statistics.mean(samples) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+class Counters:
+    """GitHub requests/bytes served and model calls made since the last reset."""
+
+    def __init__(self, stub: GitHubStub, model):
+        self.stub = stub
+        self.model = model
+        self.reset()
+
+    def reset(self):
+        self._requests, self._bytes, self._calls = self.stub.request_count, self.stub.bytes_sent, self.model.calls
+
+    def snapshot(self) -> dict:
+        return {
+            "github_requests": self.stub.request_count - self._requests,
+            "github_bytes": self.stub.bytes_sent - self._bytes,
+            "model_calls": self.model.calls - self._calls,
+        }
+
+
+async def run_e2e(args, counters: Counters) -> list:
+    import httpx
+    import asgi
+
+    single = {"owner": OWNER, "project": "e2e", "author": AUTHOR}
+    transport = httpx.ASGITransport(app=asgi.app)
+    results = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://asgi", timeout=None) as client:
+        async def timed(path: str, body: dict):
+            start = time.perf_counter()
+            response = await client.post(path, json=body)
+            return time.perf_counter() - start, response.status_code == 200
+
+        async def scenario(name: str, path: str, bodies: list, concurrency: int, **details):
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(body):
+                async with semaphore:
+                    return await timed(path, body)
+
+            counters.reset()
+            start = time.perf_counter()
+            outcomes = await asyncio.gather(*(one(body) for body in bodies))
+            elapsed = time.perf_counter() - start
+            latencies = [latency for latency, _ in outcomes]
+            results.append({
+                "scenario": name,
+                "requests": len(bodies),
+                "concurrency": concurrency,
+                "errors": sum(1 for _, ok in outcomes if not ok),
+                "elapsed_s": elapsed,
+                "throughput_rps": len(bodies) / elapsed if elapsed else None,
+                **latency_stats(latencies),
+                **counters.snapshot(),
+                **details,
+            })
+
+        # One untimed request warms imports, the connection pool and the agent's shared client
+        await timed("/api/analyze-contribution", dict(single, narrative=True))
+
+        await scenario("single", "/api/analyze-contribution", [single] * args.requests, 1)
+        await scenario("single_agent", "/api/analyze-contribution",
+                       [dict(single, narrative=True)] * args.requests, 1)
+        await scenario("concurrent", "/api/analyze-contribution", [single] * args.requests, args.concurrency)
+        jobs = [{"owner": OWNER, "project": f"batch{i}", "author": AUTHOR} for i in range(args.batch_repos)]
+        await scenario("batch", "/api/analyze-contribution/batch", [{"jobs": jobs}], 1, repos=args.batch_repos)
+    return results
+
+
+def tool_calls(size: int) -> list:
+    """(tool name, call) pairs for one repository size."""
+    import githubmcp
+
+    repo = f"size{size}"
+    head = commit_sha(repo, size - 1)
+    return [
+        ("get_latest_commit", lambda: githubmcp.get_latest_commit(OWNER, repo)),
+        ("get_recent_commits", lambda: githubmcp.get_recent_commits(OWNER, repo, count=10)),
+        ("get_commit_diff", lambda: githubmcp.get_commit_diff(OWNER, repo, head)),
+        ("get_file_content", lambda: githubmcp.get_file_content(OWNER, repo, "src/module_0.py", branch=head)),
+        # The full-history walk every contribution count depends on
+        ("iter_commits", lambda: sum(1 for _ in githubmcp.iter_commits(OWNER, repo))),
+    ]
+
+
+def run_tools(args, counters: Counters) -> list:
+    results = []
+    for size in args.sizes:
+        for name, call in tool_calls(size):
+            # Whole-history walks get fewer repetitions on big repositories
+            iterations = args.iterations if name != "iter_commits" else max(1, min(args.iterations, 1000 // size))
+            samples = []
+            counters.reset()
+            for _ in range(iterations + 1):
+                start = time.perf_counter()
+                call()
+                samples.append(time.perf_counter() - start)
+            usage = counters.snapshot()
+            results.append({
+                "tool": name,
+                "commits": size,
+                "iterations": iterations,
+                "first_ms": samples[0] * 1000,
+                **latency_stats(samples[1:]),
+                "github_requests_per_call": usage["github_requests"] / len(samples),
+                "github_bytes_per_call": usage["github_bytes"] / len(samples),
+            })
+    return results
+
+
+def result_id(result: dict) -> tuple:
+    return (result.get("scenario"), result.get("tool"), result.get("commits"))
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """Annotate results with their change against the same results of a baseline run."""
+    previous = {result_id(result): result for section in ("e2e", "tools") for result in baseline.get(section, [])}
+    for section in ("e2e", "tools"):
+        for result in results.get(section, []):
+            old = previous.get(result_id(result))
+            if old is None:
+                continue
+            result["baseline"] = {
+                metric: {"before": old[metric], "change_pct": (result[metric] - old[metric]) / old[metric] * 100}
+                for metric in ("p50_ms", "p95_ms", "throughput_rps", "first_ms")
+                if old.get(metric) and result.get(metric) is not None
+            }
+    return results
+
+
+def run_metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "benchmark": "suite",
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {name: value for name, value in vars(args).items() if name not in ("output", "baseline")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        default=[10, 100, 1000, 10000, 50000], help="Repository sizes for tool microbenchmarks")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per end-to-end scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--batch-repos", type=int, default=10)
+    parser.add_argument("--commits", type=int, default=1000, help="History size in end-to-end scenarios")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated GitHub latency per request")
+    parser.add_argument("--model-latency", type=float, default=0.3, help="Fake model time to first token")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed calls per tool and size")
+    parser.add_argument("--only", choices=("e2e", "tools"))
+    parser.add_argument("--fixtures", help="Recorded GitHub responses to replay (JSON)")
+    parser.add_argument("--record-from", help="Forward unrecorded requests to this API base and save to --fixtures")
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args()
+    if args.record_from and not args.fixtures:
+        parser.error("--record-from needs --fixtures to save the recording to")
+
+    repos = {"e2e": args.commits}
+    repos.update({f"batch{i}": args.commits for i in range(args.batch_repos)})
+    repos.update({f"size{size}": size for size in args.sizes})
+    fixtures = load_fixtures(args.fixtures) if args.fixtures and os.path.exists(args.fixtures) else None
+    stub = GitHubStub(repos, latency=args.latency, fixtures=fixtures, upstream=args.record_from)
+    base_url = stub.start()
+
+    # Configure before the app modules are imported: no cross-run caches, quiet logs
+    os.environ["GITHUB_API_BASE"] = base_url
+    os.environ["GITHUB_TOKEN"] = os.environ.get("GITHUB_TOKEN", "benchmark") if args.record_from else "benchmark"
+    os.environ["GITHUB_CACHE_BACKEND"] = "none"
+    os.environ["RESULT_CACHE_BACKEND"] = "none"
+    os.environ["MODEL_CACHE_BACKEND"] = "none"
+    os.environ["STATS_INDEX_ENABLED"] = "false"
+    os.environ["DIFF_CACHE_DIR"] = tempfile.mkdtemp(prefix="hirelens_bench_diff_")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("AZURE_API_KEY", "benchmark")
+    os.environ.setdefault("AZURE_API_ENDPOINT", "https://benchmark.invalid")
+    os.environ.setdefault("AZURE_DEPLOYMENT", "benchmark")
+
+    import agents
+    from fake_model import FakeChatCompletionClient
+
+    model = FakeChatCompletionClient(first_token_latency=args.model_latency)
+
+    async def create_fake_model_client():
+        return model
+
+    agents.create_model_client = create_fake_model_client
+    counters = Counters(stub, model)
+
+    results = run_metadata(args)
+    try:
+        if args.only in (None, "e2e"):
+            results["e2e"] = asyncio.run(run_e2e(args, counters))
+        if args.only in (None, "tools"):
+            # Tool timings measure our own overhead: no simulated network delay
+            stub.latency = 0.0
+            results["tools"] = run_tools(args, counters)
+    finally:
+        stub.stop()
+        if args.record_from:
+            save_fixtures(args.fixtures, stub.fixtures)
+    results["fixtures"] = {"replayed": stub.replayed, "recorded": stub.recorded}
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Deterministic stand-in for the Azure OpenAI chat client used by the benchmarks.
+
+It plays the part the real model plays in a narrative analysis: the first
+turn asks for one tool call (recent commits of the repository named in the
+task), and the reflection turn that follows writes a short narrative from
+the tool's result. Latency is simulated as a fixed time to first token plus
+a steady generation rate, so model-bound scenarios behave like the real
+service without any network access. The same messages always produce the
+same output and usage.
+"""
+import asyncio
+import json
+import re
+from typing import Any, AsyncGenerator, List, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken, FunctionCall
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    ModelCapabilities,
+    ModelInfo,
+    RequestUsage,
+    UserMessage,
+)
+from autogen_core.tools import Tool, ToolSchema
+
+# analysis.narrative_task: "...\n\nRepository: {owner}/{project}\nAuthor: {author}\n\n..."
+TASK_RE = re.compile(r"^Repository: (?P<owner>[^/\s]+)/(?P<repo>\S+)$", re.MULTILINE)
+
+FAKE_MODEL_INFO: ModelInfo = {
+    "vision": False,
+    "function_calling": True,
+    "json_output": True,
+    "family": "fake",
+    "structured_output": False,
+    "multiple_system_messages": True,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+class FakeChatCompletionClient(ChatCompletionClient):
+    """
+    Scripted model client: one tool call, then a narrative.
+
+    Args:
+        first_token_latency: Seconds before the first token of every call
+        tokens_per_second: Simulated generation rate for the completion
+        tool_name: Tool requested on the first turn (must take owner, repo and count)
+        context_window: Reported by remaining_tokens
+    """
+
+    def __init__(self, first_token_latency: float = 0.3, tokens_per_second: float = 80.0,
+                 tool_name: str = "get_recent_commits", context_window: int = 128000):
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.tool_name = tool_name
+        self.context_window = context_window
+        self.calls = 0
+        self._total_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._actual_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._call_ids = 0
+
+    def _respond(self, messages: Sequence[LLMMessage], tools: Sequence[Tool | ToolSchema],
+                 tool_choice: Any) -> CreateResult:
+        last = messages[-1] if messages else None
+        if isinstance(last, UserMessage) and tools and tool_choice != "none":
+            match = TASK_RE.search(str(last.content))
+            arguments = {"owner": "unknown", "repo": "unknown", "count": 5}
+            if match:
+                arguments.update(owner=match.group("owner"), repo=match.group("repo"))
+            self._call_ids += 1
+            content: Union[str, List[FunctionCall]] = [
+                FunctionCall(id=f"call_{self._call_ids}", name=self.tool_name, arguments=json.dumps(arguments))
+            ]
+            completion = estimate_tokens(json.dumps(arguments)) + 10
+            finish_reason = "function_calls"
+        else:
+            content = self._narrative(messages)
+            completion = estimate_tokens(content)
+            finish_reason = "stop"
+
+        prompt = sum(estimate_tokens(str(getattr(message, "content", ""))) for message in messages)
+        usage = RequestUsage(prompt_tokens=prompt, completion_tokens=completion)
+        self._actual_usage = usage
+        self._total_usage = RequestUsage(
+            prompt_tokens=self._total_usage.prompt_tokens + prompt,
+            completion_tokens=self._total_usage.completion_tokens + completion,
+        )
+        self.calls += 1
+        return CreateResult(finish_reason=finish_reason, content=content, usage=usage, cached=False)
+
+    @staticmethod
+    def _narrative(messages: Sequence[LLMMessage]) -> str:
+        commits = 0
+        for message in messages:
+            if isinstance(message, FunctionExecutionResultMessage):
+                for result in message.content:
+                    try:
+                        commits += len(json.loads(result.content))
+                    except (ValueError, TypeError):
+                        pass
+        return (
+            f"The author has been steadily active in this repository. Across the {commits} most recent "
+            "commits reviewed, their changes are focused and incremental, touching core modules with "
+            "small, well-scoped updates. The history shows consistent engagement rather than one-off "
+            "bulk changes, which matches the computed contribution rating."
+        )
+
+    async def _wait(self, seconds: float, cancellation_token: Optional[CancellationToken]):
+        task = asyncio.ensure_future(asyncio.sleep(seconds))
+        if cancellation_token is not None:
+            cancellation_token.link_future(task)
+        await task
+
+    async def create(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = [],
+                     tool_choice: Any = "auto", json_output: Optional[Any] = None,
+                     extra_create_args: Mapping[str, Any] = {},
+                     cancellation_token: Optional[CancellationToken] = None) -> CreateResult:
+        result = self._respond(messages, tools, tool_choice)
+        await self._wait(
+            self.first_token_latency + result.usage.completion_tokens / self.tokens_per_second, cancellation_token
+        )
+        return result
+
+    async def create_stream(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = [],
+                            tool_choice: Any = "auto", json_output: Optional[Any] = None,
+                            extra_create_args: Mapping[str, Any] = {},
+                            cancellation_token: Optional[CancellationToken] = None,
+                            **kwargs: Any) -> AsyncGenerator[Union[str, CreateResult], None]:
+        result = self._respond(messages, tools, tool_choice)
+        await self._wait(self.first_token_latency, cancellation_token)
+        if isinstance(result.content, str):
+            words = result.content.split(" ")
+            delay = result.usage.completion_tokens / self.tokens_per_second / max(len(words), 1)
+            for position, word in enumerate(words):
+                await self._wait(delay, cancellation_token)
+                yield word if position == len(words) - 1 else word + " "
+        yield result
+
+    async def close(self) -> None:
+        pass
+
+    def actual_usage(self) -> RequestUsage:
+        return self._actual_usage
+
+    def total_usage(self) -> RequestUsage:
+        return self._total_usage
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return sum(estimate_tokens(str(getattr(message, "content", ""))) for message in messages)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.context_window - self.count_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore[override]
+        return ModelCapabilities(vision=False, function_calling=True, json_output=True)  # type: ignore[typeddict-item]
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return FAKE_MODEL_INFO
@@ -0,0 +1,418 @@
+"""
+Local stand-in for the GitHub REST and GraphQL APIs used by the benchmarks.
+
+Repositories are synthetic: commit i of a repo (0 = oldest) has a deterministic
+SHA and cycles through a fixed author list, so any history size can be served
+without storing it. Raising a repo's count in `stub.repos` appends commits, as
+a push would. File contents can be set per path in `stub.files`. A fixed
+per-request latency can be added to mimic a real network.
+
+Recorded responses take precedence over synthetic ones: `fixtures` maps a
+request ("GET /repos/o/r/commits?per_page=100", GraphQL queries by body hash)
+to the response GitHub gave. With `upstream` set, requests without a fixture
+are forwarded there and recorded, so one run against the real API captures a
+fixture file (see save_fixtures) that later runs replay offline.
+"""
+import base64
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_AUTHORS = ("Alice", "Bob", "Carol", "Dave")
+
+# Response headers kept in fixtures; everything else is regenerated on replay
+RECORDED_HEADERS = ("Content-Type", "Link", "ETag", "Content-Range")
+# Stands in for the server address inside recorded Link headers
+BASE_URL_MARKER = "{base_url}"
+
+
+def fixture_key(method: str, path: str, body: bytes = b"") -> str:
+    """Fixture lookup key; request bodies (GraphQL queries) are identified by hash."""
+    key = f"{method.upper()} {path}"
+    if body:
+        key += f" #{hashlib.sha1(body).hexdigest()[:16]}"
+    return key
+
+
+def load_fixtures(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_fixtures(path: str, fixtures: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, indent=1, sort_keys=True)
+
+
+def commit_sha(repo: str, index: int) -> str:
+    return hashlib.sha1(f"{repo}:{index}".encode("utf-8")).hexdigest()
+
+
+def _user(login: str) -> dict:
+    api = f"https://api.github.com/users/{login}"
+    return {
+        "login": login,
+        "id": int(hashlib.sha1(login.encode("utf-8")).hexdigest()[:8], 16),
+        "node_id": f"MDQ6VXNlcj{login}",
+        "avatar_url": f"https://avatars.githubusercontent.com/u/{login}?v=4",
+        "gravatar_id": "",
+        "url": api,
+        "html_url": f"https://github.com/{login}",
+        "followers_url": f"{api}/followers",
+        "following_url": f"{api}/following{{/other_user}}",
+        "gists_url": f"{api}/gists{{/gist_id}}",
+        "starred_url": f"{api}/starred{{/owner}}{{/repo}}",
+        "subscriptions_url": f"{api}/subscriptions",
+        "organizations_url": f"{api}/orgs",
+        "repos_url": f"{api}/repos",
+        "events_url": f"{api}/events{{/privacy}}",
+        "received_events_url": f"{api}/received_events",
+        "type": "User",
+        "site_admin": False,
+    }
+
+
+def commit_payload(owner: str, repo: str, index: int, authors=DEFAULT_AUTHORS) -> dict:
+    """A commit as the REST commits listing returns it, with its full set of fields."""
+    author = authors[index % len(authors)]
+    sha = commit_sha(repo, index)
+    api = f"https://api.github.com/repos/{owner}/{repo}"
+    signature = {
+        "name": author,
+        "email": f"{author.lower()}@example.com",
+        "date": f"2024-{(index // 28) % 12 + 1:02d}-{index % 28 + 1:02d}T00:00:00Z",
+    }
+    return {
+        "sha": sha,
+        "node_id": f"C_kwDO{sha[:24]}",
+        "commit": {
+            "author": signature,
+            "committer": dict(signature),
+            "message": f"Commit {index}",
+            "tree": {"sha": commit_sha(repo, -index - 1), "url": f"{api}/git/trees/{commit_sha(repo, -index - 1)}"},
+            "url": f"{api}/git/commits/{sha}",
+            "comment_count": 0,
+            "verification": {"verified": False, "reason": "unsigned", "signature": None, "payload": None},
+        },
+        "url": f"{api}/commits/{sha}",
+        "html_url": f"https://github.com/{owner}/{repo}/commit/{sha}",
+        "comments_url": f"{api}/commits/{sha}/comments",
+        "author": _user(author.lower()),
+        "committer": _user(author.lower()),
+        "parents": [{
+            "sha": commit_sha(repo, index - 1),
+            "url": f"{api}/commits/{commit_sha(repo, index - 1)}",
+            "html_url": f"https://github.com/{owner}/{repo}/commit/{commit_sha(repo, index - 1)}",
+        }],
+    }
+
+
+class GitHubStub:
+    """Threaded HTTP server answering the GitHub endpoints the tools use."""
+
+    def __init__(self, repos: dict, latency: float = 0.0, authors=DEFAULT_AUTHORS, fixtures: dict = None,
+                 upstream: str = None):
+        self.repos = dict(repos)
+        self.latency = latency
+        self.authors = tuple(authors)
+        self.request_count = 0
+        self.bytes_sent = 0
+        # Recorded responses by fixture_key; `upstream` fills in the missing ones
+        self.fixtures = dict(fixtures or {})
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.replayed = 0
+        self.recorded = 0
+        # Path -> bytes served by the contents endpoint (other paths get a small Python file)
+        self.files = {}
+        self._ages = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; without TCP_NODELAY every
+            # keep-alive response stalls on delayed ACKs (~40ms)
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._handle(self)
+
+            def do_POST(self):
+                stub._handle_graphql(self)
+
+        class Server(ThreadingHTTPServer):
+            # The default backlog of 5 drops SYNs under concurrent load
+            request_queue_size = 1024
+
+            def handle_error(self, request, client_address):
+                # Clients stop reading a streamed file once they have their slice
+                if not isinstance(sys.exc_info()[1], ConnectionError):
+                    super().handle_error(request, client_address)
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _send(self, handler, status: int, body, headers: dict = None):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        etag = f'W/"{hashlib.md5(data).hexdigest()}"'
+        if status == 200 and handler.headers.get("If-None-Match") == etag:
+            handler.send_response(304)
+            handler.send_header("ETag", etag)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("ETag", etag)
+        handler.send_header("X-RateLimit-Limit", "5000")
+        handler.send_header("X-RateLimit-Remaining", "4999")
+        handler.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+        with self._lock:
+            self.bytes_sent += len(data)
+
+    def _send_raw(self, handler, content: bytes):
+        """Serve file bytes for the raw media type, honoring a single "bytes=start-[end]" Range."""
+        status, start, end = 200, 0, len(content)
+        match = re.match(r"^bytes=(\d+)-(\d*)$", handler.headers.get("Range", ""))
+        if match and int(match.group(1)) < len(content):
+            status, start = 206, int(match.group(1))
+            end = min(len(content), int(match.group(2)) + 1) if match.group(2) else len(content)
+        data = content[start:end]
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/octet-stream")
+        handler.send_header("Content-Length", str(len(data)))
+        if status == 206:
+            handler.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(content)}")
+        handler.end_headers()
+        handler.wfile.write(data)
+        with self._lock:
+            self.bytes_sent += len(data)
+
+    def _replay(self, handler, body: bytes = b"") -> bool:
+        """Answer from a fixture (recording it from upstream first if needed); False if there is none."""
+        key = fixture_key(handler.command, handler.path, body)
+        fixture = self.fixtures.get(key)
+        if fixture is None and self.upstream:
+            fixture = self._record(handler, body)
+            with self._lock:
+                self.fixtures[key] = fixture
+                self.recorded += 1
+        elif fixture is not None:
+            with self._lock:
+                self.replayed += 1
+        if fixture is None:
+            return False
+
+        data = base64.b64decode(fixture["body"])
+        handler.send_response(fixture["status"])
+        for name, value in fixture["headers"].items():
+            handler.send_header(name, value.replace(BASE_URL_MARKER, self.base_url))
+        handler.send_header("X-RateLimit-Limit", "5000")
+        handler.send_header("X-RateLimit-Remaining", "4999")
+        handler.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+        with self._lock:
+            self.bytes_sent += len(data)
+        return True
+
+    def _record(self, handler, body: bytes) -> dict:
+        """Forward a request to upstream and return its response in fixture form."""
+        headers = {name: handler.headers[name] for name in ("Authorization", "Accept", "Range", "User-Agent")
+                   if handler.headers.get(name)}
+        if body:
+            headers["Content-Type"] = "application/json"
+        path = handler.path[len("/api"):] if handler.path.startswith("/api/graphql") else handler.path
+        request = urllib.request.Request(self.upstream + path, data=body or None, headers=headers,
+                                         method=handler.command)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                status, response_headers, data = response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            status, response_headers, data = e.code, e.headers, e.read()
+        return {
+            "status": status,
+            "headers": {
+                name: response_headers[name].replace(self.upstream, BASE_URL_MARKER)
+                for name in RECORDED_HEADERS if response_headers.get(name)
+            },
+            "body": base64.b64encode(data).decode("ascii"),
+        }
+
+    def _resolve(self, repo: str, ref: str):
+        """Commit index for a branch name or SHA, or None if unknown."""
+        total = self.repos[repo]
+        if not ref or ref in ("main", "HEAD"):
+            return total - 1
+        with self._lock:
+            ages = self._ages.setdefault(repo, {})
+            for index in range(len(ages), total):
+                ages[commit_sha(repo, index)] = index
+            index = ages.get(ref)
+        return index if index is not None and index < total else None
+
+    def _history_node(self, owner: str, repo: str, index: int) -> dict:
+        payload = commit_payload(owner, repo, index, self.authors)
+        return {
+            "oid": payload["sha"],
+            "messageHeadline": payload["commit"]["message"],
+            "url": payload["html_url"],
+            "additions": 12,
+            "deletions": 3,
+            "author": dict(payload["commit"]["author"], user={"login": payload["author"]["login"]}),
+        }
+
+    def _handle_graphql(self, handler):
+        """Answer history queries built by github_graphql.history_query (cursor = offset)."""
+        with self._lock:
+            self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        raw_body = handler.rfile.read(int(handler.headers.get("Content-Length", "0")))
+        if self._replay(handler, raw_body):
+            return
+        body = json.loads(raw_body or b"{}")
+        if urlparse(handler.path).path not in ("/graphql", "/api/graphql"):
+            return self._send(handler, 404, {"message": "Not Found"})
+
+        variables = body.get("variables") or {}
+        data = {}
+        slot = 0
+        while f"name{slot}" in variables:
+            owner, repo = variables[f"owner{slot}"], variables[f"name{slot}"]
+            if repo not in self.repos:
+                data[f"r{slot}"] = None
+            else:
+                head = self._resolve(repo, variables.get(f"expr{slot}"))
+                start = int(variables.get(f"after{slot}") or 0)
+                end = min(start + int(variables[f"first{slot}"]), head + 1)
+                data[f"r{slot}"] = {"object": None if head is None else {"history": {
+                    "pageInfo": {"hasNextPage": end < head + 1, "endCursor": str(end)},
+                    "nodes": [self._history_node(owner, repo, head - i) for i in range(start, end)],
+                }}}
+            slot += 1
+        self._send(handler, 200, {"data": data})
+
+    def _handle(self, handler):
+        with self._lock:
+            self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self._replay(handler):
+            return
+
+        url = urlparse(handler.path)
+        query = parse_qs(url.query)
+
+        match = re.match(r"^/repos/([^/]+)/([^/]+)/commits$", url.path)
+        if match:
+            owner, repo = match.groups()
+            if repo not in self.repos:
+                return self._send(handler, 404, {"message": "Not Found"})
+            head = self._resolve(repo, query.get("sha", ["main"])[0])
+            if head is None:
+                return self._send(handler, 404, {"message": "Not Found"})
+            per_page = min(int(query.get("per_page", ["30"])[0]), 100)
+            page = int(query.get("page", ["1"])[0])
+            total = head + 1
+            start = (page - 1) * per_page
+            items = [commit_payload(owner, repo, head - i, self.authors)
+                     for i in range(start, min(start + per_page, total))]
+            headers = {}
+            if start + per_page < total:
+                params = {k: v[0] for k, v in query.items()}
+                params["page"] = str(page + 1)
+                next_query = "&".join(f"{k}={v}" for k, v in params.items())
+                headers["Link"] = f'<{self.base_url}{url.path}?{next_query}>; rel="next"'
+            return self._send(handler, 200, items, headers)
+
+        match = re.match(r"^/repos/([^/]+)/([^/]+)/commits/([^/]+)$", url.path)
+        if match:
+            owner, repo, ref = match.groups()
+            if repo not in self.repos:
+                return self._send(handler, 404, {"message": "Not Found"})
+            index = self._resolve(repo, ref)
+            if index is None:
+                return self._send(handler, 404, {"message": "Not Found"})
+            payload = commit_payload(owner, repo, index, self.authors)
+            payload["files"] = [
+                {"filename": f"src/module_{index % 7}.py", "status": "modified", "additions": 12, "deletions": 3,
+                 "patch": "@@ -1,3 +1,12 @@\n" + "+added line\n" * 12 + "-removed line\n" * 3},
+            ]
+            return self._send(handler, 200, payload)
+
+        match = re.match(r"^/repos/([^/]+)/([^/]+)/compare/([^.]+)\.\.\.([^.]+)$", url.path)
+        if match:
+            owner, repo, base, head = match.groups()
+            if repo not in self.repos:
+                return self._send(handler, 404, {"message": "Not Found"})
+            base_index, head_index = self._resolve(repo, base), self._resolve(repo, head)
+            if base_index is None or head_index is None:
+                return self._send(handler, 404, {"message": "Not Found"})
+            per_page = min(int(query.get("per_page", ["250"])[0]), 250)
+            page = int(query.get("page", ["1"])[0])
+            ahead = list(range(base_index + 1, head_index + 1))
+            start = (page - 1) * per_page
+            headers = {}
+            if start + per_page < len(ahead):
+                headers["Link"] = f'<{self.base_url}{url.path}?per_page={per_page}&page={page + 1}>; rel="next"'
+            return self._send(handler, 200, {
+                "status": "ahead" if ahead else ("identical" if base_index == head_index else "behind"),
+                "ahead_by": len(ahead),
+                "behind_by": max(0, base_index - head_index),
+                "total_commits": len(ahead),
+                "commits": [commit_payload(owner, repo, i, self.authors) for i in ahead[start:start + per_page]],
+            }, headers)
+
+        match = re.match(r"^/repos/([^/]+)/([^/]+)/contents/(.+)$", url.path)
+        if match:
+            path = match.group(3)
+            content = self.files.get(path)
+            if content is None:
+                content = f"# {path}\n".encode("utf-8") + b"print('hello')\n" * 50
+            if "raw" in handler.headers.get("Accept", ""):
+                return self._send_raw(handler, content)
+            # Like GitHub, files over 1 MB come without inline content
+            inline = len(content) <= 1024 * 1024
+            return self._send(handler, 200, {
+                "type": "file",
+                "encoding": "base64" if inline else "none",
+                "content": base64.b64encode(content).decode("ascii") if inline else "",
+                "sha": hashlib.sha1(content).hexdigest(),
+                "size": len(content),
+                "download_url": "",
+            })
+
+        self._send(handler, 404, {"message": "Not Found"})
@@ -0,0 +1,268 @@
+import os
+from typing import Iterable, Dict, Any, List, Optional, Set
+
+from githubmcp import iter_commits
+from githubmcp_async import iter_commits_async
+from github_graphql import iter_commits_graphql, iter_commits_graphql_async
+from git_mirror import iter_commits_git, iter_commits_git_async
+from author_identity import IdentityResolver, normalize_author
+
+# Where commit history is read from: "rest" (commits endpoint), "graphql"
+# (field-trimmed history pages, far fewer bytes per commit) or "git" (a local
+# bare mirror kept current with incremental fetches, no API cost)
+GITHUB_COMMITS_BACKEND = os.getenv("GITHUB_COMMITS_BACKEND", "rest")
+
+# Same scale the agent's system message describes (upper bound %, rating out of 6)
+RATING_SCALE = [
+    (10, 1),
+    (25, 2),
+    (40, 3),
+    (55, 4),
+    (75, 5),
+    (100, 6),
+]
+
+
+def contribution_percentage(author_commits: int, total_commits: int) -> float:
+    """Calculate contribution percentage as (commits_by_author / total_commits) * 100."""
+    if total_commits <= 0:
+        return 0.0
+    return (author_commits / total_commits) * 100
+
+
+def contribution_rating(percentage: float) -> int:
+    """
+    Map a contribution percentage onto the 1-6 rating scale.
+
+    The percentage is rounded to a whole number first so that values such as
+    10.4% and 50% land in the same buckets the scale describes.
+    """
+    rounded = round(percentage)
+    for upper_bound, rating in RATING_SCALE:
+        if rounded <= upper_bound:
+            return rating
+    return RATING_SCALE[-1][1]
+
+
+class CommitAggregator:
+    """
+    Running per-author commit counter.
+
+    Commits are consumed one at a time, so memory grows with the number of
+    distinct authors rather than the number of commits. Names, emails and
+    logins are grouped into identities as they are seen, so an author is
+    counted across every name variant they committed under.
+    """
+
+    def __init__(self):
+        self.total_commits = 0
+        self.commits_by_author: Dict[str, int] = {}
+        self.author_names: Dict[str, str] = {}
+        # Line counts, for backends whose commits carry additions/deletions
+        self.additions_by_author: Dict[str, int] = {}
+        self.deletions_by_author: Dict[str, int] = {}
+        self.newest_date: Optional[str] = None
+        self.oldest_date: Optional[str] = None
+        self.identities = IdentityResolver()
+
+    def add(self, commit: dict):
+        """Count a single commit dictionary."""
+        self.total_commits += 1
+        name = commit.get("author") or ""
+        key = normalize_author(name)
+        self.commits_by_author[key] = self.commits_by_author.get(key, 0) + 1
+        self.author_names.setdefault(key, name)
+        self.identities.add_commit(commit, key)
+        if commit.get("additions") or commit.get("deletions"):
+            self.additions_by_author[key] = self.additions_by_author.get(key, 0) + (commit.get("additions") or 0)
+            self.deletions_by_author[key] = self.deletions_by_author.get(key, 0) + (commit.get("deletions") or 0)
+        self._see_date(commit.get("date"))
+
+    def _see_date(self, date: Optional[str]):
+        if date:
+            if self.newest_date is None or date > self.newest_date:
+                self.newest_date = date
+            if self.oldest_date is None or date < self.oldest_date:
+                self.oldest_date = date
+
+    def merge(self, other: "CommitAggregator") -> "CommitAggregator":
+        """Add another aggregator's counts (e.g. newly fetched commits) into this one and return self."""
+        self.total_commits += other.total_commits
+        for key, count in other.commits_by_author.items():
+            self.commits_by_author[key] = self.commits_by_author.get(key, 0) + count
+            self.author_names.setdefault(key, other.author_names[key])
+        for key, lines in other.additions_by_author.items():
+            self.additions_by_author[key] = self.additions_by_author.get(key, 0) + lines
+        for key, lines in other.deletions_by_author.items():
+            self.deletions_by_author[key] = self.deletions_by_author.get(key, 0) + lines
+        self.identities.merge(other.identities)
+        self._see_date(other.newest_date)
+        self._see_date(other.oldest_date)
+        return self
+
+    def consume(self, commits: Iterable[dict]) -> "CommitAggregator":
+        """Count every commit from an iterable (e.g. iter_commits) and return self."""
+        for commit in commits:
+            self.add(commit)
+        return self
+
+    def author_keys(self, author: str) -> Set[str]:
+        """Author keys of the identity matching a login, email or name variant."""
+        return self.identities.author_keys(author)
+
+    def count_for(self, author: str) -> int:
+        """Number of commits attributed to the given author (login, email or any name variant)."""
+        return sum(self.commits_by_author.get(key, 0) for key in self.author_keys(author))
+
+    def matched_names(self, author: str) -> List[str]:
+        """Display names counted for the given author."""
+        return sorted(self.author_names[key] for key in self.author_keys(author) if key in self.author_names)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize the aggregated counts, keyed by display name."""
+        return {
+            "total_commits": self.total_commits,
+            "commits_by_author": {
+                self.author_names[key]: count for key, count in self.commits_by_author.items()
+            },
+            "lines_by_author": {
+                self.author_names[key]: {
+                    "additions": self.additions_by_author.get(key, 0),
+                    "deletions": self.deletions_by_author.get(key, 0),
+                }
+                for key in self.additions_by_author.keys() | self.deletions_by_author.keys()
+            },
+            "newest_date": self.newest_date,
+            "oldest_date": self.oldest_date,
+        }
+
+
+def commit_iterators(backend: str = GITHUB_COMMITS_BACKEND):
+    """Return the (sync, async) commit history iterators for a backend name."""
+    backend = (backend or "rest").lower()
+    if backend == "rest":
+        return iter_commits, iter_commits_async
+    if backend == "graphql":
+        return iter_commits_graphql, iter_commits_graphql_async
+    if backend == "git":
+        return iter_commits_git, iter_commits_git_async
+    raise ValueError(f"Unknown GITHUB_COMMITS_BACKEND: {backend}")
+
+
+def contribution_stats(aggregator: CommitAggregator, author: str) -> Dict[str, Any]:
+    """Derive total/author commit counts, percentage and rating from an aggregator."""
+    author_commits = aggregator.count_for(author)
+    percentage = contribution_percentage(author_commits, aggregator.total_commits)
+    return {
+        "total_commits": aggregator.total_commits,
+        "author_commits": author_commits,
+        "matched_names": aggregator.matched_names(author),
+        "percentage": percentage,
+        "rating": contribution_rating(percentage),
+    }
+
+
+def compute_contribution(commits: Iterable[dict], author: str) -> Dict[str, Any]:
+    """
+    Count total commits and commits by the given author.
+
+    Args:
+        commits: Iterable of commit dictionaries (as returned by get_recent_commits)
+        author: Author name to match against each commit's author
+
+    Returns:
+        Dictionary with total_commits, author_commits, percentage and rating
+    """
+    return contribution_stats(CommitAggregator().consume(commits), author)
+
+
+def format_contribution_report(project: str, author: str, stats: Dict[str, Any]) -> str:
+    """Render contribution stats in the same format the agent is instructed to use."""
+    return (
+        f"Project name: {project}\n"
+        f"Author name: {author}\n"
+        f"Total commits: {stats['total_commits']}\n"
+        f"No of commits by author: {stats['author_commits']}\n\n"
+        f"Contribution percentage: {stats['percentage']:.1f}%\n"
+        f"Contribution Rating: {stats['rating']}/6"
+    )
+
+
+def contribution_result(project: str, author: str, aggregator: CommitAggregator) -> dict:
+    """Stats and formatted report for one author, as analyze_contribution returns them."""
+    stats = contribution_stats(aggregator, author)
+    return {
+        "stats": stats,
+        "report": format_contribution_report(project, author, stats),
+    }
+
+
+def aggregate_commits(owner: str, project: str, branch: str = "main", since: Optional[str] = None,
+                      max_commits: Optional[int] = None, token: str = None) -> CommitAggregator:
+    """
+    Stream a branch's history (from the configured GITHUB_COMMITS_BACKEND) into a CommitAggregator.
+
+    Commits are counted page by page, so even very large repositories are
+    counted in constant memory.
+    """
+    iterate, _ = commit_iterators()
+    commits = iterate(owner, project, branch=branch, since=since, max_commits=max_commits, token=token)
+    return CommitAggregator().consume(commits)
+
+
+async def aggregate_commits_async(owner: str, project: str, branch: str = "main", since: Optional[str] = None,
+                                  max_commits: Optional[int] = None, token: str = None) -> CommitAggregator:
+    """Async counterpart of aggregate_commits."""
+    _, iterate = commit_iterators()
+    aggregator = CommitAggregator()
+    async for commit in iterate(
+        owner, project, branch=branch, since=since, max_commits=max_commits, token=token
+    ):
+        aggregator.add(commit)
+    return aggregator
+
+
+def analyze_contribution(owner: str, project: str, author: str, branch: str = "main",
+                         since: Optional[str] = None, max_commits: Optional[int] = None,
+                         token: str = None) -> dict:
+    """
+    Compute an author's contribution to a repository without involving the model.
+
+    Args:
+        owner: Repository owner
+        project: Repository name
+        author: Author name to analyze
+        branch: Branch name (default: main)
+        since: Only count commits after this ISO 8601 date (optional)
+        max_commits: Only count the most recent N commits (optional)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        Dictionary with the computed stats and the formatted report
+    """
+    aggregator = aggregate_commits(owner, project, branch, since, max_commits, token)
+    return contribution_result(project, author, aggregator)
+
+
+async def analyze_contribution_async(owner: str, project: str, author: str, branch: str = "main",
+                                     since: Optional[str] = None, max_commits: Optional[int] = None,
+                                     token: str = None) -> dict:
+    """Async counterpart of analyze_contribution for use on an event loop."""
+    aggregator = await aggregate_commits_async(owner, project, branch, since, max_commits, token)
+    return contribution_result(project, author, aggregator)
+
+
+__all__ = [
+    'CommitAggregator',
+    'commit_iterators',
+    'contribution_percentage',
+    'contribution_rating',
+    'contribution_stats',
+    'compute_contribution',
+    'format_contribution_report',
+    'contribution_result',
+    'aggregate_commits',
+    'aggregate_commits_async',
+    'analyze_contribution',
+    'analyze_contribution_async'
+]
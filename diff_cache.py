@@ -0,0 +1,361 @@
+import json
+import os
+import re
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from github_http import token_fingerprint
+
+# Commit and blob payloads never change for a given SHA, so entries need no expiry;
+# both tiers are only bounded by size
+DIFF_CACHE_MEMORY_BYTES = int(os.getenv("DIFF_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+DIFF_CACHE_DISK_BYTES = int(os.getenv("DIFF_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+DIFF_CACHE_DIR = os.getenv("DIFF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "hirelens_diff_cache"))
+DIFF_CACHE_PATH_ENTRIES = int(os.getenv("DIFF_CACHE_PATH_ENTRIES", "10000"))
+
+FULL_SHA_RE = re.compile(r"^[0-9a-f]{40}$")
+
+
+def is_full_sha(ref: str) -> bool:
+    """True for a full 40-character hex SHA (branch names and short SHAs are mutable/ambiguous)."""
+    return bool(ref) and bool(FULL_SHA_RE.match(ref.lower()))
+
+
+def content_scope(owner: str, repo: str, token: str) -> str:
+    """
+    Cache scope for content fetched from a repository with a token.
+
+    Entries are only served within the scope they were stored under: a SHA
+    alone proves nothing about access, so content fetched from a private
+    repository never reaches a caller that did not fetch it from there with
+    the same token.
+    """
+    return token_fingerprint(f"{owner}/{repo}".lower() + "\0" + token_fingerprint(token or ""))
+
+
+class CachedCommitDiff:
+    """
+    A commit diff whose per-file patches are kept zlib-compressed.
+
+    Patches are only decompressed when read, so callers that need file stats
+    alone never pay for inflating large patches.
+    """
+
+    def __init__(self, commit: dict, files: List[dict], patches: List[bytes],
+                 total_additions: int, total_deletions: int):
+        self.commit = commit
+        self.files = files
+        self.patches = patches
+        self.total_additions = total_additions
+        self.total_deletions = total_deletions
+
+    @classmethod
+    def from_dict(cls, diff: dict) -> "CachedCommitDiff":
+        """Build from a get_commit_diff result, compressing each file's patch."""
+        files = []
+        patches = []
+        for file_change in diff["files"]:
+            file_change = dict(file_change)
+            patches.append(zlib.compress((file_change.pop("patch", "") or "").encode("utf-8")))
+            files.append(file_change)
+        return cls(diff["commit"], files, patches, diff["total_additions"], diff["total_deletions"])
+
+    def patch(self, index: int) -> str:
+        """Decompress the patch of the file at the given position."""
+        return zlib.decompress(self.patches[index]).decode("utf-8")
+
+    def to_dict(self, include_patch: bool = True) -> dict:
+        """Render in get_commit_diff's shape; patches are inflated only when requested."""
+        files = []
+        for index, file_change in enumerate(self.files):
+            file_change = dict(file_change)
+            if include_patch:
+                file_change["patch"] = self.patch(index)
+            files.append(file_change)
+        return {
+            "commit": dict(self.commit),
+            "files": files,
+            "total_additions": self.total_additions,
+            "total_deletions": self.total_deletions
+        }
+
+    @property
+    def size(self) -> int:
+        """Approximate in-memory footprint, dominated by the compressed patches."""
+        return sum(len(patch) for patch in self.patches) + 256 * (len(self.files) + 1)
+
+    def serialize(self) -> bytes:
+        """Pack as a length-prefixed compressed JSON header followed by the compressed patches."""
+        meta = zlib.compress(json.dumps({
+            "commit": self.commit,
+            "files": self.files,
+            "patch_sizes": [len(patch) for patch in self.patches],
+            "total_additions": self.total_additions,
+            "total_deletions": self.total_deletions,
+        }).encode("utf-8"))
+        return struct.pack(">I", len(meta)) + meta + b"".join(self.patches)
+
+    @classmethod
+    def deserialize(cls, data: bytes) -> "CachedCommitDiff":
+        (meta_size,) = struct.unpack(">I", data[:4])
+        meta = json.loads(zlib.decompress(data[4:4 + meta_size]))
+        patches = []
+        offset = 4 + meta_size
+        for size in meta["patch_sizes"]:
+            patches.append(data[offset:offset + size])
+            offset += size
+        return cls(meta["commit"], meta["files"], patches, meta["total_additions"], meta["total_deletions"])
+
+
+class ContentCache:
+    """
+    Two-tier content-addressed cache for commit diffs and file blobs.
+
+    Entries are keyed by SHA within a content_scope (repository and token).
+
+    The memory tier is an LRU bounded by DIFF_CACHE_MEMORY_BYTES. The disk tier
+    keeps compressed entries under DIFF_CACHE_DIR, bounded by DIFF_CACHE_DISK_BYTES
+    with least-recently-used files removed first. Set DIFF_CACHE_DIR to an empty
+    string to disable the disk tier.
+    """
+
+    def __init__(self, memory_bytes: int = DIFF_CACHE_MEMORY_BYTES, disk_bytes: int = DIFF_CACHE_DISK_BYTES,
+                 directory: str = DIFF_CACHE_DIR, path_entries: int = DIFF_CACHE_PATH_ENTRIES):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.directory = directory or None
+        self.path_entries = path_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_used = 0
+        self._disk_used = None
+        self._paths: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    # -- memory tier -------------------------------------------------------
+
+    def _memory_get(self, key: str):
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry[0]
+        return None
+
+    def _memory_put(self, key: str, value, size: int):
+        if size > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= previous[1]
+        self._memory[key] = (value, size)
+        self._memory_used += size
+        while self._memory_used > self.memory_bytes:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_used -= evicted_size
+
+    # -- disk tier ---------------------------------------------------------
+
+    def _disk_path(self, key: str) -> str:
+        namespace, scope, sha = key.split(":", 2)
+        return os.path.join(self.directory, namespace, scope, sha[:2], sha)
+
+    def _disk_usage(self) -> int:
+        """Bytes in the disk tier: a running total, seeded by one directory walk outside the lock."""
+        with self._lock:
+            used = self._disk_used
+        if used is None:
+            used = 0
+            for root, _, names in os.walk(self.directory):
+                for name in names:
+                    try:
+                        used += os.path.getsize(os.path.join(root, name))
+                    except OSError:
+                        pass
+            with self._lock:
+                if self._disk_used is None:
+                    self._disk_used = used
+                used = self._disk_used
+        return used
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if not self.directory:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def _disk_put(self, key: str, data: bytes):
+        """Write an entry; called without the lock held (files are replaced atomically)."""
+        if not self.directory or len(data) > self.disk_bytes:
+            return
+        self._disk_usage()
+        path = self._disk_path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_used += len(data) - replaced
+            over = self._disk_used > self.disk_bytes
+        if over:
+            self._disk_evict()
+
+    def _disk_evict(self):
+        """Remove least-recently-used files until usage drops to 90% of the bound."""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        used = sum(size for _, size, _ in files)
+        target = int(self.disk_bytes * 0.9)
+        for _, size, path in files:
+            if used <= target:
+                break
+            try:
+                os.remove(path)
+                used -= size
+            except OSError:
+                pass
+        # The walk is exact: it also corrects any drift in the running total
+        with self._lock:
+            self._disk_used = used
+
+    # -- public API --------------------------------------------------------
+
+    def _lookup(self, key: str):
+        """The memory-tier value, or None; the disk tier is read by the caller outside the lock."""
+        with self._lock:
+            value = self._memory_get(key)
+            if value is not None:
+                self._counters["memory_hits"] += 1
+            return value
+
+    def _promote(self, key: str, value, size: int):
+        with self._lock:
+            self._memory_put(key, value, size)
+            self._counters["disk_hits"] += 1
+
+    def _miss(self):
+        with self._lock:
+            self._counters["misses"] += 1
+
+    def get_commit_diff(self, scope: str, sha: str) -> Optional[CachedCommitDiff]:
+        """Look up a commit diff by full SHA."""
+        key = f"commit:{scope}:{sha.lower()}"
+        diff = self._lookup(key)
+        if diff is not None:
+            return diff
+        data = self._disk_get(key)
+        if data is None:
+            self._miss()
+            return None
+        diff = CachedCommitDiff.deserialize(data)
+        self._promote(key, diff, diff.size)
+        return diff
+
+    def put_commit_diff(self, scope: str, sha: str, diff: dict) -> CachedCommitDiff:
+        """Store a get_commit_diff result under its full SHA."""
+        key = f"commit:{scope}:{sha.lower()}"
+        cached = CachedCommitDiff.from_dict(diff)
+        with self._lock:
+            self._memory_put(key, cached, cached.size)
+        self._disk_put(key, cached.serialize())
+        return cached
+
+    def get_blob(self, scope: str, blob_sha: str) -> Optional[bytes]:
+        """Look up raw file bytes by git blob SHA."""
+        key = f"blob:{scope}:{blob_sha.lower()}"
+        compressed = self._lookup(key)
+        if compressed is None:
+            compressed = self._disk_get(key)
+            if compressed is None:
+                self._miss()
+                return None
+            self._promote(key, compressed, len(compressed))
+        return zlib.decompress(compressed)
+
+    def put_blob(self, scope: str, blob_sha: str, content: bytes):
+        """Store raw file bytes under their git blob SHA."""
+        key = f"blob:{scope}:{blob_sha.lower()}"
+        compressed = zlib.compress(content)
+        with self._lock:
+            self._memory_put(key, compressed, len(compressed))
+        self._disk_put(key, compressed)
+
+    @staticmethod
+    def _path_key(scope: str, owner: str, repo: str, commit_sha: str, file_path: str) -> str:
+        # GitHub names and SHAs are case-insensitive; paths are not (README.md vs readme.md)
+        return f"{scope}:{owner.lower()}/{repo.lower()}@{commit_sha.lower()}:{file_path}"
+
+    def get_path_blob(self, scope: str, owner: str, repo: str, commit_sha: str, file_path: str) -> Optional[dict]:
+        """Blob SHA and download URL previously seen for a path at an immutable commit."""
+        key = self._path_key(scope, owner, repo, commit_sha, file_path)
+        with self._lock:
+            blob = self._paths.get(key)
+            if blob is not None:
+                self._paths.move_to_end(key)
+            return blob
+
+    def put_path_blob(self, scope: str, owner: str, repo: str, commit_sha: str, file_path: str,
+                      blob_sha: str, download_url: str = ""):
+        """Remember which blob a path resolves to at an immutable commit."""
+        key = self._path_key(scope, owner, repo, commit_sha, file_path)
+        with self._lock:
+            self._paths[key] = {"sha": blob_sha, "download_url": download_url}
+            self._paths.move_to_end(key)
+            while len(self._paths) > self.path_entries:
+                self._paths.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_used
+        stats["disk_bytes"] = self._disk_usage() if self.directory else None
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> ContentCache:
+    """Return the process-wide content cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ContentCache()
+    return _cache
+
+
+__all__ = [
+    'is_full_sha',
+    'content_scope',
+    'CachedCommitDiff',
+    'ContentCache',
+    'get_content_cache'
+]
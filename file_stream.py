@@ -0,0 +1,358 @@
+import asyncio
+import codecs
+import hashlib
+import os
+import re
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import quote
+
+import diff_cache
+from githubmcp import content_scope, make_github_response
+from githubmcp_async import make_github_response_async
+
+# Streaming file content settings, overridable from the environment
+FILE_MAX_BYTES = int(os.getenv("FILE_MAX_BYTES", str(256 * 1024)))
+FILE_CHUNK_BYTES = int(os.getenv("FILE_CHUNK_BYTES", str(64 * 1024)))
+# Files up to this size that are streamed to the end at a commit SHA are kept in the content cache
+FILE_CACHE_MAX_BYTES = int(os.getenv("FILE_CACHE_MAX_BYTES", str(FILE_MAX_BYTES)))
+
+# Raw media type: the contents API sends the file bytes themselves (up to
+# 100 MB) instead of base64 inside JSON (inline content stops at 1 MB)
+RAW_MEDIA_TYPE = "application/vnd.github.v3.raw"
+
+# Like git, a NUL byte within the first 8000 bytes marks a file as binary
+BINARY_SNIFF_BYTES = 8000
+
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+class ContentSlice:
+    """
+    Collects the requested part of a file from a stream of byte chunks.
+
+    Selects either a byte range (`offset`, at most `max_bytes`) or a line
+    window (`start_line`, at most `max_lines` lines, still capped at
+    `max_bytes`). Text is decoded incrementally, so a multi-byte character
+    split across chunks decodes correctly, and only the selected slice is
+    kept: memory stays bounded by `max_bytes` however large the file is.
+    Feeding stops being useful as soon as the slice is complete.
+    """
+
+    def __init__(self, offset: int = 0, max_bytes: int = FILE_MAX_BYTES, start_line: Optional[int] = None,
+                 max_lines: Optional[int] = None):
+        self.offset = max(0, offset) if start_line is None else 0
+        self.max_bytes = max(1, max_bytes)
+        self.start_line = max(1, start_line) if start_line is not None else None
+        self.max_lines = max_lines
+        self.size: Optional[int] = None
+        self.binary = False
+        self.truncated = False
+        self.done = False
+        self.eof = False
+        self.bytes_read = 0
+        self._skip = 0
+        self._sniff = bytearray()
+        self._sniffed = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._parts = []
+        self._kept_bytes = 0
+        self._line = 1
+        self._end_line = 0
+        self._at_line_start = True
+
+    def start(self, status: int, headers: Dict[str, str]):
+        """
+        Take the response's status and headers into account before feeding.
+
+        A 206 reply already starts at `offset`; a plain 200 (the server
+        ignored the Range header) is skipped forward locally.
+        """
+        match = CONTENT_RANGE_RE.match(headers.get("Content-Range", ""))
+        if status == 206 and match:
+            if match.group(3) != "*":
+                self.size = int(match.group(3))
+        else:
+            self._skip = self.offset
+            if headers.get("Content-Length") and not headers.get("Content-Encoding"):
+                self.size = int(headers["Content-Length"])
+
+    def feed(self, chunk: bytes) -> bool:
+        """Consume the next chunk; returns False once the slice is complete."""
+        if self.done or not chunk:
+            return not self.done
+        if self._skip:
+            dropped = min(self._skip, len(chunk))
+            self._skip -= dropped
+            chunk = chunk[dropped:]
+        self.bytes_read += len(chunk)
+        if not self._sniffed:
+            self._sniff += chunk
+            if len(self._sniff) < BINARY_SNIFF_BYTES:
+                return True
+            chunk = self._end_sniff()
+            if self.done:
+                return False
+        self._take(chunk)
+        return not self.done
+
+    def finish(self):
+        """Mark the end of the stream and flush what is left in the decoder."""
+        if not self._sniffed:
+            self._take(self._end_sniff())
+        if not self.done:
+            self._take_text(self._decoder.decode(b"", final=True))
+        self.eof = not self.truncated
+
+    def _end_sniff(self) -> bytes:
+        self._sniffed = True
+        data, self._sniff = bytes(self._sniff), bytearray()
+        if b"\x00" in data[:BINARY_SNIFF_BYTES]:
+            self.binary = True
+            self.done = True
+            return b""
+        if self.offset and self.start_line is None:
+            # A byte offset can land inside a character: start at the next one
+            trim = 0
+            while trim < min(3, len(data)) and 0x80 <= data[trim] <= 0xBF:
+                trim += 1
+            self.offset += trim
+            data = data[trim:]
+        return data
+
+    def _take(self, data: bytes):
+        if self.done or not data:
+            return
+        if self.start_line is None:
+            room = self.max_bytes - self._kept_bytes
+            if len(data) > room:
+                data = data[:room]
+                self.truncated = self.done = True
+            self._kept_bytes += len(data)
+            self._parts.append(self._decoder.decode(data))
+        else:
+            self._take_text(self._decoder.decode(data))
+
+    def _take_text(self, text: str):
+        if self.start_line is None:
+            self._parts.append(text)
+            return
+        if text:
+            self._at_line_start = text.endswith("\n")
+        position = 0
+        while position < len(text) and not self.done:
+            newline = text.find("\n", position)
+            segment = text[position:] if newline < 0 else text[position:newline + 1]
+            position += len(segment)
+            if self._line >= self.start_line:
+                if self.max_lines is not None and self._line >= self.start_line + self.max_lines:
+                    self.truncated = self.done = True
+                    break
+                encoded = segment.encode("utf-8")
+                if self._kept_bytes + len(encoded) > self.max_bytes:
+                    room = self.max_bytes - self._kept_bytes
+                    self._parts.append(encoded[:room].decode("utf-8", errors="ignore"))
+                    self._end_line = self._line
+                    self.truncated = self.done = True
+                    break
+                self._parts.append(segment)
+                self._kept_bytes += len(encoded)
+                self._end_line = self._line
+            if newline >= 0:
+                self._line += 1
+
+    def result(self, path: str) -> Dict[str, Any]:
+        """The slice in get_file_content's shape, plus where it sits in the file."""
+        result = {"path": path, "size": self.size, "binary": self.binary}
+        if self.binary:
+            result["content"] = None
+            return result
+        content = "".join(self._parts)
+        result.update({"content": content, "truncated": self.truncated})
+        if self.start_line is None:
+            result.update({"offset": self.offset, "bytes": self._kept_bytes})
+            if self.truncated:
+                result["next_offset"] = self.offset + self._kept_bytes
+        else:
+            result.update({"start_line": self.start_line, "end_line": max(self._end_line, self.start_line - 1)})
+            if self.truncated:
+                # A line cut by the byte cap is continued from its start
+                cut = bool(content) and not content.endswith("\n") and self._end_line >= self.start_line
+                result["next_start_line"] = self._end_line if cut else self._end_line + 1
+            elif self.eof:
+                result["total_lines"] = self._line - 1 if self._at_line_start else self._line
+        return result
+
+
+def contents_endpoint(owner: str, repo: str, file_path: str, branch: str = "main") -> str:
+    return f"repos/{owner}/{repo}/contents/{quote(file_path)}?ref={quote(branch, safe='')}"
+
+
+def _request_headers(selection: ContentSlice) -> Dict[str, str]:
+    headers = {"Accept": RAW_MEDIA_TYPE}
+    if selection.start_line is None:
+        # A few bytes past the cap: room for a partial leading character, plus
+        # one more that tells a truncated slice from one that ends with the file
+        headers["Range"] = f"bytes={selection.offset}-{selection.offset + selection.max_bytes + 3}"
+    return headers
+
+
+def _cached_raw(owner: str, repo: str, file_path: str, branch: str, token: str = None) -> Optional[bytes]:
+    """A file's bytes from the content cache when the ref is an immutable commit SHA."""
+    if not diff_cache.is_full_sha(branch):
+        return None
+    scope = content_scope(owner, repo, token)
+    content_cache = diff_cache.get_content_cache()
+    blob = content_cache.get_path_blob(scope, owner, repo, branch, file_path)
+    return content_cache.get_blob(scope, blob["sha"]) if blob else None
+
+
+def _store_raw(owner: str, repo: str, file_path: str, branch: str, raw: bytes, token: str = None):
+    """Put a file read in full at a commit SHA into the content cache, under its git blob SHA."""
+    scope = content_scope(owner, repo, token)
+    blob_sha = hashlib.sha1(b"blob %d\0" % len(raw) + raw).hexdigest()
+    content_cache = diff_cache.get_content_cache()
+    content_cache.put_blob(scope, blob_sha, raw)
+    content_cache.put_path_blob(scope, owner, repo, branch, file_path, blob_sha)
+
+
+class _RawCapture:
+    """
+    Keeps the bytes of a small file while it streams, so a full read can be cached.
+
+    Only the whole file counts: a response starting at byte 0 and a slice
+    that reached the end of the stream. Capture stops past FILE_CACHE_MAX_BYTES.
+    """
+
+    def __init__(self, branch: str, status: int, headers: Dict[str, str]):
+        match = CONTENT_RANGE_RE.match(headers.get("Content-Range", ""))
+        whole = status == 200 or bool(
+            status == 206 and match and match.group(1) == "0" and match.group(3) != "*"
+            and int(match.group(2)) + 1 == int(match.group(3))
+        )
+        self._parts = [] if whole and diff_cache.is_full_sha(branch) else None
+        self._size = 0
+
+    def add(self, chunk: bytes):
+        if self._parts is None:
+            return
+        self._size += len(chunk)
+        if self._size > FILE_CACHE_MAX_BYTES:
+            self._parts = None
+        else:
+            self._parts.append(chunk)
+
+    def wrap(self, chunks: Iterable[bytes]) -> Iterable[bytes]:
+        for chunk in chunks:
+            self.add(chunk)
+            yield chunk
+
+    def complete(self, selection: ContentSlice) -> Optional[bytes]:
+        """The whole file, if it was read to the end; binary and truncated reads stop early."""
+        if self._parts is None or not selection.eof:
+            return None
+        raw = b"".join(self._parts)
+        return raw if selection.size is None or selection.size == len(raw) else None
+
+
+def _slice_chunks(selection: ContentSlice, chunks: Iterable[bytes]):
+    for chunk in chunks:
+        if not selection.feed(chunk):
+            return
+    selection.finish()
+
+
+def _slice_cached(selection: ContentSlice, raw: bytes):
+    selection.size = len(raw)
+    _slice_chunks(selection, (raw[i:i + FILE_CHUNK_BYTES] for i in range(selection.offset, len(raw), FILE_CHUNK_BYTES)))
+
+
+def stream_file_content(owner: str, repo: str, file_path: str, branch: str = "main", offset: int = 0,
+                        max_bytes: int = FILE_MAX_BYTES, start_line: Optional[int] = None,
+                        max_lines: Optional[int] = None, token: str = None) -> dict:
+    """
+    Get part of a file, streamed as raw bytes so memory stays bounded.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        file_path: Path to file in repository
+        branch: Branch name or commit SHA (default: main)
+        offset: First byte to return (ignored when start_line is given)
+        max_bytes: Most bytes of content to return (default: FILE_MAX_BYTES)
+        start_line: Return a line window starting at this line (1-based) instead of a byte range
+        max_lines: Most lines in the window (default: as many as fit in max_bytes)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        Dictionary with the selected content and its position in the file;
+        binary files are reported with "binary": True and no content, and
+        next_offset / next_start_line are set when the file continues
+    """
+    try:
+        selection = ContentSlice(offset, max_bytes, start_line, max_lines)
+        raw = _cached_raw(owner, repo, file_path, branch, token)
+        if raw is not None:
+            _slice_cached(selection, raw)
+            return selection.result(file_path)
+
+        response = make_github_response(
+            contents_endpoint(owner, repo, file_path, branch), token=token,
+            extra_headers=_request_headers(selection), stream=True
+        )
+        try:
+            selection.start(response.status_code, response.headers)
+            capture = _RawCapture(branch, response.status_code, response.headers)
+            _slice_chunks(selection, capture.wrap(response.iter_content(FILE_CHUNK_BYTES)))
+        finally:
+            response.close()
+        raw = capture.complete(selection)
+        if raw is not None:
+            _store_raw(owner, repo, file_path, branch, raw, token)
+        return selection.result(file_path)
+    except Exception as e:
+        raise Exception(f"Failed to stream file content: {str(e)}")
+
+
+async def stream_file_content_async(owner: str, repo: str, file_path: str, branch: str = "main", offset: int = 0,
+                                    max_bytes: int = FILE_MAX_BYTES, start_line: Optional[int] = None,
+                                    max_lines: Optional[int] = None, token: str = None) -> dict:
+    """Async counterpart of stream_file_content."""
+    try:
+        selection = ContentSlice(offset, max_bytes, start_line, max_lines)
+        raw = None
+        if diff_cache.is_full_sha(branch):
+            # Disk reads and decompression run in a worker thread
+            raw = await asyncio.to_thread(_cached_raw, owner, repo, file_path, branch, token)
+        if raw is not None:
+            _slice_cached(selection, raw)
+            return selection.result(file_path)
+
+        response = await make_github_response_async(
+            contents_endpoint(owner, repo, file_path, branch), token=token,
+            extra_headers=_request_headers(selection), stream=True
+        )
+        try:
+            selection.start(response.status_code, response.headers)
+            capture = _RawCapture(branch, response.status_code, response.headers)
+            async for chunk in response.aiter_bytes(FILE_CHUNK_BYTES):
+                capture.add(chunk)
+                if not selection.feed(chunk):
+                    break
+            else:
+                selection.finish()
+        finally:
+            await response.aclose()
+        raw = capture.complete(selection)
+        if raw is not None:
+            # Compression and the disk write run in a worker thread
+            await asyncio.to_thread(_store_raw, owner, repo, file_path, branch, raw, token)
+        return selection.result(file_path)
+    except Exception as e:
+        raise Exception(f"Failed to stream file content: {str(e)}")
+
+
+__all__ = [
+    'ContentSlice',
+    'stream_file_content',
+    'stream_file_content_async'
+]
@@ -0,0 +1,494 @@
+import asyncio
+import base64
+import codecs
+import fcntl
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Iterator, AsyncIterator, Optional
+
+import diff_cache
+from github_http import token_fingerprint
+from githubmcp import content_scope, resolve_github_token
+
+# Mirror settings, overridable from the environment. GIT_CLONE_BASE may also be
+# a local directory holding <owner>/<repo>.git bare repositories.
+GIT_CLONE_BASE = os.getenv("GIT_CLONE_BASE", "https://github.com")
+GIT_MIRROR_DIR = os.getenv("GIT_MIRROR_DIR", os.path.join(tempfile.gettempdir(), "hirelens_git_mirrors"))
+GIT_FETCH_INTERVAL = float(os.getenv("GIT_FETCH_INTERVAL", "60"))
+GIT_TIMEOUT = float(os.getenv("GIT_TIMEOUT", "600"))
+
+# Only branch heads are mirrored; GitHub's refs/pull/* would multiply the fetch size
+HEADS_REFSPEC = "+refs/heads/*:refs/heads/*"
+
+# Unit/record separators keep commit fields unambiguous in `git log` output; each
+# record starts with the separator so the commit's --numstat lines end up inside it
+LOG_FORMAT = "%x1e%H%x1f%an%x1f%ae%x1f%ad%x1f%s%x1f"
+SHOW_FORMAT = "%H%x1f%an%x1f%ae%x1f%ad%x1f%B"
+DATE_FORMAT = "--date=format-local:%Y-%m-%dT%H:%M:%SZ"
+
+# GitHub owner and repository names; "." and ".." are rejected separately
+NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+FILE_STATUSES = {
+    "A": "added",
+    "D": "removed",
+    "M": "modified",
+    "R": "renamed",
+    "C": "copied",
+    "T": "changed",
+}
+
+
+def _git_env() -> Dict[str, str]:
+    # UTC for format-local dates; never prompt for credentials on a server
+    return dict(os.environ, TZ="UTC", GIT_TERMINAL_PROMPT="0", LC_ALL="C")
+
+
+def _auth_env(url: str, token: Optional[str]) -> Dict[str, str]:
+    """
+    Per-command auth header as environment config.
+
+    The token is never written to the mirror's config, and never appears on
+    git's command line where other local users could read it (ps, /proc).
+    """
+    if not token or not url.startswith(("http://", "https://")):
+        return {}
+    credentials = base64.b64encode(f"x-access-token:{token}".encode("utf-8")).decode("ascii")
+    return {
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "http.extraHeader",
+        "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+    }
+
+
+def run_git(args: List[str], cwd: Optional[str] = None, auth: Optional[Dict[str, str]] = None,
+            timeout: float = GIT_TIMEOUT) -> str:
+    """Run a git command and return its stdout, raising with git's stderr on failure."""
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=cwd, env=dict(_git_env(), **(auth or {})), capture_output=True, timeout=timeout,
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"git {args[0]} failed: {e.stderr.decode('utf-8', 'replace').strip()}")
+    except subprocess.TimeoutExpired:
+        raise Exception(f"git command timed out after {int(timeout)} seconds")
+    return result.stdout.decode("utf-8", "replace")
+
+
+def check_name(name: str) -> str:
+    """Return `name` if it is a valid GitHub owner/repository name, else raise ValueError."""
+    if not isinstance(name, str) or not NAME_RE.match(name) or name in (".", ".."):
+        raise ValueError(f"Invalid repository owner or name: {name!r}")
+    return name
+
+
+def check_revision(revision: str) -> str:
+    """
+    Return `revision` if git can safely take it as a revision, else raise ValueError.
+
+    Branches and SHAs come from requests and from the model; one starting
+    with "-" would be parsed as an option (e.g. --output=<file>).
+    """
+    if not isinstance(revision, str) or not revision or revision.startswith("-") or "\0" in revision:
+        raise ValueError(f"Invalid revision: {revision!r}")
+    return revision
+
+
+def _parse_log_record(record: str, owner: str, repo: str) -> Optional[dict]:
+    fields = record.strip("\n").split("\x1f", 5)
+    if len(fields) < 6:
+        return None
+    sha, name, email, date, message, numstat = fields
+    additions = deletions = 0
+    # "<added>\t<deleted>\t<path>" per file; binary files report "-" for both counts
+    for line in numstat.splitlines():
+        parts = line.split("\t", 2)
+        if len(parts) == 3:
+            additions += int(parts[0]) if parts[0].isdigit() else 0
+            deletions += int(parts[1]) if parts[1].isdigit() else 0
+    return {
+        "sha": sha,
+        "message": message,
+        "author": name,
+        "date": date,
+        "url": f"https://github.com/{owner}/{repo}/commit/{sha}",
+        "email": email,
+        "additions": additions,
+        "deletions": deletions,
+    }
+
+
+class GitMirror:
+    """
+    Persistent bare mirror of one repository's branches.
+
+    The first sync clones; later syncs run an incremental `git fetch` that only
+    transfers new objects, and are skipped entirely within GIT_FETCH_INTERVAL
+    of the last one. History and diffs are then read locally, at no API cost.
+    """
+
+    # One lock per mirror path, shared by every GitMirror instance in the process
+    _locks: Dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    # (mirror path, token fingerprint) -> when that token was last shown to have access
+    _verified: Dict[tuple, float] = {}
+
+    def __init__(self, owner: str, repo: str, root: str = GIT_MIRROR_DIR, clone_base: str = GIT_CLONE_BASE):
+        self.owner = check_name(owner)
+        self.repo = check_name(repo)
+        self.path = os.path.join(root, owner, f"{repo}.git")
+        # The mirror is deleted and recreated on a fresh clone: it must stay inside root
+        root_path = os.path.realpath(root)
+        if os.path.commonpath([root_path, os.path.realpath(self.path)]) != root_path:
+            raise ValueError(f"Invalid repository path: {owner}/{repo}")
+        self.url = f"{clone_base.rstrip('/')}/{owner}/{repo}.git"
+        with self._locks_guard:
+            self._lock = self._locks.setdefault(self.path, threading.Lock())
+
+    @contextmanager
+    def _locked(self):
+        """Serialize clone/fetch across threads and across worker processes."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @property
+    def _marker(self) -> str:
+        return os.path.join(self.path, "hirelens-last-fetch")
+
+    def last_fetch(self) -> Optional[float]:
+        """When the mirror was last cloned or fetched, or None if it does not exist yet."""
+        try:
+            return os.path.getmtime(self._marker)
+        except OSError:
+            return None
+
+    def _access_key(self, token: Optional[str]) -> tuple:
+        return (self.path, token_fingerprint(token or ""))
+
+    def check_access(self, token: Optional[str] = None):
+        """
+        Raise unless `token` (or no token) can read the remote repository.
+
+        The mirror is shared by every caller, so a caller is only served from
+        it once their own credentials have reached the remote: a clone, a
+        fetch or this check (`git ls-remote`, refs only), each remembered for
+        GIT_FETCH_INTERVAL. Local clone bases have no access control.
+        """
+        if not self.url.startswith(("http://", "https://")):
+            return
+        key = self._access_key(token)
+        verified = self._verified.get(key)
+        if verified is not None and time.time() - verified < GIT_FETCH_INTERVAL:
+            return
+        run_git(["ls-remote", "--quiet", self.url, "HEAD"], auth=_auth_env(self.url, token))
+        self._verified[key] = time.time()
+
+    def sync(self, token: Optional[str] = None, force: bool = False) -> str:
+        """
+        Clone or incrementally fetch the mirror.
+
+        Returns:
+            "cloned", "fetched" or "fresh" (recent enough that no fetch was needed)
+        """
+        with self._locked():
+            last = self.last_fetch()
+            if last is not None and not force and time.time() - last < GIT_FETCH_INTERVAL:
+                self.check_access(token)
+                return "fresh"
+
+            auth = _auth_env(self.url, token)
+            if last is None:
+                # Anything already there is left over from an interrupted clone
+                shutil.rmtree(self.path, ignore_errors=True)
+                run_git(["clone", "--bare", "--quiet", self.url, self.path], auth=auth)
+                status = "cloned"
+            else:
+                run_git(["fetch", "--quiet", "--prune", "origin", HEADS_REFSPEC], cwd=self.path, auth=auth)
+                status = "fetched"
+
+            with open(self._marker, "w"):
+                pass
+            self._verified[self._access_key(token)] = time.time()
+            return status
+
+    def head_sha(self, branch: str = "main") -> str:
+        """Resolve a branch (or any revision) to its commit SHA."""
+        check_revision(branch)
+        return run_git(
+            ["rev-parse", "--verify", "--quiet", "--end-of-options", f"{branch}^{{commit}}"], cwd=self.path
+        ).strip()
+
+    def log_args(self, branch: str = "main", since: Optional[str] = None, until: Optional[str] = None,
+                 max_commits: Optional[int] = None) -> List[str]:
+        args = ["log", f"--format={LOG_FORMAT}", DATE_FORMAT, "--numstat"]
+        if since:
+            args.append(f"--since={since}")
+        if until:
+            args.append(f"--until={until}")
+        if max_commits is not None:
+            args.append(f"--max-count={max_commits}")
+        args.extend(["--end-of-options", check_revision(branch), "--"])
+        return args
+
+    def iter_commits(self, branch: str = "main", since: Optional[str] = None, until: Optional[str] = None,
+                     max_commits: Optional[int] = None) -> Iterator[dict]:
+        """Stream the branch history from the mirror, newest first."""
+        if max_commits is not None and max_commits <= 0:
+            return
+        process = subprocess.Popen(
+            ["git", *self.log_args(branch, since, until, max_commits)],
+            cwd=self.path, env=_git_env(), stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        try:
+            # Incremental decoding: a chunk boundary may split a multi-byte character
+            decoder = codecs.getincrementaldecoder("utf-8")("replace")
+            buffer = ""
+            for chunk in iter(lambda: process.stdout.read(64 * 1024), b""):
+                buffer += decoder.decode(chunk)
+                *records, buffer = buffer.split("\x1e")
+                for record in records:
+                    commit = _parse_log_record(record, self.owner, self.repo)
+                    if commit is not None:
+                        yield commit
+            if process.wait() != 0:
+                raise Exception(f"git log failed: {process.stderr.read().decode('utf-8', 'replace').strip()}")
+            # The last record has no separator after it
+            commit = _parse_log_record(buffer + decoder.decode(b"", final=True), self.owner, self.repo)
+            if commit is not None:
+                yield commit
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+
+    def is_ancestor(self, base: str, head: str) -> bool:
+        """True when `base` is reachable from `head` (false for unknown revisions too)."""
+        result = subprocess.run(
+            ["git", "merge-base", "--is-ancestor", "--end-of-options", check_revision(base), check_revision(head)],
+            cwd=self.path, env=_git_env(), capture_output=True
+        )
+        return result.returncode == 0
+
+    def iter_commits_between(self, base: str, head: str) -> Optional[Iterator[dict]]:
+        """Commits reachable from `head` but not `base`, or None when `base` is not an ancestor of `head`."""
+        if not self.is_ancestor(base, head):
+            return None
+        return self.iter_commits(f"{base}..{head}")
+
+    def commit_diff(self, commit_sha: str) -> dict:
+        """Build a get_commit_diff result for a commit, diffed against its first parent."""
+        shown = run_git(
+            ["show", "-s", f"--format={SHOW_FORMAT}", DATE_FORMAT, "--end-of-options", check_revision(commit_sha), "--"],
+            cwd=self.path
+        )
+        sha, name, email, date, message = shown.split("\x1f", 4)
+        parents = run_git(["rev-list", "--parents", "-n", "1", "--end-of-options", sha, "--"], cwd=self.path).split()[1:]
+        base = [parents[0], sha] if parents else ["--root", sha]
+
+        # Raw entries give each file's status, numstat its line counts; both in the same order
+        raw = run_git(["diff-tree", "--no-commit-id", "-r", "-M", "--raw", "--numstat", "-z", *base], cwd=self.path)
+        files = _parse_raw_numstat(raw)
+
+        patch_text = run_git(["diff-tree", "--no-commit-id", "-r", "-M", "-p", *base], cwd=self.path)
+        for file_change, patch in zip(files, _split_patches(patch_text)):
+            file_change["patch"] = patch
+
+        return {
+            "commit": {
+                "sha": sha,
+                "message": message.rstrip("\n"),
+                "author": name,
+                "date": date,
+                "url": f"https://github.com/{self.owner}/{self.repo}/commit/{sha}",
+            },
+            "files": files,
+            "total_additions": sum(f["additions"] for f in files),
+            "total_deletions": sum(f["deletions"] for f in files),
+        }
+
+
+def _parse_raw_numstat(output: str) -> List[dict]:
+    """Parse `git diff-tree --raw --numstat -z` into get_commit_diff file entries."""
+    tokens = output.split("\0")
+    files = []
+    i = 0
+    # --raw section: ":<modes> <shas> <status>" then one path, or two for renames/copies
+    while i < len(tokens) and tokens[i].startswith(":"):
+        status = tokens[i].split()[-1]
+        letter = status[:1]
+        if letter in ("R", "C"):
+            filename = tokens[i + 2]
+            i += 3
+        else:
+            filename = tokens[i + 1]
+            i += 2
+        files.append({
+            "filename": filename,
+            "status": FILE_STATUSES.get(letter, "modified"),
+            "additions": 0,
+            "deletions": 0,
+            "patch": "",
+        })
+
+    # --numstat section: "<added>\t<deleted>\t<path>", path empty for renames followed by old/new
+    position = 0
+    while i < len(tokens) and position < len(files):
+        if not tokens[i]:
+            i += 1
+            continue
+        added, deleted, path = tokens[i].split("\t", 2)
+        i += 1 if path else 3
+        # Binary files report "-" for both counts
+        files[position]["additions"] = int(added) if added.isdigit() else 0
+        files[position]["deletions"] = int(deleted) if deleted.isdigit() else 0
+        position += 1
+    return files
+
+
+def _split_patches(patch_text: str) -> List[str]:
+    """Split a multi-file diff into per-file patches starting at the first hunk, like GitHub's `patch`."""
+    patches = []
+    for block in patch_text.split("\ndiff --git ")[0 if patch_text.startswith("diff --git ") else 1:]:
+        lines = block.split("\n")
+        hunk_start = next((n for n, line in enumerate(lines) if line.startswith("@@")), None)
+        patches.append("\n".join(lines[hunk_start:]).rstrip("\n") if hunk_start is not None else "")
+    return patches
+
+
+def _mirror_token(token: Optional[str]) -> Optional[str]:
+    """The caller's GitHub token for remote clones; local mirrors need none."""
+    if not GIT_CLONE_BASE.startswith(("http://", "https://")):
+        return None
+    try:
+        return resolve_github_token(token)
+    except Exception:
+        # Public repositories can still be cloned anonymously
+        return None
+
+
+def get_mirror(owner: str, repo: str, token: Optional[str] = None) -> GitMirror:
+    """Return an up-to-date mirror of a repository, cloning or fetching as needed."""
+    mirror = GitMirror(owner, repo)
+    mirror.sync(_mirror_token(token))
+    return mirror
+
+
+async def get_mirror_async(owner: str, repo: str, token: Optional[str] = None) -> GitMirror:
+    """Async counterpart of get_mirror; clone/fetch runs in a worker thread."""
+    return await asyncio.to_thread(get_mirror, owner, repo, token)
+
+
+def iter_commits_git(owner: str, repo: str, branch: str = "main", per_page: int = 100,
+                     since: Optional[str] = None, until: Optional[str] = None,
+                     max_commits: Optional[int] = None, token: str = None) -> Iterator[dict]:
+    """Local-mirror counterpart of githubmcp.iter_commits, taking the same arguments (per_page is unused)."""
+    try:
+        mirror = get_mirror(owner, repo, token)
+    except Exception as e:
+        raise Exception(f"Failed to mirror repository: {str(e)}")
+    yield from mirror.iter_commits(branch, since, until, max_commits)
+
+
+async def iter_commits_git_async(owner: str, repo: str, branch: str = "main", per_page: int = 100,
+                                 since: Optional[str] = None, until: Optional[str] = None,
+                                 max_commits: Optional[int] = None, token: str = None) -> AsyncIterator[dict]:
+    """Async counterpart of iter_commits_git, streaming `git log` through a subprocess pipe."""
+    if max_commits is not None and max_commits <= 0:
+        return
+    try:
+        mirror = await get_mirror_async(owner, repo, token)
+    except Exception as e:
+        raise Exception(f"Failed to mirror repository: {str(e)}")
+
+    process = await asyncio.create_subprocess_exec(
+        "git", *mirror.log_args(branch, since, until, max_commits),
+        cwd=mirror.path, env=_git_env(), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        buffer = ""
+        while True:
+            chunk = await process.stdout.read(64 * 1024)
+            if not chunk:
+                break
+            buffer += decoder.decode(chunk)
+            *records, buffer = buffer.split("\x1e")
+            for record in records:
+                commit = _parse_log_record(record, owner, repo)
+                if commit is not None:
+                    yield commit
+        stderr = await process.stderr.read()
+        if await process.wait() != 0:
+            raise Exception(f"git log failed: {stderr.decode('utf-8', 'replace').strip()}")
+        commit = _parse_log_record(buffer + decoder.decode(b"", final=True), owner, repo)
+        if commit is not None:
+            yield commit
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+def get_commit_diff_git(owner: str, repo: str, commit_sha: str, include_patch: bool = True,
+                        token: str = None) -> dict:
+    """
+    Get detailed diff for a specific commit from the local mirror.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        commit_sha: Commit SHA hash
+        include_patch: Include each file's patch text (default: True)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        Dictionary with commit diff information, same shape as get_commit_diff
+    """
+    try:
+        content_cache = diff_cache.get_content_cache()
+        scope = content_scope(owner, repo, token)
+        if diff_cache.is_full_sha(commit_sha):
+            cached = content_cache.get_commit_diff(scope, commit_sha)
+            if cached is not None:
+                return cached.to_dict(include_patch=include_patch)
+
+        diff = get_mirror(owner, repo, token).commit_diff(commit_sha)
+        cached = content_cache.put_commit_diff(scope, diff["commit"]["sha"], diff)
+        return diff if include_patch else cached.to_dict(include_patch=False)
+    except Exception as e:
+        raise Exception(f"Failed to get commit diff: {str(e)}")
+
+
+async def get_commit_diff_git_async(owner: str, repo: str, commit_sha: str, include_patch: bool = True,
+                                    token: str = None) -> dict:
+    """Async counterpart of get_commit_diff_git; git and the content cache run in a worker thread."""
+    return await asyncio.to_thread(get_commit_diff_git, owner, repo, commit_sha, include_patch, token)
+
+
+__all__ = [
+    'GitMirror',
+    'check_name',
+    'check_revision',
+    'run_git',
+    'get_mirror',
+    'get_mirror_async',
+    'iter_commits_git',
+    'iter_commits_git_async',
+    'get_commit_diff_git',
+    'get_commit_diff_git_async'
+]
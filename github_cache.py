@@ -0,0 +1,282 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from github_http import token_fingerprint
+
+# Response cache settings, overridable from the environment
+GITHUB_CACHE_BACKEND = os.getenv("GITHUB_CACHE_BACKEND", "memory")  # memory | sqlite | none
+GITHUB_CACHE_TTL = float(os.getenv("GITHUB_CACHE_TTL", "60"))
+GITHUB_CACHE_MAX_ENTRIES = int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", "2048"))
+# Body bytes the in-memory backend may hold; full-history walks cache ~300 KB per page
+GITHUB_CACHE_MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+GITHUB_CACHE_PATH = os.getenv(
+    "GITHUB_CACHE_PATH", os.path.join(tempfile.gettempdir(), "hirelens_github_cache.sqlite3")
+)
+
+# Only these response headers are kept alongside the cached body
+CACHED_HEADERS = ("ETag", "Last-Modified", "Link", "Content-Type")
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU store for cache entries.
+
+    Bounded by entry count and, with `max_bytes`, by the total size of the
+    entries' bodies; an entry larger than `max_bytes` is not stored.
+    """
+
+    def __init__(self, max_entries: int = GITHUB_CACHE_MAX_ENTRIES, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(entry: dict) -> int:
+        return len(entry["body"])
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: dict) -> int:
+        """Store an entry and return the number of entries evicted to make room."""
+        size = self._size(entry)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._size(previous)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return 0
+            self._entries[key] = entry
+            self._bytes += size
+            evicted = 0
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, evicted_entry = self._entries.popitem(last=False)
+                self._bytes -= self._size(evicted_entry)
+                evicted += 1
+            return evicted
+
+    def delete(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= self._size(entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk LRU store for cache entries, shared by every worker on the host."""
+
+    def __init__(self, path: str = GITHUB_CACHE_PATH, max_entries: int = GITHUB_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " body BLOB NOT NULL,"
+            " headers TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, headers, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return {"body": bytes(row[0]), "headers": json.loads(row[1]), "stored_at": row[2]}
+
+    def set(self, key: str, entry: dict) -> int:
+        """Store an entry and return the number of entries evicted to make room."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, headers, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, entry["body"], json.dumps(entry["headers"]), entry["stored_at"], time.time()),
+            )
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+            return max(cursor.rowcount, 0)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Conditional-request cache for GitHub GET responses.
+
+    Entries younger than `ttl` seconds are served without touching the network.
+    Older entries are revalidated with If-None-Match / If-Modified-Since; a 304
+    reply is served from the cache and does not count against the rate limit.
+    """
+
+    def __init__(self, backend, ttl: float = GITHUB_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "revalidations": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(token: str, method: str, url: str) -> str:
+        """Cache key from the caller's token identity and the requested endpoint."""
+        return f"{token_fingerprint(token)} {method.upper()} {url}"
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """Return the stored entry for a key, if any (fresh or stale)."""
+        return self.backend.get(key)
+
+    def is_fresh(self, entry: dict) -> bool:
+        return (time.time() - entry["stored_at"]) < self.ttl
+
+    def conditional_headers(self, entry: dict) -> Dict[str, str]:
+        """Validator headers for revalidating a stale entry."""
+        headers = {}
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def record_hit(self):
+        self._count("hits")
+
+    def record_miss(self):
+        self._count("misses")
+
+    def revalidated(self, key: str, entry: dict) -> dict:
+        """Refresh a stale entry after the server answered 304 Not Modified."""
+        entry = dict(entry, stored_at=time.time())
+        self._count("revalidations")
+        self._count("evictions", self.backend.set(key, entry))
+        return entry
+
+    def store(self, key: str, response: requests.Response):
+        """Cache a successful response together with its validators."""
+        entry = {
+            "body": response.content,
+            "headers": {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+            "stored_at": time.time(),
+        }
+        self._count("stores")
+        self._count("evictions", self.backend.set(key, entry))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["backend"] = type(self.backend).__name__
+        stats["entries"] = len(self.backend)
+        if isinstance(self.backend, MemoryCacheBackend):
+            stats["bytes"] = self.backend.size_bytes
+        stats["ttl"] = self.ttl
+        return stats
+
+
+def to_response(entry: dict, url: str) -> requests.Response:
+    """Rebuild a requests.Response from a cache entry so callers can use .json() and .links."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = entry["body"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.encoding = "utf-8"
+    return response
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def create_response_cache(backend_name: str = GITHUB_CACHE_BACKEND) -> Optional[ResponseCache]:
+    """Build a ResponseCache for the configured backend, or None when caching is disabled."""
+    backend_name = (backend_name or "none").lower()
+    if backend_name == "memory":
+        return ResponseCache(MemoryCacheBackend(max_bytes=GITHUB_CACHE_MAX_BYTES))
+    if backend_name == "sqlite":
+        return ResponseCache(SQLiteCacheBackend())
+    if backend_name in ("none", "off", "disabled"):
+        return None
+    raise ValueError(f"Unknown GITHUB_CACHE_BACKEND: {backend_name}")
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_response_cache() or False
+    return _cache or None
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Counters for the process-wide response cache (empty when disabled)."""
+    cache = get_response_cache()
+    return cache.stats() if cache else {}
+
+
+__all__ = [
+    'MemoryCacheBackend',
+    'SQLiteCacheBackend',
+    'ResponseCache',
+    'to_response',
+    'create_response_cache',
+    'get_response_cache',
+    'cache_stats'
+]
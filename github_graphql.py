@@ -0,0 +1,255 @@
+import os
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterator, AsyncIterator, Optional, Tuple, Union
+
+from githubmcp import GITHUB_API_BASE, MAX_PER_PAGE, make_github_response
+from githubmcp_async import make_github_response_async
+
+# GraphQL lives at /graphql on github.com and at /api/graphql on GitHub Enterprise
+if GITHUB_API_BASE.rstrip("/").endswith("/api/v3"):
+    _DEFAULT_GRAPHQL_URL = GITHUB_API_BASE.rstrip("/")[:-len("/v3")] + "/graphql"
+else:
+    _DEFAULT_GRAPHQL_URL = GITHUB_API_BASE.rstrip("/") + "/graphql"
+
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", _DEFAULT_GRAPHQL_URL)
+
+# Repositories fetched per query when several histories are requested at once
+GITHUB_GRAPHQL_REPOS_PER_QUERY = int(os.getenv("GITHUB_GRAPHQL_REPOS_PER_QUERY", "10"))
+
+# Only the fields the contribution stats use; a REST commit listing returns
+# the full message, committer, tree, parents and verification for each entry
+HISTORY_FRAGMENT = """
+fragment HistoryPage on CommitHistoryConnection {
+  pageInfo { hasNextPage endCursor }
+  nodes {
+    oid
+    messageHeadline
+    url
+    additions
+    deletions
+    author { name email date user { login } }
+  }
+}
+"""
+
+RepoSpec = Dict[str, Any]
+
+
+def history_query(count: int) -> str:
+    """
+    GraphQL query fetching one history page for each of `count` repositories.
+
+    Each repository gets its own alias (r0, r1, ...) and its own variables,
+    so repositories can be paged independently within the same query.
+    """
+    params = ["$since: GitTimestamp", "$until: GitTimestamp"]
+    fields = []
+    for i in range(count):
+        params.append(f"$owner{i}: String!, $name{i}: String!, $expr{i}: String!, $first{i}: Int!, $after{i}: String")
+        fields.append(
+            f"  r{i}: repository(owner: $owner{i}, name: $name{i}) {{\n"
+            f"    object(expression: $expr{i}) {{\n"
+            f"      ... on Commit {{\n"
+            f"        history(first: $first{i}, after: $after{i}, since: $since, until: $until) {{ ...HistoryPage }}\n"
+            f"      }}\n"
+            f"    }}\n"
+            f"  }}"
+        )
+    return f"query({', '.join(params)}) {{\n" + "\n".join(fields) + "\n}\n" + HISTORY_FRAGMENT
+
+
+def _utc_timestamp(value: Optional[str]) -> Optional[str]:
+    """Normalize a git timestamp to the UTC 'Z' form the REST API returns."""
+    if not value:
+        return value
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _graphql_commit_info(node: dict) -> dict:
+    """Map a history node onto the commit dictionary the REST tools produce."""
+    author = node.get("author") or {}
+    user = author.get("user") or {}
+    return {
+        "sha": node["oid"],
+        "message": node.get("messageHeadline", ""),
+        "author": author.get("name"),
+        "date": _utc_timestamp(author.get("date")),
+        "url": node.get("url"),
+        "email": author.get("email"),
+        "login": user.get("login"),
+        "additions": node.get("additions", 0),
+        "deletions": node.get("deletions", 0),
+    }
+
+
+class _HistoryBatch:
+    """
+    Paging state for one query's worth of repositories.
+
+    Repositories that run out of pages (or reach max_commits) drop out of the
+    next query, so each round trip only asks for histories still in progress.
+    """
+
+    def __init__(self, repos: List[RepoSpec], indexes: List[int], per_page: int,
+                 since: Optional[str], until: Optional[str], max_commits: Optional[int]):
+        self.repos = repos
+        self.per_page = max(1, min(per_page, MAX_PER_PAGE))
+        self.since = since
+        self.until = until
+        self.max_commits = max_commits
+        self.cursors: Dict[int, Optional[str]] = {index: None for index in indexes}
+        self.yielded: Dict[int, int] = {index: 0 for index in indexes}
+
+    @property
+    def pending(self) -> List[int]:
+        return list(self.cursors)
+
+    def _page_size(self, index: int) -> int:
+        if self.max_commits is None:
+            return self.per_page
+        return max(1, min(self.per_page, self.max_commits - self.yielded[index]))
+
+    def payload(self) -> dict:
+        pending = self.pending
+        variables = {"since": self.since, "until": self.until}
+        for slot, index in enumerate(pending):
+            repo = self.repos[index]
+            variables[f"owner{slot}"] = repo["owner"]
+            variables[f"name{slot}"] = repo["repo"]
+            variables[f"expr{slot}"] = repo.get("branch") or "main"
+            variables[f"first{slot}"] = self._page_size(index)
+            variables[f"after{slot}"] = self.cursors[index]
+        return {"query": history_query(len(pending)), "variables": variables}
+
+    def consume(self, body: dict) -> List[Tuple[int, Union[List[dict], Exception]]]:
+        """Turn a query response into (index, commits or error) pairs and advance the cursors."""
+        data = body.get("data")
+        if data is None:
+            raise Exception(f"GitHub GraphQL error: {_error_messages(body)}")
+
+        results = []
+        for slot, index in enumerate(self.pending):
+            repo = self.repos[index]
+            history = ((data.get(f"r{slot}") or {}).get("object") or {}).get("history")
+            if history is None:
+                del self.cursors[index]
+                results.append((index, Exception(
+                    f"Repository or resource not found: {repo['owner']}/{repo['repo']}@{repo.get('branch') or 'main'}"
+                )))
+                continue
+
+            commits = [_graphql_commit_info(node) for node in history.get("nodes") or []]
+            if self.max_commits is not None:
+                commits = commits[:self.max_commits - self.yielded[index]]
+            self.yielded[index] += len(commits)
+            results.append((index, commits))
+
+            page_info = history.get("pageInfo") or {}
+            done = self.max_commits is not None and self.yielded[index] >= self.max_commits
+            if page_info.get("hasNextPage") and not done:
+                self.cursors[index] = page_info.get("endCursor")
+            else:
+                del self.cursors[index]
+        return results
+
+
+def _error_messages(body: dict) -> str:
+    return "; ".join(error.get("message", "unknown error") for error in body.get("errors") or []) or "no data"
+
+
+def _batches(repos: List[RepoSpec], per_page: int, since: Optional[str], until: Optional[str],
+             max_commits: Optional[int]) -> Iterator[_HistoryBatch]:
+    size = max(1, GITHUB_GRAPHQL_REPOS_PER_QUERY)
+    for start in range(0, len(repos), size):
+        indexes = list(range(start, min(start + size, len(repos))))
+        yield _HistoryBatch(repos, indexes, per_page, since, until, max_commits)
+
+
+def graphql_request(payload: dict, token: str = None) -> dict:
+    """POST a GraphQL query and return the decoded response body."""
+    return make_github_response(GITHUB_GRAPHQL_URL, "POST", token, payload=payload, resource="graphql").json()
+
+
+async def graphql_request_async(payload: dict, token: str = None) -> dict:
+    """Async counterpart of graphql_request."""
+    response = await make_github_response_async(GITHUB_GRAPHQL_URL, "POST", token, payload=payload,
+                                                resource="graphql")
+    return response.json()
+
+
+def iter_histories(repos: List[RepoSpec], per_page: int = MAX_PER_PAGE, since: Optional[str] = None,
+                   until: Optional[str] = None, max_commits: Optional[int] = None,
+                   token: str = None) -> Iterator[Tuple[int, Union[List[dict], Exception]]]:
+    """
+    Page through the commit histories of several repositories with as few queries as possible.
+
+    Up to GITHUB_GRAPHQL_REPOS_PER_QUERY repositories share each query, and
+    every query fetches the next page of each history still in progress.
+
+    Args:
+        repos: Repositories as {"owner": ..., "repo": ..., "branch": ...} (branch defaults to main)
+        per_page: Commits per repository per query, at most 100
+        since: Only commits after this ISO 8601 date (optional)
+        until: Only commits before this ISO 8601 date (optional)
+        max_commits: Stop each history after this many commits (optional)
+        token: GitHub Personal Access Token (optional)
+
+    Yields:
+        (index into repos, list of commit dictionaries) per page; a repository
+        or branch that cannot be resolved yields (index, Exception) once
+    """
+    if max_commits is not None and max_commits <= 0:
+        return
+    for batch in _batches(repos, per_page, since, until, max_commits):
+        while batch.pending:
+            yield from batch.consume(graphql_request(batch.payload(), token=token))
+
+
+async def iter_histories_async(repos: List[RepoSpec], per_page: int = MAX_PER_PAGE, since: Optional[str] = None,
+                               until: Optional[str] = None, max_commits: Optional[int] = None,
+                               token: str = None) -> AsyncIterator[Tuple[int, Union[List[dict], Exception]]]:
+    """Async counterpart of iter_histories."""
+    if max_commits is not None and max_commits <= 0:
+        return
+    for batch in _batches(repos, per_page, since, until, max_commits):
+        while batch.pending:
+            for result in batch.consume(await graphql_request_async(batch.payload(), token=token)):
+                yield result
+
+
+def iter_commits_graphql(owner: str, repo: str, branch: str = "main", per_page: int = MAX_PER_PAGE,
+                         since: Optional[str] = None, until: Optional[str] = None,
+                         max_commits: Optional[int] = None, token: str = None) -> Iterator[dict]:
+    """GraphQL counterpart of githubmcp.iter_commits, taking the same arguments."""
+    repos = [{"owner": owner, "repo": repo, "branch": branch}]
+    for _, commits in iter_histories(repos, per_page, since, until, max_commits, token):
+        if isinstance(commits, Exception):
+            raise commits
+        yield from commits
+
+
+async def iter_commits_graphql_async(owner: str, repo: str, branch: str = "main", per_page: int = MAX_PER_PAGE,
+                                     since: Optional[str] = None, until: Optional[str] = None,
+                                     max_commits: Optional[int] = None, token: str = None) -> AsyncIterator[dict]:
+    """Async counterpart of iter_commits_graphql."""
+    repos = [{"owner": owner, "repo": repo, "branch": branch}]
+    async for _, commits in iter_histories_async(repos, per_page, since, until, max_commits, token):
+        if isinstance(commits, Exception):
+            raise commits
+        for commit in commits:
+            yield commit
+
+
+__all__ = [
+    'history_query',
+    'graphql_request',
+    'graphql_request_async',
+    'iter_histories',
+    'iter_histories_async',
+    'iter_commits_graphql',
+    'iter_commits_graphql_async'
+]
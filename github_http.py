@@ -0,0 +1,94 @@
+import hashlib
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool / transport settings, overridable from the environment
+GITHUB_POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "20"))
+GITHUB_CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", "5"))
+GITHUB_READ_TIMEOUT = float(os.getenv("GITHUB_READ_TIMEOUT", "30"))
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "3"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_size: int = GITHUB_POOL_SIZE, max_retries: int = GITHUB_MAX_RETRIES) -> requests.Session:
+    """
+    Create a requests session with a keep-alive connection pool.
+
+    Connection errors on idempotent requests are retried with exponential
+    backoff here; retrying on response status (5xx, rate limits) is left to
+    the rate-limit scheduler, which knows each token's budget.
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=0,
+        backoff_factor=0.3,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide GitHub session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def reset_session():
+    """Drop the shared session (and its pooled connections)."""
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+def token_fingerprint(token: str) -> str:
+    """Stable, non-reversible identifier for a token (for cache keys and budgets)."""
+    return hashlib.sha256((token or "").encode("utf-8")).hexdigest()[:16]
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request through the shared session with the default timeouts."""
+    kwargs.setdefault("timeout", (GITHUB_CONNECT_TIMEOUT, GITHUB_READ_TIMEOUT))
+    return get_session().request(method, url, **kwargs)
+
+
+def _forget_session_after_fork():
+    """Pooled sockets belong to the parent; a forked worker starts its own pool."""
+    global _session, _session_lock
+    _session = None
+    _session_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_session_after_fork)
+
+
+__all__ = [
+    'create_session',
+    'get_session',
+    'reset_session',
+    'token_fingerprint',
+    'request'
+]
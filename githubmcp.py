@@ -182,51 +182,304 @@
 
 
 import base64
-from typing import List, Dict, Any
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Iterator, Optional
+from urllib.parse import urlencode
 import os
 import requests
 from dotenv import load_dotenv
 
+import diff_cache
+import github_cache
+import github_http
+import rate_limit
+import telemetry
+
 load_dotenv()
 
-# Try to get token from environment (will be set by the backend for each request)
-# Fall back to .env if not set (for local testing)
+# Per-request tokens are passed through github_token_context; this environment/.env
+# token is only the fallback (e.g. for local testing)
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 GITHUB_API_BASE = os.getenv("GITHUB_API_BASE", "https://api.github.com")
 
-print(f"GitHub Tools - Using API Base: {GITHUB_API_BASE}")
-print(f"GitHub Tools - Token configured: {'Yes' if GITHUB_TOKEN else 'No'}")
+# GitHub caps list endpoints at 100 items per page
+MAX_PER_PAGE = 100
 
+logger = telemetry.get_logger("github")
+telemetry.log_event(logger, "GitHub tools configured", api_base=GITHUB_API_BASE, token_configured=bool(GITHUB_TOKEN))
 
-def make_github_request(endpoint: str, method: str = "GET", token: str = None) -> Dict[Any, Any]:
-    """Make authenticated GitHub API request."""
-    # Use provided token, or fall back to environment variable
+
+# Token of the request being served; contextvars keep concurrent requests (threads
+# or asyncio tasks) isolated from each other
+_request_token: ContextVar[Optional[str]] = ContextVar("github_token", default=None)
+
+
+@contextmanager
+def github_token_context(token: Optional[str]):
+    """
+    Use `token` for GitHub calls made within this block that don't pass one explicitly.
+
+    A falsy token leaves the environment fallback in place.
+    """
+    reset_token = _request_token.set(token or None)
+    try:
+        yield
+    finally:
+        _request_token.reset(reset_token)
+
+
+def resolve_github_token(token: str = None) -> str:
+    """Return the token to use for a request, raising if none is available."""
+    # Use provided token, then the request's token, then the environment token
     if token is None:
-        token = os.getenv("GITHUB_TOKEN")
-    
+        token = _request_token.get() or GITHUB_TOKEN
+
     if not token:
         raise Exception("GitHub token not provided. Please provide a valid GitHub Personal Access Token.")
-    
-    headers = {
+    return token
+
+
+def content_scope(owner: str, repo: str, token: str = None) -> str:
+    """Content-cache scope of a request: the repository and the token it is made with."""
+    try:
+        token = resolve_github_token(token)
+    except Exception:
+        # Without a token the request itself fails; nothing is cached under this scope
+        token = ""
+    return diff_cache.content_scope(owner, repo, token)
+
+
+def github_headers(token: str) -> Dict[str, str]:
+    """Default headers for an authenticated GitHub API request."""
+    return {
         "Authorization": f"token {token}",
         "Accept": "application/vnd.github.v3+json",
         "User-Agent": "GitHub-Tools"
     }
-    url = f"{GITHUB_API_BASE}/{endpoint.lstrip('/')}"
+
+
+def github_url(endpoint: str) -> str:
+    """Resolve an endpoint relative to the API base; absolute URLs pass through."""
+    if endpoint.startswith(("http://", "https://")):
+        return endpoint
+    return f"{GITHUB_API_BASE}/{endpoint.lstrip('/')}"
+
+
+def github_error(status_code: int, endpoint: str, detail: str) -> Exception:
+    """Translate an HTTP error status into the message the tools report."""
+    if status_code == 401:
+        return Exception("Invalid GitHub token. Please check your Personal Access Token.")
+    elif status_code == 403:
+        return Exception("GitHub API rate limit exceeded or insufficient permissions.")
+    elif status_code == 404:
+        return Exception(f"Repository or resource not found: {endpoint}")
+    else:
+        return Exception(f"GitHub API error: {detail}")
+
+
+def make_github_response(endpoint: str, method: str = "GET", token: str = None, payload: Optional[dict] = None,
+                         resource: str = "core", extra_headers: Optional[Dict[str, str]] = None,
+                         stream: bool = False, revalidate: bool = False) -> requests.Response:
+    """
+    Make authenticated GitHub API request and return the raw response.
+
+    `endpoint` may be a path relative to the API base or an absolute URL
+    (as found in `Link` pagination headers). `payload` is sent as the JSON
+    body; `resource` names the rate-limit budget the request draws on.
+    With `stream` the body is left unread for the caller to consume (and
+    close) in chunks, and the response cache is bypassed. With `revalidate`
+    a cached entry is never served without asking GitHub first (a 304 still
+    costs no rate limit).
+    """
+    token = resolve_github_token(token)
+    headers = github_headers(token)
+    headers.update(extra_headers or {})
+    url = github_url(endpoint)
+
+    with telemetry.github_span(method, url) as span:
+        # Conditional-request cache for GETs: fresh entries skip the network,
+        # stale ones are revalidated and a 304 is served from the cache
+        cache = github_cache.get_response_cache() if method.upper() == "GET" and not stream else None
+        cache_key = None
+        entry = None
+        span.set(cache="bypass" if cache is None else "miss")
+        if cache is not None:
+            cache_key = cache.make_key(token, method, url)
+            entry = cache.lookup(cache_key)
+            if entry is not None and cache.is_fresh(entry) and not revalidate:
+                cache.record_hit()
+                span.set(cache="hit", status_code=200, bytes=len(entry["body"]))
+                return github_cache.to_response(entry, url)
+            if entry is not None:
+                headers.update(cache.conditional_headers(entry))
+            else:
+                cache.record_miss()
+
+        try:
+            scheduler = rate_limit.get_scheduler()
+            attempt = 0
+            while True:
+                # Waits when the token's budget is nearly spent or GitHub asked us to back off
+                time.sleep(scheduler.acquire(token, resource))
+                # Shared keep-alive pool: no new DNS/TCP/TLS handshake per call
+                response = github_http.request(method, url, headers=headers, json=payload, stream=stream)
+                body = response.text if response.status_code >= 400 else ""
+                scheduler.record(token, response.status_code, response.headers, body, resource)
+                delay = scheduler.retry_delay(token, attempt, response.status_code, response.headers, body, resource)
+                if delay is None:
+                    break
+                time.sleep(delay)
+                attempt += 1
+
+            span.set(status_code=response.status_code, attempts=attempt + 1)
+            if response.status_code == 304 and entry is not None:
+                span.set(cache="revalidated", bytes=len(entry["body"]))
+                return github_cache.to_response(cache.revalidated(cache_key, entry), url)
+            # A streamed body is still unread: count its declared length
+            span.set(bytes=int(response.headers.get("Content-Length") or 0) if stream else len(response.content))
+            response.raise_for_status()
+            if cache is not None:
+                cache.store(cache_key, response)
+            return response
+        except requests.exceptions.HTTPError as e:
+            raise github_error(e.response.status_code, endpoint, str(e))
+        except rate_limit.RateLimitWaitTooLong as e:
+            raise Exception(str(e))
+
+
+def make_github_request(endpoint: str, method: str = "GET", token: str = None) -> Dict[Any, Any]:
+    """Make authenticated GitHub API request."""
+    return make_github_response(endpoint, method, token).json()
+
+
+def _commit_info(commit_data: dict) -> dict:
+    """Extract the commit fields the tools expose from a GitHub commit payload."""
+    return {
+        "sha": commit_data["sha"],
+        "message": commit_data["commit"]["message"],
+        "author": commit_data["commit"]["author"]["name"],
+        "date": commit_data["commit"]["author"]["date"],
+        "url": commit_data["html_url"],
+        # Lets authors be matched by login/email, not just the free-form name
+        "email": commit_data["commit"]["author"].get("email"),
+        "login": (commit_data.get("author") or {}).get("login")
+    }
+
+
+def _commit_diff(commit_data: dict) -> dict:
+    """Build the get_commit_diff result from a GitHub single-commit payload."""
+    files = []
+    total_additions = 0
+    total_deletions = 0
     
-    try:
-        response = requests.request(method, url, headers=headers)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 401:
-            raise Exception("Invalid GitHub token. Please check your Personal Access Token.")
-        elif e.response.status_code == 403:
-            raise Exception("GitHub API rate limit exceeded or insufficient permissions.")
-        elif e.response.status_code == 404:
-            raise Exception(f"Repository or resource not found: {endpoint}")
-        else:
-            raise Exception(f"GitHub API error: {str(e)}")
+    for file_data in commit_data.get("files", []):
+        file_change = {
+            "filename": file_data["filename"],
+            "status": file_data["status"],
+            "additions": file_data.get("additions", 0),
+            "deletions": file_data.get("deletions", 0),
+            "patch": file_data.get("patch", "")
+        }
+        files.append(file_change)
+        total_additions += file_change["additions"]
+        total_deletions += file_change["deletions"]
+    
+    return {
+        "commit": _commit_info(commit_data),
+        "files": files,
+        "total_additions": total_additions,
+        "total_deletions": total_deletions
+    }
+
+
+def commits_endpoint(owner: str, repo: str, branch: str = "main", per_page: int = MAX_PER_PAGE,
+                     since: Optional[str] = None, until: Optional[str] = None) -> str:
+    """First-page endpoint for listing a branch's commits."""
+    params = {"sha": branch, "per_page": max(1, min(per_page, MAX_PER_PAGE))}
+    if since:
+        params["since"] = since
+    if until:
+        params["until"] = until
+    return f"repos/{owner}/{repo}/commits?{urlencode(params)}"
+
+
+def iter_commits(owner: str, repo: str, branch: str = "main", per_page: int = MAX_PER_PAGE,
+                 since: Optional[str] = None, until: Optional[str] = None,
+                 max_commits: Optional[int] = None, token: str = None) -> Iterator[dict]:
+    """
+    Lazily iterate over a branch's commit history, newest first.
+
+    Pages are fetched on demand by following `Link: rel="next"` headers, so
+    only one page of commits is held in memory at a time.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        branch: Branch name (default: main)
+        per_page: Commits per page, at most 100
+        since: Only commits after this ISO 8601 date (optional)
+        until: Only commits before this ISO 8601 date (optional)
+        max_commits: Stop after yielding this many commits (optional)
+        token: GitHub Personal Access Token (optional)
+
+    Yields:
+        Commit dictionaries, same shape as get_recent_commits entries
+    """
+    if max_commits is not None and max_commits <= 0:
+        return
+
+    next_url = commits_endpoint(owner, repo, branch, per_page, since, until)
+    yielded = 0
+
+    while next_url:
+        response = make_github_response(next_url, token=token)
+        for commit_data in response.json():
+            yield _commit_info(commit_data)
+            yielded += 1
+            if max_commits is not None and yielded >= max_commits:
+                return
+        next_url = response.links.get("next", {}).get("url")
+
+
+def compare_endpoint(owner: str, repo: str, base: str, head: str) -> str:
+    """First-page endpoint for the commits between two revisions."""
+    return f"repos/{owner}/{repo}/compare/{base}...{head}?{urlencode({'per_page': MAX_PER_PAGE})}"
+
+
+def iter_commits_between(owner: str, repo: str, base: str, head: str,
+                         token: str = None) -> Optional[Iterator[dict]]:
+    """
+    Commits reachable from `head` but not from `base`, via the compare endpoint.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        base: Older revision (typically a previously seen head SHA)
+        head: Newer revision
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        Iterator over the new commits (oldest first, pages fetched on demand),
+        or None when `base` is not an ancestor of `head` (e.g. after a force push)
+    """
+    response = make_github_response(compare_endpoint(owner, repo, base, head), token=token)
+    data = response.json()
+    if data.get("status") not in ("ahead", "identical"):
+        return None
+
+    def pages(response, data):
+        while True:
+            for commit_data in data.get("commits", []):
+                yield _commit_info(commit_data)
+            next_url = response.links.get("next", {}).get("url")
+            if not next_url:
+                return
+            response = make_github_response(next_url, token=token)
+            data = response.json()
+
+    return pages(response, data)
 
 
 def get_latest_commit(owner: str, repo: str, branch: str = "main", token: str = None) -> dict:
@@ -244,63 +497,51 @@ def get_latest_commit(owner: str, repo: str, branch: str = "main", token: str =
     """
     try:
         data = make_github_request(f"repos/{owner}/{repo}/commits/{branch}", token=token)
-        return {
-            "sha": data["sha"],
-            "message": data["commit"]["message"],
-            "author": data["commit"]["author"]["name"],
-            "date": data["commit"]["author"]["date"],
-            "url": data["html_url"]
-        }
+        return _commit_info(data)
     except Exception as e:
         raise Exception(f"Failed to get latest commit: {str(e)}")
 
 
-def get_commit_diff(owner: str, repo: str, commit_sha: str, token: str = None) -> dict:
+def _cached_commit_diff(scope: str, commit_sha: str, include_patch: bool) -> Optional[dict]:
+    """Serve a commit diff from the content cache when the SHA is a full one."""
+    if not diff_cache.is_full_sha(commit_sha):
+        return None
+    cached = diff_cache.get_content_cache().get_commit_diff(scope, commit_sha)
+    return cached.to_dict(include_patch=include_patch) if cached is not None else None
+
+
+def _store_commit_diff(scope: str, diff: dict, include_patch: bool) -> dict:
+    """Store a fetched commit diff in the content cache and render it."""
+    cached = diff_cache.get_content_cache().put_commit_diff(scope, diff["commit"]["sha"], diff)
+    return diff if include_patch else cached.to_dict(include_patch=False)
+
+
+def get_commit_diff(owner: str, repo: str, commit_sha: str, include_patch: bool = True, token: str = None) -> dict:
     """
     Get detailed diff for a specific commit.
     
+    Diffs are immutable per SHA, so they are served from the content cache
+    once fetched with the same token from the same repository; patches are
+    stored compressed and only inflated when include_patch is set.
+    
     Args:
         owner: Repository owner
         repo: Repository name
         commit_sha: Commit SHA hash
+        include_patch: Include each file's patch text (default: True)
         token: GitHub Personal Access Token (optional)
     
     Returns:
         Dictionary with commit diff information
     """
     try:
-        commit_data = make_github_request(f"repos/{owner}/{repo}/commits/{commit_sha}", token=token)
-        
-        commit_info = {
-            "sha": commit_data["sha"],
-            "message": commit_data["commit"]["message"],
-            "author": commit_data["commit"]["author"]["name"],
-            "date": commit_data["commit"]["author"]["date"],
-            "url": commit_data["html_url"]
-        }
-        
-        files = []
-        total_additions = 0
-        total_deletions = 0
+        scope = content_scope(owner, repo, token)
+        cached = _cached_commit_diff(scope, commit_sha, include_patch)
+        if cached is not None:
+            return cached
         
-        for file_data in commit_data.get("files", []):
-            file_change = {
-                "filename": file_data["filename"],
-                "status": file_data["status"],
-                "additions": file_data.get("additions", 0),
-                "deletions": file_data.get("deletions", 0),
-                "patch": file_data.get("patch", "")
-            }
-            files.append(file_change)
-            total_additions += file_change["additions"]
-            total_deletions += file_change["deletions"]
-        
-        return {
-            "commit": commit_info,
-            "files": files,
-            "total_additions": total_additions,
-            "total_deletions": total_deletions
-        }
+        commit_data = make_github_request(f"repos/{owner}/{repo}/commits/{commit_sha}", token=token)
+        return _store_commit_diff(scope, _commit_diff(commit_data), include_patch)
     except Exception as e:
         raise Exception(f"Failed to get commit diff: {str(e)}")
 
@@ -312,7 +553,7 @@ def get_recent_commits(owner: str, repo: str, count: int = 10, branch: str = "ma
     Args:
         owner: Repository owner
         repo: Repository name
-        count: Number of commits to retrieve (default: 10)
+        count: Number of commits to retrieve (default: 10); pages past 100 are followed
         branch: Branch name (default: main)
         token: GitHub Personal Access Token (optional)
     
@@ -320,24 +561,51 @@ def get_recent_commits(owner: str, repo: str, count: int = 10, branch: str = "ma
         List of commit dictionaries
     """
     try:
-        data = make_github_request(f"repos/{owner}/{repo}/commits?sha={branch}&per_page={count}", token=token)
-        commits = []
-        
-        for commit_data in data:
-            commit = {
-                "sha": commit_data["sha"],
-                "message": commit_data["commit"]["message"],
-                "author": commit_data["commit"]["author"]["name"],
-                "date": commit_data["commit"]["author"]["date"],
-                "url": commit_data["html_url"]
-            }
-            commits.append(commit)
-        
-        return commits
+        return list(iter_commits(owner, repo, branch=branch, per_page=count, max_commits=count, token=token))
     except Exception as e:
         raise Exception(f"Failed to get recent commits: {str(e)}")
 
 
+def _cached_file_content(scope: str, owner: str, repo: str, file_path: str, branch: str) -> Optional[dict]:
+    """Serve a file from the content cache when the ref is an immutable commit SHA."""
+    if not diff_cache.is_full_sha(branch):
+        return None
+    content_cache = diff_cache.get_content_cache()
+    blob = content_cache.get_path_blob(scope, owner, repo, branch, file_path)
+    raw = content_cache.get_blob(scope, blob["sha"]) if blob else None
+    if raw is None:
+        return None
+    return {
+        "path": file_path,
+        "content": raw.decode('utf-8'),
+        "sha": blob["sha"],
+        "size": len(raw),
+        "download_url": blob["download_url"]
+    }
+
+
+def _file_content(scope: str, owner: str, repo: str, file_path: str, branch: str, data: dict) -> dict:
+    """Decode a contents API payload and remember the blob in the content cache."""
+    if data.get("type") != "file":
+        raise Exception(f"Path {file_path} is not a file")
+    
+    raw = base64.b64decode(data["content"])
+    content_cache = diff_cache.get_content_cache()
+    content_cache.put_blob(scope, data["sha"], raw)
+    if diff_cache.is_full_sha(branch):
+        # A path at a full commit SHA always resolves to the same blob
+        content_cache.put_path_blob(scope, owner, repo, branch, file_path, data["sha"], data.get("download_url") or "")
+    content = raw.decode('utf-8')
+    
+    return {
+        "path": file_path,
+        "content": content,
+        "sha": data["sha"],
+        "size": data["size"],
+        "download_url": data.get("download_url", "")
+    }
+
+
 def get_file_content(owner: str, repo: str, file_path: str, branch: str = "main", token: str = None) -> dict:
     """
     Get content of a specific file from repository.
@@ -353,26 +621,22 @@ def get_file_content(owner: str, repo: str, file_path: str, branch: str = "main"
         Dictionary with file content and metadata
     """
     try:
-        data = make_github_request(f"repos/{owner}/{repo}/contents/{file_path}?ref={branch}", token=token)
-        
-        if data.get("type") != "file":
-            raise Exception(f"Path {file_path} is not a file")
+        scope = content_scope(owner, repo, token)
+        cached = _cached_file_content(scope, owner, repo, file_path, branch)
+        if cached is not None:
+            return cached
         
-        content = base64.b64decode(data["content"]).decode('utf-8')
-        
-        return {
-            "path": file_path,
-            "content": content,
-            "sha": data["sha"],
-            "size": data["size"],
-            "download_url": data.get("download_url", "")
-        }
+        data = make_github_request(f"repos/{owner}/{repo}/contents/{file_path}?ref={branch}", token=token)
+        return _file_content(scope, owner, repo, file_path, branch, data)
     except Exception as e:
         raise Exception(f"Failed to get file content: {str(e)}")
 
 
 # Export all functions
 __all__ = [
+    'github_token_context',
+    'iter_commits',
+    'iter_commits_between',
     'get_latest_commit',
     'get_commit_diff', 
     'get_recent_commits',
@@ -0,0 +1,365 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import List, Dict, Any, AsyncIterator, Optional
+
+import httpx
+
+import diff_cache
+import github_cache
+import github_http
+import rate_limit
+import telemetry
+from githubmcp import (
+    MAX_PER_PAGE,
+    resolve_github_token,
+    github_headers,
+    github_url,
+    github_error,
+    commits_endpoint,
+    compare_endpoint,
+    _commit_info,
+    _commit_diff,
+    content_scope,
+    _cached_commit_diff,
+    _store_commit_diff,
+    _cached_file_content,
+    _file_content
+)
+
+# Upper bound on requests a single batch tool keeps in flight
+GITHUB_ASYNC_CONCURRENCY = int(os.getenv("GITHUB_ASYNC_CONCURRENCY", "10"))
+
+# httpx async clients are bound to the event loop they were first used on
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def create_async_client() -> httpx.AsyncClient:
+    """Create an httpx client with a keep-alive pool sized like the sync session."""
+    limits = httpx.Limits(
+        max_connections=github_http.GITHUB_POOL_SIZE,
+        max_keepalive_connections=github_http.GITHUB_POOL_SIZE,
+    )
+    transport = httpx.AsyncHTTPTransport(retries=github_http.GITHUB_MAX_RETRIES, limits=limits)
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(github_http.GITHUB_READ_TIMEOUT, connect=github_http.GITHUB_CONNECT_TIMEOUT),
+        headers={"Accept-Encoding": "gzip, deflate"},
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared async client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            client = create_async_client()
+            _clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    """Close the running loop's shared client (e.g. on application shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def _cached_response(entry: dict, method: str, url: str) -> httpx.Response:
+    """Rebuild an httpx.Response from a response cache entry."""
+    return httpx.Response(200, headers=entry["headers"], content=entry["body"], request=httpx.Request(method, url))
+
+
+async def make_github_response_async(endpoint: str, method: str = "GET", token: str = None,
+                                     payload: Optional[dict] = None, resource: str = "core",
+                                     extra_headers: Optional[Dict[str, str]] = None,
+                                     stream: bool = False, revalidate: bool = False) -> httpx.Response:
+    """
+    Async counterpart of githubmcp.make_github_response, sharing its response cache.
+
+    A streamed response must be closed by the caller (`await response.aclose()`).
+    """
+    token = resolve_github_token(token)
+    headers = github_headers(token)
+    headers.update(extra_headers or {})
+    url = github_url(endpoint)
+
+    with telemetry.github_span(method, url) as span:
+        cache = github_cache.get_response_cache() if method.upper() == "GET" and not stream else None
+        cache_key = None
+        entry = None
+        span.set(cache="bypass" if cache is None else "miss")
+        if cache is not None:
+            cache_key = cache.make_key(token, method, url)
+            entry = cache.lookup(cache_key)
+            if entry is not None and cache.is_fresh(entry) and not revalidate:
+                cache.record_hit()
+                span.set(cache="hit", status_code=200, bytes=len(entry["body"]))
+                return _cached_response(entry, method, url)
+            if entry is not None:
+                headers.update(cache.conditional_headers(entry))
+            else:
+                cache.record_miss()
+
+        try:
+            scheduler = rate_limit.get_scheduler()
+            client = get_async_client()
+            attempt = 0
+            while True:
+                await asyncio.sleep(scheduler.acquire(token, resource))
+                response = await client.send(client.build_request(method, url, headers=headers, json=payload),
+                                             stream=stream)
+                if stream and response.status_code >= 400:
+                    await response.aread()
+                body = response.text if response.status_code >= 400 else ""
+                scheduler.record(token, response.status_code, response.headers, body, resource)
+                delay = scheduler.retry_delay(token, attempt, response.status_code, response.headers, body, resource)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+                attempt += 1
+
+            span.set(status_code=response.status_code, attempts=attempt + 1)
+            if response.status_code == 304 and entry is not None:
+                span.set(cache="revalidated", bytes=len(entry["body"]))
+                return _cached_response(cache.revalidated(cache_key, entry), method, url)
+            span.set(bytes=int(response.headers.get("Content-Length") or 0) if stream else len(response.content))
+            response.raise_for_status()
+            if cache is not None:
+                cache.store(cache_key, response)
+            return response
+        except httpx.HTTPStatusError as e:
+            raise github_error(e.response.status_code, endpoint, str(e))
+        except rate_limit.RateLimitWaitTooLong as e:
+            raise Exception(str(e))
+
+
+async def make_github_request_async(endpoint: str, method: str = "GET", token: str = None) -> Dict[Any, Any]:
+    """Make authenticated GitHub API request without blocking the event loop."""
+    return (await make_github_response_async(endpoint, method, token)).json()
+
+
+async def iter_commits_async(owner: str, repo: str, branch: str = "main", per_page: int = MAX_PER_PAGE,
+                             since: Optional[str] = None, until: Optional[str] = None,
+                             max_commits: Optional[int] = None, token: str = None) -> AsyncIterator[dict]:
+    """Async counterpart of githubmcp.iter_commits."""
+    if max_commits is not None and max_commits <= 0:
+        return
+
+    next_url = commits_endpoint(owner, repo, branch, per_page, since, until)
+    yielded = 0
+
+    while next_url:
+        response = await make_github_response_async(next_url, token=token)
+        for commit_data in response.json():
+            yield _commit_info(commit_data)
+            yielded += 1
+            if max_commits is not None and yielded >= max_commits:
+                return
+        next_url = response.links.get("next", {}).get("url")
+
+
+async def iter_commits_between_async(owner: str, repo: str, base: str, head: str,
+                                     token: str = None) -> Optional[AsyncIterator[dict]]:
+    """Async counterpart of githubmcp.iter_commits_between."""
+    response = await make_github_response_async(compare_endpoint(owner, repo, base, head), token=token)
+    data = response.json()
+    if data.get("status") not in ("ahead", "identical"):
+        return None
+
+    async def pages(response, data):
+        while True:
+            for commit_data in data.get("commits", []):
+                yield _commit_info(commit_data)
+            next_url = response.links.get("next", {}).get("url")
+            if not next_url:
+                return
+            response = await make_github_response_async(next_url, token=token)
+            data = response.json()
+
+    return pages(response, data)
+
+
+async def get_latest_commit_async(owner: str, repo: str, branch: str = "main", token: str = None) -> dict:
+    """
+    Get the latest commit from a repository branch.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        branch: Branch name (default: main)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        Dictionary with commit information
+    """
+    try:
+        data = await make_github_request_async(f"repos/{owner}/{repo}/commits/{branch}", token=token)
+        return _commit_info(data)
+    except Exception as e:
+        raise Exception(f"Failed to get latest commit: {str(e)}")
+
+
+async def get_commit_diff_async(owner: str, repo: str, commit_sha: str, include_patch: bool = True,
+                                token: str = None) -> dict:
+    """
+    Get detailed diff for a specific commit.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        commit_sha: Commit SHA hash
+        include_patch: Include each file's patch text (default: True)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        Dictionary with commit diff information
+    """
+    try:
+        # Disk reads and (de)compression of the content cache run in a worker thread
+        scope = content_scope(owner, repo, token)
+        cached = await asyncio.to_thread(_cached_commit_diff, scope, commit_sha, include_patch)
+        if cached is not None:
+            return cached
+
+        commit_data = await make_github_request_async(f"repos/{owner}/{repo}/commits/{commit_sha}", token=token)
+        return await asyncio.to_thread(_store_commit_diff, scope, _commit_diff(commit_data), include_patch)
+    except Exception as e:
+        raise Exception(f"Failed to get commit diff: {str(e)}")
+
+
+async def get_recent_commits_async(owner: str, repo: str, count: int = 10, branch: str = "main",
+                                   token: str = None) -> List[dict]:
+    """
+    Get recent commits from a repository.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        count: Number of commits to retrieve (default: 10); pages past 100 are followed
+        branch: Branch name (default: main)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        List of commit dictionaries
+    """
+    try:
+        return [
+            commit async for commit in iter_commits_async(
+                owner, repo, branch=branch, per_page=count, max_commits=count, token=token
+            )
+        ]
+    except Exception as e:
+        raise Exception(f"Failed to get recent commits: {str(e)}")
+
+
+async def get_file_content_async(owner: str, repo: str, file_path: str, branch: str = "main",
+                                 token: str = None) -> dict:
+    """
+    Get content of a specific file from repository.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        file_path: Path to file in repository
+        branch: Branch name (default: main)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        Dictionary with file content and metadata
+    """
+    try:
+        scope = content_scope(owner, repo, token)
+        if diff_cache.is_full_sha(branch):
+            cached = await asyncio.to_thread(_cached_file_content, scope, owner, repo, file_path, branch)
+            if cached is not None:
+                return cached
+
+        data = await make_github_request_async(f"repos/{owner}/{repo}/contents/{file_path}?ref={branch}", token=token)
+        return await asyncio.to_thread(_file_content, scope, owner, repo, file_path, branch, data)
+    except Exception as e:
+        raise Exception(f"Failed to get file content: {str(e)}")
+
+
+async def gather_bounded(calls: List, limit: int = GITHUB_ASYNC_CONCURRENCY) -> List:
+    """Await coroutine factories concurrently, at most `limit` at a time, keeping errors per item."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    return await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+
+
+async def get_commit_diffs(owner: str, repo: str, commit_shas: List[str], include_patch: bool = True,
+                           token: str = None) -> List[dict]:
+    """
+    Get detailed diffs for several commits at once, fetched concurrently.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        commit_shas: Commit SHA hashes
+        include_patch: Include each file's patch text (default: True)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        List of commit diff dictionaries in the order requested; a commit that
+        could not be fetched is reported as {"sha": ..., "error": ...}
+    """
+    results = await gather_bounded([
+        lambda sha=sha: get_commit_diff_async(owner, repo, sha, include_patch=include_patch, token=token)
+        for sha in commit_shas
+    ])
+    return [
+        {"sha": sha, "error": str(result)} if isinstance(result, Exception) else result
+        for sha, result in zip(commit_shas, results)
+    ]
+
+
+async def get_file_contents(owner: str, repo: str, file_paths: List[str], branch: str = "main",
+                            token: str = None) -> List[dict]:
+    """
+    Get contents of several files at once, fetched concurrently.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        file_paths: Paths to files in repository
+        branch: Branch name (default: main)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        List of file dictionaries in the order requested; a file that could
+        not be fetched is reported as {"path": ..., "error": ...}
+    """
+    results = await gather_bounded([
+        lambda path=path: get_file_content_async(owner, repo, path, branch=branch, token=token)
+        for path in file_paths
+    ])
+    return [
+        {"path": path, "error": str(result)} if isinstance(result, Exception) else result
+        for path, result in zip(file_paths, results)
+    ]
+
+
+# Export all functions
+__all__ = [
+    'get_async_client',
+    'close_async_client',
+    'iter_commits_async',
+    'iter_commits_between_async',
+    'get_latest_commit_async',
+    'get_commit_diff_async',
+    'get_recent_commits_async',
+    'get_file_content_async',
+    'gather_bounded',
+    'get_commit_diffs',
+    'get_file_contents'
+]
@@ -1,130 +1,186 @@
-import asyncio
-import json
-import os
-from flask import Flask, request, jsonify
+import logging
+
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from agents import create_mcp_agent
-from utils import run_mcp_agent
-import githubmcp  # Import the module to patch it
+import telemetry
+from jobs import JobsUnavailable
+from async_runtime import run_async, iterate_async
+from analysis import (
+    parse_analysis_request, log_analysis_request, analyze, analyze_stream, format_sse, debug_info,
+    parse_batch_request, log_batch_request, analyze_batch,
+    submit_analysis_job, get_analysis_job, job_events
+)
 
 app = Flask(__name__)
 CORS(app)
+# Root span and latency histogram per request; the span ends once the body is sent
+app.wsgi_app = telemetry.WSGITelemetryMiddleware(app.wsgi_app)
 
-# Global variable to store current token (thread-safe for single request processing)
-_current_github_token = None
-
-def set_github_token(token: str):
-    """Set the GitHub token for the current request."""
-    global _current_github_token
-    _current_github_token = token
-    # Also set in environment as backup
-    os.environ['GITHUB_TOKEN'] = token
-
-def get_github_token():
-    """Get the current GitHub token."""
-    global _current_github_token
-    if _current_github_token:
-        return _current_github_token
-    return os.getenv("GITHUB_TOKEN")
-
-# Monkey patch the githubmcp module to use our token getter
-original_make_request = githubmcp.make_github_request
-
-def patched_make_request(endpoint: str, method: str = "GET", token: str = None):
-    """Patched version that uses current token if none provided."""
-    if token is None:
-        token = get_github_token()
-    return original_make_request(endpoint, method, token)
-
-githubmcp.make_github_request = patched_make_request
+logger = telemetry.get_logger("http")
 
 @app.route('/api/analyze-contribution', methods=['POST'])
 def analyze_contribution():
-    global _current_github_token
-    
     try:
         # Get JSON data from request
         data = request.get_json()
         
-        # Extract fields
-        project = data.get('project')
-        author = data.get('author')
-        owner = data.get('owner')
-        github_token = data.get('github_token')
-        
-        # Validate required fields
-        if not all([project, author, owner]):
+        # Extract and validate fields
+        try:
+            params = parse_analysis_request(data)
+        except ValueError as e:
             return jsonify({
                 "success": False,
-                "error": "Missing required fields: project, author, and owner are required"
+                "error": str(e)
             }), 400
         
-        # Print received data (mask token for security)
-        print("=" * 50)
-        print("Received JSON Data:")
-        print(f"Project: {project}")
-        print(f"Author: {author}")
-        print(f"Owner: {owner}")
-        if github_token:
-            print(f"GitHub Token: {'*' * 20}{github_token[-4:] if len(github_token) > 4 else '****'}")
-        else:
-            print("GitHub Token: Using .env token")
-        print("=" * 50)
+        log_analysis_request(params)
+        
+        # Run on the persistent event loop instead of spinning up a new one per request
+        result = run_async(analyze(params))
+        
+        # Return the result
+        return jsonify(result), 200
+        
+    except Exception as e:
+        telemetry.log_event(logger, "Request failed", logging.ERROR, exc_info=True, error=str(e))
+        
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/analyze-contribution/stream', methods=['POST'])
+def analyze_contribution_stream():
+    """Same analysis as /api/analyze-contribution, streamed as Server-Sent Events."""
+    data = request.get_json(silent=True)
+    
+    try:
+        params = parse_analysis_request(data)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    
+    log_analysis_request(params)
+    
+    def events():
+        for event in iterate_async(analyze_stream(params)):
+            yield format_sse(event)
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/analyze-contribution/batch', methods=['POST'])
+def analyze_contribution_batch():
+    """Analyze many (owner, project, author) jobs in one request."""
+    try:
+        data = request.get_json(silent=True)
+        
+        try:
+            jobs = parse_batch_request(data)
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
         
-        # Set the GitHub token for this request
-        if github_token:
-            set_github_token(github_token)
+        log_batch_request(jobs)
         
-        # Initialize agent if needed
-        mcp_agent = asyncio.run(create_mcp_agent())
+        return jsonify(run_async(analyze_batch(jobs))), 200
         
-        # Create task for the agent
-        task = f"Analyze GitHub contributions for {author} in the {owner}/{project} repository"
+    except Exception as e:
+        telemetry.log_event(logger, "Request failed", logging.ERROR, exc_info=True, error=str(e))
         
-        # Run the async agent function synchronously
-        result = asyncio.run(run_mcp_agent(mcp_agent, task))
-        print("Result to frontend:", result)
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+def job_accepted(job, coalesced):
+    return {
+        "success": True,
+        "job_id": job["id"],
+        "status": job["status"],
+        "coalesced": coalesced,
+        "status_url": f"/api/jobs/{job['id']}",
+        "events_url": f"/api/jobs/{job['id']}/events"
+    }
+
+# Job mode needs a long-lived server: on Vercel it answers 503 unless JOBS_ENABLED=true (see jobs.py)
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Queue a single or batch analysis; poll status_url or subscribe to events_url for the result."""
+    try:
+        data = request.get_json(silent=True)
         
-        # Clean up
-        _current_github_token = None
-        if github_token and 'GITHUB_TOKEN' in os.environ:
-            # Restore original .env token if it exists
-            from dotenv import load_dotenv
-            load_dotenv(override=True)
+        try:
+            job, coalesced = submit_analysis_job(data)
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        except JobsUnavailable as e:
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 503
         
-        # Return the result
-        return jsonify(result), 200
+        return jsonify(job_accepted(job, coalesced)), 202
         
     except Exception as e:
-        print(f"Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        telemetry.log_event(logger, "Request failed", logging.ERROR, exc_info=True, error=str(e))
         
-        # Clean up token on error too
-        _current_github_token = None
-            
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = get_analysis_job(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
+    return jsonify(job), 200
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_status_events(job_id):
+    """Job status changes as Server-Sent Events, ending with the result."""
+    if get_analysis_job(job_id) is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
+    
+    def events():
+        for event in iterate_async(job_events(job_id)):
+            yield format_sse(event)
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "Backend is running"}), 200
 
 @app.route('/debug', methods=['GET'])
-def debug_info():
-    import sys
-    return jsonify({
-        "python_executable": sys.executable,
-        "python_version": sys.version,
-        "python_path": sys.path,
-        "cwd": os.getcwd(),
-        "env_vars": {
-            "GITHUB_TOKEN": "***" if os.getenv("GITHUB_TOKEN") else None,
-            "GITHUB_API_BASE": os.getenv("GITHUB_API_BASE")
-        }
-    }), 200
+def debug():
+    return jsonify(debug_info()), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics of this worker process."""
+    return Response(telemetry.render_metrics(), content_type=telemetry.METRICS_CONTENT_TYPE)
 
 if __name__ == "__main__":
-    app.run(debug=True, port=8765, host='localhost')
\ No newline at end of file
+    app.run(debug=True, port=8765, host='localhost')
@@ -0,0 +1,404 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, Optional, Tuple
+
+import async_runtime
+import telemetry
+from github_http import token_fingerprint
+
+# Job queue settings, overridable from the environment
+JOB_BACKEND = os.getenv("JOB_BACKEND", "memory")  # memory | sqlite
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "3600"))
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "120"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.25"))
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(tempfile.gettempdir(), "hirelens_jobs.sqlite3"))
+
+# Jobs run on an in-process loop after the 202 is sent and live in that
+# process's store, so they need a long-lived server. Serverless platforms
+# (Vercel, Lambda) may freeze the function once the response is out and
+# route the next GET to another instance: job mode is off there by default.
+SERVERLESS = bool(os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "false" if SERVERLESS else "true").lower() not in ("0", "false", "no", "off")
+
+ACTIVE_STATUSES = ("queued", "running")
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+# Fields every job record has; result/error are filled in when it finishes
+JOB_FIELDS = ("id", "kind", "key", "status", "params", "result", "error",
+              "created_at", "started_at", "finished_at", "heartbeat_at")
+
+# Reported for an active job whose worker stopped sending heartbeats
+STALE_JOB_ERROR = "Job worker stopped responding"
+
+logger = telemetry.get_logger("jobs")
+
+
+class JobsUnavailable(Exception):
+    """Raised when submitting a job on a deployment that cannot run background jobs."""
+
+
+def is_stale(job: dict, now: float) -> bool:
+    """
+    True for a queued or running job whose worker has stopped heartbeating.
+
+    Workers heartbeat a job from the moment they accept it, queued or
+    running; a job created without one is timed from its creation.
+    """
+    if job["status"] not in ACTIVE_STATUSES:
+        return False
+    return now - (job["heartbeat_at"] or job["created_at"] or 0) > JOB_STALE_AFTER
+
+
+def job_key(kind: str, params: Dict[str, Any], token: Optional[str]) -> str:
+    """Coalescing key: identical work for the same token identity gets the same key."""
+    payload = json.dumps({"kind": kind, "params": params, "token": token_fingerprint(token)},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryJobStore:
+    """In-process job records, visible to this worker only."""
+
+    def __init__(self):
+        self._jobs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def insert_unless_active(self, job: dict) -> Optional[dict]:
+        """
+        Insert a job unless one with the same key is still active; return that one instead.
+
+        Stale active jobs with the key are marked failed first, so new work
+        is never merged into a job that will not finish.
+        """
+        now = time.time()
+        with self._lock:
+            for existing in self._jobs.values():
+                if existing["key"] != job["key"]:
+                    continue
+                if is_stale(existing, now):
+                    existing.update(status="failed", error=STALE_JOB_ERROR, finished_at=now)
+                elif existing["status"] in ACTIVE_STATUSES:
+                    return dict(existing)
+            self._jobs[job["id"]] = dict(job)
+            return None
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["status"] in TERMINAL_STATUSES and (job["finished_at"] or 0) < finished_before]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
+
+class SQLiteJobStore:
+    """
+    On-disk job records shared by every worker process on the host.
+
+    Any worker can answer a status poll and identical jobs coalesce across
+    workers; a job still runs in the worker that accepted it, so callers'
+    tokens never leave that process.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " params TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " heartbeat_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_key_status ON jobs (key, status)")
+        self._conn.commit()
+
+    @staticmethod
+    def _row_to_job(row) -> dict:
+        job = dict(zip(JOB_FIELDS, row))
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def insert_unless_active(self, job: dict) -> Optional[dict]:
+        """
+        Insert a job unless one with the same key is still active; return that one instead.
+
+        Stale active jobs with the key are marked failed first (in the same
+        transaction), so new work is never merged into a job whose worker died.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?"
+                    " WHERE key = ? AND status IN (?, ?) AND COALESCE(heartbeat_at, created_at) < ?",
+                    (STALE_JOB_ERROR, now, job["key"], *ACTIVE_STATUSES, now - JOB_STALE_AFTER),
+                )
+                row = self._conn.execute(
+                    f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE key = ? AND status IN (?, ?)"
+                    " ORDER BY created_at LIMIT 1",
+                    (job["key"], *ACTIVE_STATUSES),
+                ).fetchone()
+                if row is not None:
+                    # Keep the stale jobs marked failed above
+                    self._conn.commit()
+                    return self._row_to_job(row)
+                self._conn.execute(
+                    f"INSERT INTO jobs ({', '.join(JOB_FIELDS)}) VALUES ({', '.join('?' * len(JOB_FIELDS))})",
+                    tuple(
+                        json.dumps(job[field]) if field in ("params", "result") and job[field] is not None
+                        else job[field]
+                        for field in JOB_FIELDS
+                    ),
+                )
+                self._conn.commit()
+                return None
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def update(self, job_id: str, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+            self._conn.commit()
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (*TERMINAL_STATUSES, finished_before)
+            )
+            self._conn.commit()
+            return max(cursor.rowcount, 0)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class JobQueue:
+    """
+    Runs long analyses in the background and keeps their status and results.
+
+    Jobs execute on the shared async runtime loop, at most `workers` at a
+    time. Submitting work identical to a queued or running job returns that
+    job instead of starting another.
+    """
+
+    def __init__(self, store, workers: int = JOB_WORKERS):
+        self.store = store
+        self.workers = max(1, workers)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._coalesced = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, params: Dict[str, Any], run: Callable[[], Coroutine],
+               token: Optional[str] = None) -> Tuple[dict, bool]:
+        """
+        Queue `run()` as a job, or join an identical active one.
+
+        Args:
+            kind: Job type, e.g. "analyze" or "batch"
+            params: Request parameters without secrets (stored with the job)
+            run: Factory for the coroutine doing the work; its result must be JSON-serializable
+            token: The caller's GitHub token, only used to keep different callers' jobs apart
+
+        Returns:
+            (job snapshot, True if an existing job was reused)
+        """
+        now = time.time()
+        self.store.purge(now - JOB_RESULT_TTL)
+        job = {field: None for field in JOB_FIELDS}
+        job.update({
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "key": job_key(kind, params, token),
+            "status": "queued",
+            "params": params,
+            "created_at": now,
+            "heartbeat_at": now,
+        })
+        existing = self.store.insert_unless_active(job)
+        if existing is not None:
+            with self._lock:
+                self._coalesced += 1
+            return public_job(existing), True
+
+        asyncio.run_coroutine_threadsafe(self._execute(job["id"], run), async_runtime.get_loop())
+        return public_job(job), False
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(JOB_STALE_AFTER / 4)
+            self.store.update(job_id, heartbeat_at=time.time())
+
+    async def _execute(self, job_id: str, run: Callable[[], Coroutine]):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        # Heartbeats start while the job waits for a worker slot: a queued job is alive too
+        heartbeat = asyncio.ensure_future(self._heartbeat(job_id))
+        span = None
+        try:
+            async with self._semaphore:
+                now = time.time()
+                self.store.update(job_id, status="running", started_at=now, heartbeat_at=now)
+                # A job outlives the HTTP request that queued it, so it is traced on its own
+                span = telemetry.open_span("job", job_id=job_id)
+                result = await run()
+                self.store.update(job_id, status="succeeded", result=result, finished_at=time.time())
+        except Exception as e:
+            if span is not None:
+                span.status = "error"
+                span.set(error=str(e))
+            telemetry.log_event(logger, "Job failed", logging.ERROR, job_id=job_id, error=str(e))
+            self.store.update(job_id, status="failed", error=str(e), finished_at=time.time())
+        except BaseException as e:
+            # Cancelled (shutdown, deadline): the job must not stay "running" forever
+            if span is not None:
+                span.status = "error"
+                span.set(error="cancelled")
+            telemetry.log_event(logger, "Job cancelled", logging.WARNING, job_id=job_id)
+            self.store.update(job_id, status="failed", error="Job was cancelled", finished_at=time.time())
+            raise
+        finally:
+            heartbeat.cancel()
+            if span is not None:
+                telemetry.close_span(span)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Current snapshot of a job, or None if it is unknown or expired."""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        now = time.time()
+        if is_stale(job, now):
+            # The worker holding it has gone away (e.g. the process was recycled)
+            job.update(status="failed", error=STALE_JOB_ERROR, finished_at=now)
+            self.store.update(job_id, status="failed", error=STALE_JOB_ERROR, finished_at=now)
+        return public_job(job)
+
+    async def watch(self, job_id: str) -> AsyncIterator[dict]:
+        """Yield the job's snapshot on every status change, ending once it has finished."""
+        last_status = None
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                yield {"id": job_id, "status": "failed", "error": "Job not found"}
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield job
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            coalesced = self._coalesced
+        return {
+            "backend": type(self.store).__name__,
+            "workers": self.workers,
+            "jobs": self.store.counts(),
+            "coalesced": coalesced,
+        }
+
+
+def public_job(job: dict) -> dict:
+    """The job fields returned to clients."""
+    return {field: job.get(field) for field in JOB_FIELDS if field not in ("key", "heartbeat_at")}
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def create_job_store(backend_name: str = JOB_BACKEND):
+    """Build the job store for the configured backend."""
+    backend_name = (backend_name or "memory").lower()
+    if backend_name == "memory":
+        return MemoryJobStore()
+    if backend_name == "sqlite":
+        return SQLiteJobStore()
+    raise ValueError(f"Unknown JOB_BACKEND: {backend_name}")
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, creating it on first use."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(create_job_store())
+    return _queue
+
+
+def _forget_queue_after_fork():
+    """Jobs run on the parent's loop; a forked worker starts its own queue."""
+    global _queue, _queue_lock
+    _queue = None
+    _queue_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_queue_after_fork)
+
+
+__all__ = [
+    'JobsUnavailable',
+    'MemoryJobStore',
+    'SQLiteJobStore',
+    'JobQueue',
+    'create_job_store',
+    'get_job_queue'
+]
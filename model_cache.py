@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from github_cache import MemoryCacheBackend, SQLiteCacheBackend
+import telemetry
+
+# Model-call cache settings, overridable from the environment
+MODEL_CACHE_BACKEND = os.getenv("MODEL_CACHE_BACKEND", "memory")  # memory | sqlite | tiered | none
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", "512"))
+MODEL_CACHE_TTL = float(os.getenv("MODEL_CACHE_TTL", str(24 * 3600)))
+MODEL_CACHE_PATH = os.getenv(
+    "MODEL_CACHE_PATH", os.path.join(tempfile.gettempdir(), "hirelens_model_cache.sqlite3")
+)
+
+# Only complete answers are reused; a truncated or filtered one is asked for again
+CACHEABLE_FINISH_REASONS = ("stop", "function_calls")
+
+MODEL_CACHE_LOOKUPS = telemetry.counter(
+    "hirelens_llm_cache_total", "Model-call cache lookups by result (hit/miss)", ("result",)
+)
+
+
+def model_call_key(model: str, messages: Sequence[dict], tools: Sequence[dict], temperature: Optional[float],
+                   **options: Any) -> str:
+    """
+    Cache key for a model call.
+
+    Covers everything that decides the completion: the model, the full
+    message list, the tool schemas offered and the sampling settings.
+    `options` holds the rest of the call (tool_choice, json_output, extra
+    create args), so a reflection call never shares a key with a tool turn.
+    """
+    payload = json.dumps({
+        "model": model,
+        "messages": list(messages),
+        "tools": list(tools),
+        "temperature": temperature,
+        "options": options,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ModelCache:
+    """
+    Completions by model_call_key, with a TTL on top of the backends' LRU eviction.
+
+    With two backends the first (memory) is consulted before the second
+    (disk): disk hits are copied into memory, and new completions are
+    written to both, so a restarted worker still finds earlier answers.
+    """
+
+    def __init__(self, backend, disk_backend=None, ttl: float = MODEL_CACHE_TTL):
+        self.backend = backend
+        self.disk_backend = disk_backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0,
+            "saved_prompt_tokens": 0, "saved_completion_tokens": 0,
+        }
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _fresh(self, backend, key: str) -> Optional[dict]:
+        entry = backend.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["stored_at"] >= self.ttl:
+            backend.delete(key)
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[dict]:
+        """The cached completion (a CreateResult dump), or None if missing or expired."""
+        entry = self._fresh(self.backend, key)
+        if entry is None and self.disk_backend is not None:
+            entry = self._fresh(self.disk_backend, key)
+            if entry is not None:
+                self._count("disk_hits")
+                self._count("evictions", self.backend.set(key, entry))
+        if entry is None:
+            self._count("misses")
+            MODEL_CACHE_LOOKUPS.inc(result="miss")
+            return None
+        value = json.loads(entry["body"])
+        usage = value.get("usage") or {}
+        self._count("hits")
+        MODEL_CACHE_LOOKUPS.inc(result="hit")
+        self._count("saved_prompt_tokens", usage.get("prompt_tokens") or 0)
+        self._count("saved_completion_tokens", usage.get("completion_tokens") or 0)
+        return value
+
+    def set(self, key: str, value: dict):
+        """Store a completion if it is a complete answer."""
+        if value.get("finish_reason") not in CACHEABLE_FINISH_REASONS:
+            return
+        entry = {"body": json.dumps(value, default=str).encode("utf-8"), "headers": {}, "stored_at": time.time()}
+        self._count("stores")
+        self._count("evictions", self.backend.set(key, entry))
+        if self.disk_backend is not None:
+            self._count("evictions", self.disk_backend.set(key, entry))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["backend"] = type(self.backend).__name__
+        stats["entries"] = len(self.backend)
+        if self.disk_backend is not None:
+            stats["disk_backend"] = type(self.disk_backend).__name__
+            stats["disk_entries"] = len(self.disk_backend)
+        stats["ttl"] = self.ttl
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def create_model_cache(backend_name: str = MODEL_CACHE_BACKEND) -> Optional[ModelCache]:
+    """Build a ModelCache for the configured backend, or None when caching is disabled."""
+    backend_name = (backend_name or "none").lower()
+    if backend_name == "memory":
+        return ModelCache(MemoryCacheBackend(max_entries=MODEL_CACHE_MAX_ENTRIES))
+    if backend_name == "sqlite":
+        return ModelCache(SQLiteCacheBackend(path=MODEL_CACHE_PATH, max_entries=MODEL_CACHE_MAX_ENTRIES))
+    if backend_name == "tiered":
+        return ModelCache(
+            MemoryCacheBackend(max_entries=MODEL_CACHE_MAX_ENTRIES),
+            SQLiteCacheBackend(path=MODEL_CACHE_PATH, max_entries=MODEL_CACHE_MAX_ENTRIES),
+        )
+    if backend_name in ("none", "off", "disabled"):
+        return None
+    raise ValueError(f"Unknown MODEL_CACHE_BACKEND: {backend_name}")
+
+
+def get_model_cache() -> Optional[ModelCache]:
+    """Return the process-wide model-call cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_model_cache() or False
+    return _cache or None
+
+
+def model_cache_stats() -> Dict[str, Any]:
+    """Counters for the process-wide model-call cache (empty when disabled or not used yet)."""
+    return _cache.stats() if _cache else {}
+
+
+def _forget_cache_after_fork():
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_cache_after_fork)
+
+
+__all__ = [
+    'model_call_key',
+    'ModelCache',
+    'create_model_cache',
+    'get_model_cache',
+    'model_cache_stats'
+]
@@ -0,0 +1,202 @@
+import os
+import random
+import threading
+import time
+from typing import Dict, Any, Mapping, Optional
+
+from github_http import token_fingerprint
+
+# Scheduler settings, overridable from the environment
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "100"))
+GITHUB_RETRY_ATTEMPTS = int(os.getenv("GITHUB_RETRY_ATTEMPTS", "3"))
+GITHUB_BACKOFF_BASE = float(os.getenv("GITHUB_BACKOFF_BASE", "0.5"))
+GITHUB_BACKOFF_MAX = float(os.getenv("GITHUB_BACKOFF_MAX", "30"))
+GITHUB_MAX_WAIT = float(os.getenv("GITHUB_MAX_WAIT", "60"))
+
+# GitHub asks clients to wait at least a minute after a secondary rate limit
+# response that carries no Retry-After header
+SECONDARY_LIMIT_WAIT = 60.0
+RETRYABLE_SERVER_ERRORS = (500, 502, 503, 504)
+
+
+class RateLimitWaitTooLong(Exception):
+    """Raised when honouring a token's rate limit would exceed GITHUB_MAX_WAIT."""
+
+
+class TokenBudget:
+    """Rate-limit state for one token, as last reported by GitHub."""
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until = 0.0
+        self.next_slot = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "resets_in": max(0.0, self.reset_at - now) if self.reset_at else None,
+            "blocked_for": max(0.0, self.blocked_until - now),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "retries": self.retries,
+        }
+
+
+class RateLimitScheduler:
+    """
+    Per-token GitHub request scheduler.
+
+    Tracks each token's budget from X-RateLimit-* headers. While plenty of
+    budget remains requests go straight through; once it drops below
+    GITHUB_RATE_LIMIT_RESERVE, requests are queued into evenly spaced slots
+    until the reset time. Secondary rate limits, 429s and 5xx responses are
+    retried with jittered exponential backoff (or Retry-After when given).
+    """
+
+    def __init__(self, reserve: int = GITHUB_RATE_LIMIT_RESERVE, retry_attempts: int = GITHUB_RETRY_ATTEMPTS,
+                 backoff_base: float = GITHUB_BACKOFF_BASE, backoff_max: float = GITHUB_BACKOFF_MAX,
+                 max_wait: float = GITHUB_MAX_WAIT):
+        self.reserve = reserve
+        self.retry_attempts = retry_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        self._budgets: Dict[str, TokenBudget] = {}
+        self._lock = threading.Lock()
+
+    def _budget(self, token: str, resource: str) -> TokenBudget:
+        # REST ("core") and GraphQL requests draw on separate budgets
+        key = f"{token_fingerprint(token)}:{resource}"
+        budget = self._budgets.get(key)
+        if budget is None:
+            budget = self._budgets[key] = TokenBudget()
+        return budget
+
+    def acquire(self, token: str, resource: str = "core") -> float:
+        """
+        Reserve a request slot for `token` and return how long to wait before sending.
+
+        Raises:
+            RateLimitWaitTooLong: If the wait would exceed the configured maximum
+        """
+        with self._lock:
+            budget = self._budget(token, resource)
+            now = time.time()
+            ready_at = now
+
+            if budget.blocked_until > now:
+                ready_at = budget.blocked_until
+            elif budget.remaining is not None and budget.reset_at is not None and budget.reset_at > now:
+                if budget.remaining <= 0:
+                    ready_at = budget.reset_at
+                elif budget.remaining < self.reserve:
+                    # Spread what is left evenly over the rest of the window
+                    interval = (budget.reset_at - now) / budget.remaining
+                    ready_at = max(now, budget.next_slot)
+                    budget.next_slot = ready_at + interval
+
+            wait = ready_at - now
+            if wait > self.max_wait:
+                raise RateLimitWaitTooLong(
+                    f"GitHub API rate limit exceeded; budget resets in {int(wait)} seconds."
+                )
+
+            # Count the request against the budget until the response corrects it
+            if budget.remaining is not None and budget.remaining > 0:
+                budget.remaining -= 1
+            budget.requests += 1
+            if wait > 0:
+                budget.throttled += 1
+            return max(0.0, wait)
+
+    def record(self, token: str, status_code: int, headers: Mapping[str, str], body: str = "",
+               resource: str = "core"):
+        """Update the token's budget from a response."""
+        with self._lock:
+            budget = self._budget(token, resource)
+            if headers.get("X-RateLimit-Limit"):
+                budget.limit = int(headers["X-RateLimit-Limit"])
+            if headers.get("X-RateLimit-Remaining"):
+                budget.remaining = int(headers["X-RateLimit-Remaining"])
+            if headers.get("X-RateLimit-Reset"):
+                reset_at = float(headers["X-RateLimit-Reset"])
+                if budget.reset_at != reset_at:
+                    budget.next_slot = 0.0
+                budget.reset_at = reset_at
+
+            block = self._limited_wait(status_code, headers, body)
+            if block is not None:
+                budget.blocked_until = max(budget.blocked_until, time.time() + block)
+
+    def _limited_wait(self, status_code: int, headers: Mapping[str, str], body: str) -> Optional[float]:
+        """Seconds GitHub asked us to back off for, or None if this is not a rate-limit response."""
+        if status_code not in (403, 429):
+            return None
+        if headers.get("Retry-After"):
+            try:
+                return max(0.0, float(headers["Retry-After"]))
+            except ValueError:
+                return SECONDARY_LIMIT_WAIT
+        if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+            return max(0.0, float(headers["X-RateLimit-Reset"]) - time.time())
+        if status_code == 429 or "secondary rate limit" in (body or "").lower():
+            return SECONDARY_LIMIT_WAIT
+        return None
+
+    def retry_delay(self, token: str, attempt: int, status_code: int, headers: Mapping[str, str],
+                    body: str = "", resource: str = "core") -> Optional[float]:
+        """
+        How long to wait before retrying a response, or None if it should not be retried.
+
+        `attempt` is the zero-based number of the attempt that produced the response.
+        """
+        if attempt >= self.retry_attempts:
+            return None
+
+        limited = self._limited_wait(status_code, headers, body)
+        if limited is not None:
+            delay = limited
+        elif status_code in RETRYABLE_SERVER_ERRORS:
+            # Full jitter keeps concurrent retries from arriving in lockstep
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        else:
+            return None
+
+        if delay > self.max_wait:
+            return None
+        with self._lock:
+            self._budget(token, resource).retries += 1
+        return delay
+
+    def budgets(self) -> Dict[str, Dict[str, Any]]:
+        """Current budget per token fingerprint and resource (tokens themselves are never exposed)."""
+        with self._lock:
+            return {key: budget.to_dict() for key, budget in self._budgets.items()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """Return the process-wide scheduler, creating it on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RateLimitScheduler()
+    return _scheduler
+
+
+__all__ = [
+    'RateLimitWaitTooLong',
+    'RateLimitScheduler',
+    'get_scheduler'
+]
@@ -0,0 +1,195 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from author_identity import normalize_author
+from github_cache import MemoryCacheBackend, SQLiteCacheBackend
+
+# Final-result cache settings, overridable from the environment
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")  # memory | sqlite | none
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+# Upper bound on an entry's age even if the branch head never moves
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+RESULT_CACHE_PATH = os.getenv(
+    "RESULT_CACHE_PATH", os.path.join(tempfile.gettempdir(), "hirelens_result_cache.sqlite3")
+)
+
+
+class _Abandoned(Exception):
+    """Set on an in-flight computation whose leading caller was cancelled; waiters retry."""
+
+
+def result_key(owner: str, project: str, head_sha: str, author: str, prompt_version: str,
+               **options: Any) -> str:
+    """
+    Cache key for an analysis result.
+
+    The branch head SHA pins the exact history that was analyzed, so a key
+    never goes stale: once the branch moves, requests look up a new key.
+    `options` holds anything else that changes the output (e.g. narrative).
+    """
+    payload = json.dumps({
+        "owner": owner.lower(),
+        "project": project.lower(),
+        "head": head_sha,
+        "author": normalize_author(author),
+        "prompt_version": prompt_version,
+        "options": options,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Whole-result cache with single-flight computation.
+
+    A hit is served from the backend. On a miss, the first caller computes
+    the value while concurrent callers with the same key wait for that one
+    computation, whichever thread or event loop they run on.
+    """
+
+    def __init__(self, backend, ttl: float = RESULT_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._counters = {"hits": 0, "misses": 0, "coalesced": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None if missing or expired."""
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["stored_at"] >= self.ttl:
+            self.backend.delete(key)
+            return None
+        return json.loads(entry["body"])
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value."""
+        entry = {"body": json.dumps(value).encode("utf-8"), "headers": {}, "stored_at": time.time()}
+        self._count("stores")
+        self._count("evictions", self.backend.set(key, entry))
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for `key`, computing and storing it on a miss.
+
+        Errors are not cached; they are raised to the caller that computed
+        and to every caller that was waiting on it. If the computing caller
+        is cancelled (client gone, job cancelled, timeout), a waiting caller
+        takes over and computes the value itself.
+        """
+        while True:
+            value = self.get(key)
+            if value is not None:
+                self._count("hits")
+                return value
+
+            with self._lock:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._inflight[key] = concurrent.futures.Future()
+            if not leader:
+                self._count("coalesced")
+                try:
+                    # Shielded: a cancelled waiter must not cancel the shared computation
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except _Abandoned:
+                    continue
+
+            self._count("misses")
+            try:
+                value = await compute()
+                self.set(key, value)
+            except Exception as e:
+                self._count("errors")
+                self._settle(key, future, error=e)
+                raise
+            except BaseException:
+                self._settle(key, future, error=_Abandoned())
+                raise
+            self._settle(key, future, value=value)
+            return value
+
+    def _settle(self, key: str, future: concurrent.futures.Future, value: Any = None,
+                error: Optional[BaseException] = None):
+        """Retire the in-flight entry, then wake its waiters (so a retrying waiter can lead)."""
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._inflight)
+        stats["backend"] = type(self.backend).__name__
+        stats["entries"] = len(self.backend)
+        stats["ttl"] = self.ttl
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def create_result_cache(backend_name: str = RESULT_CACHE_BACKEND) -> Optional[ResultCache]:
+    """Build a ResultCache for the configured backend, or None when caching is disabled."""
+    backend_name = (backend_name or "none").lower()
+    if backend_name == "memory":
+        return ResultCache(MemoryCacheBackend(max_entries=RESULT_CACHE_MAX_ENTRIES))
+    if backend_name == "sqlite":
+        return ResultCache(SQLiteCacheBackend(path=RESULT_CACHE_PATH, max_entries=RESULT_CACHE_MAX_ENTRIES))
+    if backend_name in ("none", "off", "disabled"):
+        return None
+    raise ValueError(f"Unknown RESULT_CACHE_BACKEND: {backend_name}")
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the process-wide result cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_result_cache() or False
+    return _cache or None
+
+
+def result_cache_stats() -> Dict[str, Any]:
+    """Counters for the process-wide result cache (empty when disabled)."""
+    cache = get_result_cache()
+    return cache.stats() if cache else {}
+
+
+def _forget_cache_after_fork():
+    """In-flight computations belong to the parent; a forked worker starts clean."""
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_cache_after_fork)
+
+
+__all__ = [
+    'result_key',
+    'ResultCache',
+    'create_result_cache',
+    'get_result_cache',
+    'result_cache_stats'
+]
@@ -0,0 +1,393 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import git_mirror
+from author_identity import IdentityResolver
+from contribution import (
+    GITHUB_COMMITS_BACKEND,
+    CommitAggregator,
+    analyze_contribution_async,
+    commit_iterators,
+    contribution_result
+)
+from githubmcp import iter_commits_between, make_github_response
+from githubmcp_async import iter_commits_between_async, make_github_response_async
+
+# Author-stats index settings, overridable from the environment
+STATS_INDEX_ENABLED = os.getenv("STATS_INDEX_ENABLED", "true").lower() not in ("0", "false", "no", "off")
+STATS_INDEX_PATH = os.getenv(
+    "STATS_INDEX_PATH", os.path.join(tempfile.gettempdir(), "hirelens_stats_index.sqlite3")
+)
+
+
+class StatsIndex:
+    """
+    Per-(owner, repo, branch) author commit counts and line totals on disk.
+
+    Each row set is tagged with the head SHA it was computed at, so a later
+    analysis only has to count the commits that head has gained since.
+    """
+
+    def __init__(self, path: str = STATS_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "incremental": 0, "rebuilds": 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS repos ("
+            " owner TEXT NOT NULL,"
+            " repo TEXT NOT NULL,"
+            " branch TEXT NOT NULL,"
+            " head_sha TEXT NOT NULL,"
+            " total_commits INTEGER NOT NULL,"
+            " newest_date TEXT,"
+            " oldest_date TEXT,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (owner, repo, branch))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS authors ("
+            " owner TEXT NOT NULL,"
+            " repo TEXT NOT NULL,"
+            " branch TEXT NOT NULL,"
+            " author_key TEXT NOT NULL,"
+            " author_name TEXT NOT NULL,"
+            " commits INTEGER NOT NULL,"
+            " additions INTEGER NOT NULL,"
+            " deletions INTEGER NOT NULL,"
+            " PRIMARY KEY (owner, repo, branch, author_key))"
+        )
+        # Login/email aliases seen for each author, so identities survive a reload
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS author_aliases ("
+            " owner TEXT NOT NULL,"
+            " repo TEXT NOT NULL,"
+            " branch TEXT NOT NULL,"
+            " alias TEXT NOT NULL,"
+            " author_key TEXT NOT NULL,"
+            " PRIMARY KEY (owner, repo, branch, alias, author_key))"
+        )
+        self._conn.commit()
+
+    def record(self, outcome: str):
+        """Count how an analysis was served: "hits", "incremental" or "rebuilds"."""
+        with self._lock:
+            self._counters[outcome] += 1
+
+    def load(self, owner: str, repo: str, branch: str) -> Optional[Dict[str, Any]]:
+        """Return {"head_sha", "aggregator"} for an indexed branch, or None."""
+        key = (owner.lower(), repo.lower(), branch)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT head_sha, total_commits, newest_date, oldest_date FROM repos"
+                " WHERE owner = ? AND repo = ? AND branch = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            authors = self._conn.execute(
+                "SELECT author_key, author_name, commits, additions, deletions FROM authors"
+                " WHERE owner = ? AND repo = ? AND branch = ?", key
+            ).fetchall()
+            links = self._conn.execute(
+                "SELECT alias, author_key FROM author_aliases WHERE owner = ? AND repo = ? AND branch = ?", key
+            ).fetchall()
+
+        aggregator = CommitAggregator()
+        aggregator.total_commits = row[1]
+        aggregator.newest_date = row[2]
+        aggregator.oldest_date = row[3]
+        for author_key, author_name, commits, additions, deletions in authors:
+            aggregator.commits_by_author[author_key] = commits
+            aggregator.author_names[author_key] = author_name
+            if additions or deletions:
+                aggregator.additions_by_author[author_key] = additions
+                aggregator.deletions_by_author[author_key] = deletions
+        aggregator.identities = IdentityResolver.from_links(aggregator.commits_by_author, links)
+        return {"head_sha": row[0], "aggregator": aggregator}
+
+    def save(self, owner: str, repo: str, branch: str, head_sha: str, aggregator: CommitAggregator,
+             expected_head: Optional[str] = None) -> bool:
+        """
+        Store the aggregate for `head_sha`, replacing the branch's previous rows.
+
+        With `expected_head`, the write only happens if the stored head is still
+        that SHA, so a concurrent update of the same branch is never overwritten
+        with an older result. Returns whether the index was written.
+        """
+        key = (owner.lower(), repo.lower(), branch)
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                row = self._conn.execute(
+                    "SELECT head_sha FROM repos WHERE owner = ? AND repo = ? AND branch = ?", key
+                ).fetchone()
+                if expected_head is not None and (row is None or row[0] != expected_head):
+                    self._conn.rollback()
+                    return False
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO repos"
+                    " (owner, repo, branch, head_sha, total_commits, newest_date, oldest_date, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*key, head_sha, aggregator.total_commits, aggregator.newest_date, aggregator.oldest_date,
+                     time.time()),
+                )
+                self._conn.execute("DELETE FROM authors WHERE owner = ? AND repo = ? AND branch = ?", key)
+                self._conn.executemany(
+                    "INSERT INTO authors"
+                    " (owner, repo, branch, author_key, author_name, commits, additions, deletions)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (*key, author_key, aggregator.author_names[author_key], commits,
+                         aggregator.additions_by_author.get(author_key, 0),
+                         aggregator.deletions_by_author.get(author_key, 0))
+                        for author_key, commits in aggregator.commits_by_author.items()
+                    ],
+                )
+                self._conn.execute("DELETE FROM author_aliases WHERE owner = ? AND repo = ? AND branch = ?", key)
+                self._conn.executemany(
+                    "INSERT INTO author_aliases (owner, repo, branch, alias, author_key) VALUES (?, ?, ?, ?, ?)",
+                    [(*key, alias, author_key) for alias, author_key in aggregator.identities.links],
+                )
+                self._conn.commit()
+                return True
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["repos"] = self._conn.execute("SELECT COUNT(*) FROM repos").fetchone()[0]
+        return stats
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_stats_index() -> Optional[StatsIndex]:
+    """Return the process-wide stats index, or None when it is disabled."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = StatsIndex() if STATS_INDEX_ENABLED else False
+    return _index or None
+
+
+def index_stats() -> Dict[str, Any]:
+    """Counters for the process-wide stats index (empty when disabled)."""
+    index = get_stats_index()
+    return index.stats() if index else {}
+
+
+def _update(index: StatsIndex, owner: str, project: str, branch: str, head: str, record: Optional[dict],
+            delta: Optional[CommitAggregator], rebuilt: Optional[CommitAggregator]) -> CommitAggregator:
+    """Apply either a delta on top of the indexed record or a full rebuild, and persist it."""
+    if delta is not None:
+        aggregator = record["aggregator"].merge(delta)
+        index.save(owner, project, branch, head, aggregator, expected_head=record["head_sha"])
+        index.record("incremental")
+    else:
+        aggregator = rebuilt
+        index.save(owner, project, branch, head, aggregator)
+        index.record("rebuilds")
+    return aggregator
+
+
+def store_rebuilt(owner: str, project: str, branch: str, head: str,
+                  aggregator: CommitAggregator) -> CommitAggregator:
+    """Index a full-history aggregate counted elsewhere (e.g. a batched GraphQL fetch) from `head`."""
+    index = get_stats_index()
+    if index is None:
+        return aggregator
+    return _update(index, owner, project, branch, head, None, None, aggregator)
+
+
+def branch_head(owner: str, project: str, branch: str = "main", token: str = None) -> str:
+    """
+    Current head SHA of a branch.
+
+    A conditional request to GitHub that always reaches GitHub (a cached
+    response is revalidated, never served as fresh, so a branch that just
+    moved is seen at once), or a read of the local mirror (fetched at most
+    every GIT_FETCH_INTERVAL seconds) for the git backend.
+    """
+    if GITHUB_COMMITS_BACKEND.lower() == "git":
+        return git_mirror.get_mirror(owner, project, token).head_sha(branch)
+    try:
+        response = make_github_response(f"repos/{owner}/{project}/commits/{branch}", token=token, revalidate=True)
+        return response.json()["sha"]
+    except Exception as e:
+        raise Exception(f"Failed to get latest commit: {str(e)}")
+
+
+async def branch_head_async(owner: str, project: str, branch: str = "main", token: str = None) -> str:
+    """Async counterpart of branch_head."""
+    if GITHUB_COMMITS_BACKEND.lower() == "git":
+        mirror = await git_mirror.get_mirror_async(owner, project, token)
+        return await asyncio.to_thread(mirror.head_sha, branch)
+    try:
+        response = await make_github_response_async(f"repos/{owner}/{project}/commits/{branch}", token=token,
+                                                     revalidate=True)
+        return response.json()["sha"]
+    except Exception as e:
+        raise Exception(f"Failed to get latest commit: {str(e)}")
+
+
+def indexed_aggregator(owner: str, project: str, branch: str = "main", token: str = None,
+                       head: Optional[str] = None) -> CommitAggregator:
+    """
+    Full-history commit aggregate for a branch, served from the index where possible.
+
+    The branch head is checked first (a conditional request, or a local fetch
+    for the git backend) unless the caller already resolved it. An unchanged
+    head is answered straight from the index; a head that moved forward only
+    counts the new commits; anything else (first analysis, force push) counts
+    the whole history again.
+    """
+    index = get_stats_index()
+    iterate, _ = commit_iterators()
+
+    if GITHUB_COMMITS_BACKEND.lower() == "git":
+        mirror = git_mirror.get_mirror(owner, project, token)
+        head = head or mirror.head_sha(branch)
+    else:
+        mirror = None
+        head = head or branch_head(owner, project, branch, token=token)
+
+    record = index.load(owner, project, branch)
+    if record is not None and record["head_sha"] == head:
+        index.record("hits")
+        return record["aggregator"]
+
+    delta = rebuilt = None
+    if record is not None:
+        if mirror is not None:
+            new_commits = mirror.iter_commits_between(record["head_sha"], head)
+        else:
+            try:
+                new_commits = iter_commits_between(owner, project, record["head_sha"], head, token=token)
+            except Exception:
+                # The old head can be gone entirely after a force push
+                new_commits = None
+        if new_commits is not None:
+            delta = CommitAggregator().consume(new_commits)
+    if delta is None:
+        # Count from the head SHA itself, so the stored head matches what was counted
+        rebuilt = CommitAggregator().consume(iterate(owner, project, branch=head, token=token))
+
+    return _update(index, owner, project, branch, head, record, delta, rebuilt)
+
+
+async def indexed_aggregator_async(owner: str, project: str, branch: str = "main",
+                                   token: str = None, head: Optional[str] = None) -> CommitAggregator:
+    """Async counterpart of indexed_aggregator."""
+    index = get_stats_index()
+    _, iterate = commit_iterators()
+
+    if GITHUB_COMMITS_BACKEND.lower() == "git":
+        mirror = await git_mirror.get_mirror_async(owner, project, token)
+        head = head or await asyncio.to_thread(mirror.head_sha, branch)
+    else:
+        mirror = None
+        head = head or await branch_head_async(owner, project, branch, token=token)
+
+    record = index.load(owner, project, branch)
+    if record is not None and record["head_sha"] == head:
+        index.record("hits")
+        return record["aggregator"]
+
+    delta = rebuilt = None
+    if record is not None:
+        if mirror is not None:
+            # Both the ancestry check and the history walk run git: keep them off the event loop
+            new_commits = await asyncio.to_thread(mirror.iter_commits_between, record["head_sha"], head)
+            if new_commits is not None:
+                delta = await asyncio.to_thread(CommitAggregator().consume, new_commits)
+        else:
+            try:
+                new_commits = await iter_commits_between_async(owner, project, record["head_sha"], head, token=token)
+            except Exception:
+                new_commits = None
+            if new_commits is not None:
+                delta = CommitAggregator()
+                async for commit in new_commits:
+                    delta.add(commit)
+    if delta is None:
+        rebuilt = CommitAggregator()
+        async for commit in iterate(owner, project, branch=head, token=token):
+            rebuilt.add(commit)
+
+    return _update(index, owner, project, branch, head, record, delta, rebuilt)
+
+
+def indexed_contribution(owner: str, project: str, author: str, branch: str = "main",
+                         token: str = None) -> dict:
+    """
+    Full-history contribution stats via indexed_aggregator.
+
+    Returns:
+        Dictionary with the computed stats and the formatted report, as analyze_contribution
+    """
+    return contribution_result(project, author, indexed_aggregator(owner, project, branch, token))
+
+
+async def indexed_contribution_async(owner: str, project: str, author: str, branch: str = "main",
+                                     token: str = None) -> dict:
+    """Async counterpart of indexed_contribution."""
+    return contribution_result(project, author, await indexed_aggregator_async(owner, project, branch, token))
+
+
+async def get_author_contribution(owner: str, repo: str, author: str, branch: str = "main",
+                                  token: str = None) -> dict:
+    """
+    Get an author's commit count and contribution rating for a repository.
+
+    Counts are computed from the full history (served from the stats index
+    when enabled). The author may be given by GitHub login, email or any name
+    they commit under; all of their variants are counted together.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        author: Author login, email or name
+        branch: Branch name (default: main)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        Dictionary with total_commits, author_commits, matched_names, percentage and rating
+    """
+    try:
+        if get_stats_index() is not None:
+            contribution = await indexed_contribution_async(owner, repo, author, branch=branch, token=token)
+        else:
+            contribution = await analyze_contribution_async(owner, repo, author, branch=branch, token=token)
+        return contribution["stats"]
+    except Exception as e:
+        raise Exception(f"Failed to get author contribution: {str(e)}")
+
+
+__all__ = [
+    'StatsIndex',
+    'get_stats_index',
+    'index_stats',
+    'store_rebuilt',
+    'branch_head',
+    'branch_head_async',
+    'indexed_aggregator',
+    'indexed_aggregator_async',
+    'indexed_contribution',
+    'indexed_contribution_async',
+    'get_author_contribution'
+]
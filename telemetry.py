@@ -0,0 +1,515 @@
+"""
+Tracing spans, structured logs and Prometheus metrics.
+
+Every request runs under a root span (opened by the HTTP middleware or a
+background job); the stages beneath it (agent build, agent run, each model
+call, each tool call, each GitHub request) open child spans. A span's
+duration feeds the `hirelens_span_duration_seconds` histogram and is logged
+at DEBUG level; when the root span ends, one INFO log line carries the
+request's per-stage latency breakdown.
+
+Metrics are kept per process and served in the Prometheus text format by
+/metrics. Logs go to stderr as JSON lines (LOG_FORMAT=json) or plain text.
+"""
+import bisect
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+# Logging settings, overridable from the environment
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Path segments that are ids (job ids, SHAs) rather than part of a route
+ID_SEGMENT_RE = re.compile(r"^[0-9a-f]{16,}$", re.IGNORECASE)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and the record's fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with the record's fields appended as key=value pairs."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", {})
+        if fields:
+            line += " " + " ".join(f"{name}={json.dumps(value, default=str)}" for name, value in fields.items())
+        return line
+
+
+_logging_configured = False
+_logging_lock = threading.Lock()
+
+
+def configure_logging():
+    """Attach the stderr handler to the "hirelens" logger once per process."""
+    global _logging_configured
+    if _logging_configured:
+        return
+    with _logging_lock:
+        if _logging_configured:
+            return
+        logger = logging.getLogger("hirelens")
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(TextFormatter() if LOG_FORMAT.lower() == "text" else JsonFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
+        _logging_configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for a module, under the configured "hirelens" logger."""
+    configure_logging()
+    return logging.getLogger(f"hirelens.{name}")
+
+
+def log_event(logger: logging.Logger, message: str, level: int = logging.INFO, exc_info: bool = False,
+              **fields: Any):
+    """Log a message with structured fields, tagged with the current trace and span."""
+    if not logger.isEnabledFor(level):
+        return
+    current = _current_span.get()
+    if current is not None:
+        fields.setdefault("trace_id", current.trace_id)
+        fields.setdefault("span_id", current.span_id)
+    logger.log(level, message, exc_info=exc_info, extra={"fields": fields})
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, as Prometheus expects."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> Iterator[str]:
+        with self._lock:
+            values = {key: [list(state[0]), state[1], state[2]] for key, state in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {count}"
+
+
+class MetricsRegistry:
+    """The process's metrics, rendered together for /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labels)
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labels, buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+    """Get or create a counter in the process registry."""
+    return _registry.counter(name, documentation, labels)
+
+
+def histogram(name: str, documentation: str, labels: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """Get or create a histogram in the process registry."""
+    return _registry.histogram(name, documentation, labels, buckets)
+
+
+def render_metrics() -> str:
+    """All metrics of this process in the Prometheus text exposition format."""
+    return _registry.render()
+
+
+SPAN_DURATION = histogram("hirelens_span_duration_seconds", "Duration of traced stages", ("span",))
+HTTP_DURATION = histogram(
+    "hirelens_http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+GITHUB_REQUESTS = counter(
+    "hirelens_github_requests_total", "GitHub API requests by endpoint, status and cache outcome",
+    ("endpoint", "status", "cache")
+)
+GITHUB_BYTES = counter("hirelens_github_response_bytes_total", "GitHub response body bytes", ("endpoint",))
+GITHUB_DURATION = histogram("hirelens_github_request_duration_seconds", "GitHub API request latency", ("endpoint",))
+LLM_TOKENS = counter("hirelens_llm_tokens_total", "Model tokens by kind (prompt/completion)", ("model", "kind"))
+LLM_DURATION = histogram(
+    "hirelens_llm_call_duration_seconds", "Model call latency by phase (turn/reflection)", ("model", "phase")
+)
+TOOL_CALLS = counter("hirelens_tool_calls_total", "Agent tool calls by tool and status", ("tool", "status"))
+
+
+_logger = get_logger("trace")
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed stage of a request, with attributes describing it."""
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.root = parent.root if parent is not None else self
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        # Filled on the root span only: span name -> [count, seconds]
+        self.breakdown: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._reset = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def _add_to_breakdown(self, name: str, seconds: float):
+        with self._lock:
+            entry = self.breakdown.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+
+def open_span(name: str, **attributes: Any) -> Span:
+    """Start a span as a child of the current one (or a new trace) and make it current."""
+    span = Span(name, _current_span.get(), attributes)
+    span._reset = _current_span.set(span)
+    return span
+
+
+def close_span(span: Span, error: Optional[BaseException] = None):
+    """End a span started with open_span: record its metrics, log it and restore the previous span."""
+    if span.end is not None:
+        return
+    span.end = time.perf_counter()
+    if error is not None:
+        span.status = "error"
+        span.attributes.setdefault("error", str(error)[:300] or type(error).__name__)
+    try:
+        _current_span.reset(span._reset)
+    except ValueError:
+        # Closed from another context (e.g. an abandoned async generator being finalized)
+        pass
+
+    SPAN_DURATION.observe(span.duration, span=span.name)
+    fields = dict(span.attributes, duration_ms=round(span.duration * 1000, 2), status=span.status,
+                  trace_id=span.trace_id, span_id=span.span_id)
+    log_event(
+        _logger, "span", logging.DEBUG, span=span.name,
+        parent_id=span.parent.span_id if span.parent else None, **fields
+    )
+    if span.root is not span:
+        span.root._add_to_breakdown(span.name, span.duration)
+    else:
+        with span._lock:
+            breakdown = {
+                name: {"count": count, "ms": round(seconds * 1000, 2)}
+                for name, (count, seconds) in sorted(span.breakdown.items(), key=lambda item: -item[1][1])
+            }
+        log_event(_logger, f"{span.name} finished", logging.INFO, breakdown=breakdown, **fields)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+    Trace the enclosed block as a stage of the current request.
+
+    Yields:
+        The Span, whose set() adds attributes (status codes, sizes, ...) as they become known
+    """
+    current = open_span(name, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        close_span(current, e)
+        raise
+    close_span(current)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def endpoint_label(url: str) -> str:
+    """GitHub endpoint template for metric labels, e.g. "repos/:owner/:repo/commits/:ref"."""
+    parts = [part for part in urlparse(url).path.split("/") if part]
+    if parts and parts[0] == "api":
+        # GitHub Enterprise serves the API under /api/v3
+        parts = parts[2:] if len(parts) > 1 and parts[1] == "v3" else parts[1:]
+    if len(parts) >= 3 and parts[0] == "repos":
+        parts[1:3] = [":owner", ":repo"]
+        if len(parts) >= 5:
+            placeholder = {"contents": ":path", "compare": ":basehead"}.get(parts[3], ":ref")
+            parts[4:] = [placeholder]
+    return "/".join(parts) or "/"
+
+
+def route_label(path: str) -> str:
+    """Request path with id segments replaced, so each route is one metric series."""
+    return "/".join(":id" if ID_SEGMENT_RE.match(part) else part for part in path.split("/")) or "/"
+
+
+@contextlib.contextmanager
+def github_span(method: str, url: str) -> Iterator[Span]:
+    """
+    Trace one GitHub API call.
+
+    The caller sets status_code, bytes and cache ("hit", "revalidated", "miss",
+    "bypass") on the yielded span; they are logged and counted per endpoint.
+    """
+    endpoint = endpoint_label(url)
+    with span("github.request", method=method.upper(), endpoint=endpoint, url=url) as current:
+        try:
+            yield current
+        finally:
+            GITHUB_REQUESTS.inc(
+                endpoint=endpoint, status=current.attributes.get("status_code", "error"),
+                cache=current.attributes.get("cache", "none")
+            )
+            GITHUB_BYTES.inc(current.attributes.get("bytes", 0), endpoint=endpoint)
+            GITHUB_DURATION.observe(current.duration, endpoint=endpoint)
+
+
+def record_llm_usage(current: Span, model: str, phase: str, usage: Any):
+    """Attach a model call's token usage to its span and count it."""
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    current.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+    LLM_DURATION.observe(current.duration, model=model, phase=phase)
+
+
+def traced_tool(func: Callable, name: Optional[str] = None) -> Callable:
+    """Wrap an async agent tool so each call is a "tool.<name>" span and is counted."""
+    tool_name = name or func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        status = "error"
+        try:
+            with span(f"tool.{tool_name}", tool=tool_name) as current:
+                result = await func(*args, **kwargs)
+                current.set(result_bytes=len(json.dumps(result, default=str)))
+                status = "ok"
+                return result
+        finally:
+            TOOL_CALLS.inc(tool=tool_name, status=status)
+
+    return wrapper
+
+
+class ASGITelemetryMiddleware:
+    """Root span and latency histogram for every HTTP request of an ASGI app."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route = route_label(scope["path"])
+        current = open_span("http.request", method=scope["method"], route=route)
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            current.set(status_code=status["code"])
+            close_span(current, e)
+            HTTP_DURATION.observe(current.duration, method=scope["method"], route=route, status=status["code"])
+            raise
+        current.set(status_code=status["code"])
+        close_span(current)
+        HTTP_DURATION.observe(current.duration, method=scope["method"], route=route, status=status["code"])
+
+
+class WSGITelemetryMiddleware:
+    """Root span and latency histogram for every HTTP request of a WSGI app (ends when the body is sent)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        method = environ.get("REQUEST_METHOD", "GET")
+        route = route_label(environ.get("PATH_INFO", "/"))
+        current = open_span("http.request", method=method, route=route)
+        status = {"code": 500}
+
+        def start_response_with_status(status_line, headers, exc_info=None):
+            status["code"] = int(status_line.split(" ", 1)[0])
+            return start_response(status_line, headers, exc_info)
+
+        def finish(error=None):
+            current.set(status_code=status["code"])
+            close_span(current, error)
+            HTTP_DURATION.observe(current.duration, method=method, route=route, status=status["code"])
+
+        try:
+            body = self.app(environ, start_response_with_status)
+        except BaseException as e:
+            finish(e)
+            raise
+        return _ClosingBody(body, finish)
+
+
+class _ClosingBody:
+    """WSGI body wrapper calling `on_close` once the server is done with it (streams included)."""
+
+    def __init__(self, body, on_close):
+        self._body = body
+        self._on_close = on_close
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self):
+        try:
+            if hasattr(self._body, "close"):
+                self._body.close()
+        finally:
+            self._on_close()
+
+
+__all__ = [
+    'configure_logging',
+    'get_logger',
+    'log_event',
+    'counter',
+    'histogram',
+    'render_metrics',
+    'METRICS_CONTENT_TYPE',
+    'Span',
+    'span',
+    'open_span',
+    'close_span',
+    'current_span',
+    'github_span',
+    'record_llm_usage',
+    'traced_tool',
+    'ASGITelemetryMiddleware',
+    'WSGITelemetryMiddleware'
+]
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# Tests talk to local stand-ins only; shared caches would carry state between them
+os.environ.setdefault("GITHUB_CACHE_BACKEND", "none")
+os.environ.setdefault("MODEL_CACHE_BACKEND", "none")
+os.environ.setdefault("RESULT_CACHE_BACKEND", "none")
+os.environ.setdefault("DIFF_CACHE_DIR", "")
+
+from github_stub import GitHubStub  # noqa: E402
+
+STUB_REPOS = {"tiny": 3, "small": 57, "large": 250}
+STUB_AUTHORS = ("Alice", "Bob", "Carol", "Dave", "Alice Smith")
+
+
+@pytest.fixture(scope="session")
+def github_stub():
+    stub = GitHubStub(STUB_REPOS, authors=STUB_AUTHORS)
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def github_api(github_stub, monkeypatch):
+    """Point the REST and GraphQL clients at the stub."""
+    import githubmcp
+    import github_graphql
+    monkeypatch.setattr(githubmcp, "GITHUB_API_BASE", github_stub.base_url)
+    monkeypatch.setattr(github_graphql, "GITHUB_GRAPHQL_URL", github_stub.base_url + "/graphql")
+    return github_stub
@@ -0,0 +1,64 @@
+from author_identity import IdentityResolver, compact_name, noreply_login
+
+
+def resolver(*commits) -> IdentityResolver:
+    resolver = IdentityResolver()
+    for name, email, login in commits:
+        resolver.add_commit({"author": name, "email": email, "login": login}, " ".join(name.split()).casefold())
+    return resolver
+
+
+def test_noreply_login_and_compact_name():
+    assert noreply_login("12345+Alice@users.noreply.github.com") == "alice"
+    assert noreply_login("alice@users.noreply.github.com") == "alice"
+    assert noreply_login("alice@example.com") is None
+    assert compact_name("Alice Smith") == compact_name("alice.smith") == "alicesmith"
+
+
+def test_aliases_join_transitively():
+    identities = resolver(
+        ("Alice Smith", "alice@example.com", None),
+        ("asmith", "alice@example.com", "alice"),
+        ("Ally", "12345+alice@users.noreply.github.com", None),
+        ("Bob", "bob@example.com", "bob"),
+    )
+
+    alice = {"alice smith", "asmith", "ally"}
+    assert identities.author_keys("alice") == alice
+    assert identities.author_keys("@Alice") == alice
+    assert identities.author_keys("ALICE@example.com") == alice
+    assert identities.author_keys("alice.smith") == alice
+    assert identities.author_keys("bob") == {"bob"}
+    assert identities.author_keys("Carol") == set()
+    assert len(identities.identities()) == 2
+
+
+def test_shared_emails_do_not_merge_authors():
+    identities = resolver(
+        ("Alice", "noreply@github.com", None),
+        ("Bob", "noreply@github.com", None),
+    )
+
+    assert identities.author_keys("Alice") == {"alice"}
+    assert identities.author_keys("noreply@github.com") == set()
+
+
+def test_login_wins_over_a_matching_display_name():
+    identities = resolver(
+        ("Alice Jones", None, "alice"),
+        ("alice", "alice@laptop.local", None),
+    )
+
+    assert identities.author_keys("alice") == {"alice jones"}
+    assert identities.author_keys("alice@laptop.local") == {"alice"}
+
+
+def test_merge_and_rebuild_from_links():
+    first = resolver(("Alice", "alice@example.com", None))
+    second = resolver(("A. Lice", "alice@example.com", "alice"), ("Bob", None, None))
+
+    merged = first.merge(second)
+    rebuilt = IdentityResolver.from_links(["alice", "a. lice", "bob"], merged.links)
+
+    assert merged.author_keys("alice") == rebuilt.author_keys("alice") == {"alice", "a. lice"}
+    assert rebuilt.author_keys("Bob") == {"bob"}
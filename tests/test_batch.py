@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+import analysis
+import stats_index
+
+TOKEN = "test-token"
+REPOS = ("tiny", "small", "large")
+
+
+def batch_jobs(**fields):
+    return [
+        analysis.parse_analysis_request(dict(
+            {"owner": "bench", "project": repo, "author": "alice", "github_token": TOKEN}, **fields
+        ))
+        for repo in REPOS
+    ]
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = stats_index.StatsIndex(str(tmp_path / "index.sqlite3"))
+    monkeypatch.setattr(stats_index, "get_stats_index", lambda: index)
+    return index
+
+
+def run_batch(github_api, monkeypatch, backend, jobs):
+    monkeypatch.setattr(analysis, "GITHUB_COMMITS_BACKEND", backend)
+    before = github_api.request_count
+    result = asyncio.run(analysis.analyze_batch(jobs))
+    return result, github_api.request_count - before
+
+
+@pytest.mark.parametrize("fields", [{"max_commits": 120}, {}])
+def test_graphql_batch_matches_rest(github_api, monkeypatch, index, fields):
+    rest, _ = run_batch(github_api, monkeypatch, "rest", batch_jobs(**fields))
+    # Start the GraphQL run cold, as the REST run did
+    with index._conn:
+        index._conn.execute("DELETE FROM repos")
+    graphql, _ = run_batch(github_api, monkeypatch, "graphql", batch_jobs(**fields))
+
+    assert all(item["success"] for item in graphql["results"])
+    assert graphql["results"] == rest["results"]
+    assert graphql["profile"] == rest["profile"]
+
+
+def test_graphql_batch_shares_queries(github_api, monkeypatch, index):
+    _, requests = run_batch(github_api, monkeypatch, "graphql", batch_jobs(max_commits=120))
+
+    # One query per page of the longest history, shared by all three repositories
+    assert requests == 2
+
+
+def test_graphql_batch_indexes_cold_repositories(github_api, monkeypatch, index):
+    run_batch(github_api, monkeypatch, "graphql", batch_jobs())
+
+    for repo in REPOS:
+        record = index.load("bench", repo, "main")
+        assert record is not None
+        assert record["aggregator"].total_commits == github_api.repos[repo]
+
+    # Indexed now: each repository only checks its head
+    _, requests = run_batch(github_api, monkeypatch, "graphql", batch_jobs())
+    assert requests == len(REPOS)
+
+
+def test_graphql_batch_reports_missing_repository(github_api, monkeypatch, index):
+    jobs = batch_jobs(max_commits=10) + [analysis.parse_analysis_request(
+        {"owner": "bench", "project": "missing", "author": "alice", "github_token": TOKEN, "max_commits": 10}
+    )]
+    result, _ = run_batch(github_api, monkeypatch, "graphql", jobs)
+
+    assert [item["success"] for item in result["results"]] == [True, True, True, False]
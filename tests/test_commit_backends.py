@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from contribution import CommitAggregator
+from githubmcp import iter_commits
+from githubmcp_async import iter_commits_async
+from github_graphql import iter_commits_graphql, iter_commits_graphql_async, iter_histories
+
+TOKEN = "test-token"
+
+
+def aggregate(commits) -> CommitAggregator:
+    aggregator = CommitAggregator()
+    for commit in commits:
+        aggregator.add(commit)
+    return aggregator
+
+
+async def collect(commits) -> list:
+    return [commit async for commit in commits]
+
+
+@pytest.mark.parametrize("repo", ["tiny", "small", "large"])
+def test_graphql_counts_match_rest(github_api, repo):
+    rest = list(iter_commits("bench", repo, token=TOKEN))
+    graphql = list(iter_commits_graphql("bench", repo, token=TOKEN))
+
+    assert len(rest) == github_api.repos[repo]
+    assert [commit["sha"] for commit in graphql] == [commit["sha"] for commit in rest]
+    rest_counts, graphql_counts = aggregate(rest), aggregate(graphql)
+    assert graphql_counts.total_commits == rest_counts.total_commits
+    assert graphql_counts.commits_by_author == rest_counts.commits_by_author
+
+
+def test_graphql_counts_match_rest_async(github_api):
+    rest = asyncio.run(collect(iter_commits_async("bench", "large", token=TOKEN)))
+    graphql = asyncio.run(collect(iter_commits_graphql_async("bench", "large", token=TOKEN)))
+
+    assert aggregate(graphql).commits_by_author == aggregate(rest).commits_by_author
+
+
+def test_graphql_max_commits_matches_rest(github_api):
+    rest = list(iter_commits("bench", "large", max_commits=120, token=TOKEN))
+    graphql = list(iter_commits_graphql("bench", "large", max_commits=120, token=TOKEN))
+
+    assert len(graphql) == len(rest) == 120
+    assert aggregate(graphql).commits_by_author == aggregate(rest).commits_by_author
+
+
+def test_batched_histories_match_rest(github_api):
+    repos = [{"owner": "bench", "repo": name} for name in ("tiny", "small", "large")]
+    pages = {}
+    for index, commits in iter_histories(repos, token=TOKEN):
+        pages.setdefault(index, []).extend(commits)
+
+    for index, spec in enumerate(repos):
+        rest = aggregate(iter_commits("bench", spec["repo"], token=TOKEN))
+        assert aggregate(pages[index]).commits_by_author == rest.commits_by_author
+
+
+def test_unknown_repository_is_reported(github_api):
+    results = list(iter_histories([{"owner": "bench", "repo": "missing"}], token=TOKEN))
+
+    assert len(results) == 1
+    assert isinstance(results[0][1], Exception)
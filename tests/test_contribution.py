@@ -0,0 +1,79 @@
+import pytest
+
+from contribution import CommitAggregator, compute_contribution, contribution_percentage, contribution_rating
+
+
+def commit(author, email=None, login=None, date=None, additions=0, deletions=0) -> dict:
+    return {"author": author, "email": email, "login": login, "date": date,
+            "additions": additions, "deletions": deletions}
+
+
+@pytest.mark.parametrize("percentage, rating", [
+    (0, 1),
+    (10, 1),
+    (10.4, 1),
+    (10.6, 2),
+    (25, 2),
+    (25.6, 3),
+    (40, 3),
+    (40.6, 4),
+    (50, 4),
+    (55.4, 4),
+    (55.6, 5),
+    (75, 5),
+    (76, 6),
+    (100, 6),
+])
+def test_rating_bucket_edges(percentage, rating):
+    assert contribution_rating(percentage) == rating
+
+
+def test_percentage_of_empty_history():
+    assert contribution_percentage(0, 0) == 0.0
+    assert contribution_percentage(1, 4) == 25.0
+
+
+def test_aggregator_counts_name_variants_as_one_author():
+    commits = [
+        commit("Alice Smith", email="alice@example.com", date="2024-01-02T00:00:00Z", additions=5, deletions=1),
+        commit("alice  smith", date="2024-01-01T00:00:00Z"),
+        commit("asmith", email="Alice@Example.com", additions=2),
+        commit("Bob", login="bob", date="2024-01-03T00:00:00Z"),
+    ]
+    aggregator = CommitAggregator().consume(commits)
+
+    assert aggregator.total_commits == 4
+    assert aggregator.count_for("Alice Smith") == 3
+    assert aggregator.count_for("alice@example.com") == 3
+    assert aggregator.count_for("@bob") == 1
+    assert aggregator.count_for("Carol") == 0
+    assert aggregator.matched_names("alice@example.com") == ["Alice Smith", "asmith"]
+    assert (aggregator.newest_date, aggregator.oldest_date) == ("2024-01-03T00:00:00Z", "2024-01-01T00:00:00Z")
+    assert aggregator.to_dict()["lines_by_author"] == {
+        "Alice Smith": {"additions": 5, "deletions": 1},
+        "asmith": {"additions": 2, "deletions": 0},
+    }
+
+
+def test_merged_aggregators_match_a_single_pass():
+    commits = [
+        commit("Alice", email="alice@example.com", additions=3),
+        commit("Bob", login="bob"),
+        commit("A. Lice", email="alice@example.com", deletions=4),
+        commit("Bob", date="2024-02-01T00:00:00Z"),
+    ]
+    whole = CommitAggregator().consume(commits)
+    merged = CommitAggregator().consume(commits[:2]).merge(CommitAggregator().consume(commits[2:]))
+
+    assert merged.to_dict() == whole.to_dict()
+    assert merged.count_for("Alice") == whole.count_for("Alice") == 2
+
+
+def test_compute_contribution():
+    commits = [commit("Alice")] * 2 + [commit("Bob")] * 2
+
+    stats = compute_contribution(commits, "alice")
+
+    assert (stats["total_commits"], stats["author_commits"]) == (4, 2)
+    assert stats["percentage"] == 50.0
+    assert stats["rating"] == 4
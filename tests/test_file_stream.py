@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+
+import file_stream
+from github_stub import commit_sha
+
+TOKEN = "test-token"
+SHA = commit_sha("small", 10)
+
+
+@pytest.fixture
+def files(github_api, monkeypatch):
+    monkeypatch.setattr(github_api, "files", {
+        "src/small.py": b"".join(b"line %d\n" % i for i in range(1, 41)),
+        "src/large.py": b"".join(b"line %d\n" % i for i in range(1, 5001)),
+        "src/README.md": b"upper\n",
+        "src/readme.md": b"lower\n",
+    })
+    return github_api
+
+
+def stream(path, branch=SHA, token=TOKEN, **options):
+    return file_stream.stream_file_content("bench", "small", path, branch=branch, token=token, **options)
+
+
+def test_full_read_at_a_sha_is_cached(files):
+    first = stream("src/small.py", start_line=1)
+    before = files.request_count
+    again = stream("src/small.py", start_line=11, max_lines=5)
+
+    assert files.request_count == before
+    assert first["total_lines"] == 40
+    assert again["content"] == "".join(f"line {i}\n" for i in range(11, 16))
+
+
+def test_full_read_is_cached_async(files):
+    asyncio.run(file_stream.stream_file_content_async("bench", "small", "src/small.py", branch=SHA,
+                                                      token="async-token"))
+    before = files.request_count
+    stream("src/small.py", token="async-token")
+
+    assert files.request_count == before
+
+
+@pytest.mark.parametrize("options", [{"max_bytes": 64}, {"start_line": 1, "max_lines": 3}])
+def test_partial_reads_are_not_cached(files, options):
+    # Tokens scope the content cache: each case starts empty
+    token = f"partial-token-{sorted(options)}"
+    stream("src/small.py", token=token, **options)
+    before = files.request_count
+    stream("src/small.py", token=token, max_bytes=16)
+
+    assert files.request_count == before + 1
+
+
+def test_branch_reads_and_large_files_are_not_cached(files, monkeypatch):
+    monkeypatch.setattr(file_stream, "FILE_CACHE_MAX_BYTES", 1024)
+    stream("src/small.py", branch="main", token="branch-token")
+    stream("src/large.py", token="branch-token", start_line=4990)
+    before = files.request_count
+    stream("src/small.py", branch="main", token="branch-token")
+    stream("src/large.py", token="branch-token", start_line=4990)
+
+    assert files.request_count == before + 2
+
+
+def test_paths_differing_in_case_stay_apart(files):
+    stream("src/README.md", token="case-token")
+    stream("src/readme.md", token="case-token")
+
+    assert stream("src/README.md", token="case-token")["content"] == "upper\n"
+    assert stream("src/readme.md", token="case-token")["content"] == "lower\n"
+
+
+TEXT = "".join(f"line {i}\n" for i in range(1, 11)).encode()
+
+
+def sliced(data: bytes, chunk_size: int = 3, status: int = 200, headers=None, **options) -> dict:
+    selection = file_stream.ContentSlice(**options)
+    selection.start(status, headers or {"Content-Length": str(len(data))})
+    for position in range(0, len(data), chunk_size):
+        if not selection.feed(data[position:position + chunk_size]):
+            break
+    selection.finish()
+    return selection.result("f.txt")
+
+
+def test_byte_window():
+    result = sliced(TEXT, offset=7, max_bytes=10)
+
+    assert result["content"] == TEXT[7:17].decode()
+    assert (result["offset"], result["bytes"], result["next_offset"]) == (7, 10, 17)
+    assert result["truncated"] and result["size"] == len(TEXT)
+
+
+def test_byte_window_reaching_the_end():
+    result = sliced(TEXT, offset=len(TEXT) - 8, max_bytes=64)
+
+    assert result["content"] == "line 10\n"
+    assert not result["truncated"] and "next_offset" not in result
+
+
+def test_byte_window_from_a_partial_response():
+    headers = {"Content-Range": f"bytes 7-16/{len(TEXT)}"}
+    result = sliced(TEXT[7:17], status=206, headers=headers, offset=7, max_bytes=10)
+
+    assert result["content"] == TEXT[7:17].decode()
+    assert result["size"] == len(TEXT)
+
+
+def test_multibyte_characters_across_chunks_and_offsets():
+    data = "héllo wörld\n".encode()
+
+    assert sliced(data, chunk_size=1)["content"] == "héllo wörld\n"
+    # Byte 2 is the second byte of "é": the slice starts at the next character
+    result = sliced(data, offset=2, max_bytes=64)
+    assert result["content"] == "llo wörld\n"
+    assert result["offset"] == 3
+
+
+@pytest.mark.parametrize("start_line, max_lines, lines, end_line, next_start_line", [
+    (1, 3, (1, 2, 3), 3, 4),
+    (4, 2, (4, 5), 5, 6),
+    (8, 5, (8, 9, 10), 10, None),
+    (12, 5, (), 11, None),
+])
+def test_line_window(start_line, max_lines, lines, end_line, next_start_line):
+    result = sliced(TEXT, start_line=start_line, max_lines=max_lines)
+
+    assert result["content"] == "".join(f"line {i}\n" for i in lines)
+    assert (result["start_line"], result["end_line"]) == (start_line, end_line)
+    assert result.get("next_start_line") == next_start_line
+    assert result["truncated"] == (next_start_line is not None)
+    if next_start_line is None:
+        assert result["total_lines"] == 10
+
+
+def test_line_cut_by_the_byte_cap_continues_from_its_start():
+    result = sliced(TEXT, start_line=2, max_lines=5, max_bytes=10)
+
+    assert result["content"] == "line 2\nlin"
+    assert (result["end_line"], result["next_start_line"]) == (3, 3)
+
+
+def test_last_line_without_a_newline_is_counted():
+    result = sliced(b"one\ntwo", start_line=1)
+
+    assert result["content"] == "one\ntwo"
+    assert result["total_lines"] == 2
+
+
+def test_binary_content_is_not_returned():
+    result = sliced(b"\x89PNG\r\n\x1a\n\x00\x00data", start_line=1)
+
+    assert result["binary"] and result["content"] is None
@@ -0,0 +1,261 @@
+import asyncio
+import base64
+import os
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import git_mirror
+from contribution import CommitAggregator
+from git_mirror import GitMirror, check_name, check_revision
+
+AUTHORS = ("Alice", "Bob", "Carol")
+
+
+def git(cwd, *args, author="Alice", when=0) -> str:
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME=author, GIT_AUTHOR_EMAIL=f"{author.lower()}@example.com",
+        GIT_COMMITTER_NAME=author, GIT_COMMITTER_EMAIL=f"{author.lower()}@example.com",
+        GIT_AUTHOR_DATE=f"{1700000000 + when} +0000", GIT_COMMITTER_DATE=f"{1700000000 + when} +0000",
+    )
+    result = subprocess.run(["git", *args], cwd=cwd, env=env, capture_output=True, check=True)
+    return result.stdout.decode("utf-8")
+
+
+class Origin:
+    """A working repository pushing to a bare origin, served to GitMirror over file://."""
+
+    def __init__(self, base):
+        self.clone_base = "file://" + str(base / "origin")
+        self.bare = base / "origin" / "acme" / "widgets.git"
+        self.work = base / "work"
+        self.commits = 0
+        subprocess.run(["git", "init", "--quiet", "--bare", "-b", "main", str(self.bare)], check=True)
+        subprocess.run(["git", "init", "--quiet", "-b", "main", str(self.work)], check=True)
+        git(self.work, "remote", "add", "origin", str(self.bare))
+
+    def write(self, path, content, mode="w"):
+        full_path = self.work / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(full_path, mode) as f:
+            f.write(content)
+
+    def commit(self, message) -> str:
+        author = AUTHORS[self.commits % len(AUTHORS)]
+        git(self.work, "add", "-A")
+        git(self.work, "commit", "--quiet", "-m", message, author=author, when=self.commits * 60)
+        git(self.work, "push", "--quiet", "origin", "main")
+        self.commits += 1
+        return git(self.work, "rev-parse", "HEAD").strip()
+
+
+@pytest.fixture
+def origin(tmp_path):
+    origin = Origin(tmp_path)
+    origin.write("README.md", "widgets\n")
+    origin.write("src/app.py", "print('hello')\n")
+    origin.commit("Initial commit")
+    return origin
+
+
+@pytest.fixture
+def mirror(origin, tmp_path):
+    mirror = GitMirror("acme", "widgets", root=str(tmp_path / "mirrors"), clone_base=origin.clone_base)
+    mirror.sync()
+    return mirror
+
+
+def test_iter_commits(origin, mirror):
+    origin.write("src/app.py", "print('hello, world')\n")
+    origin.commit("Greet the world")
+    origin.write("docs/guide.md", "# Guide\n")
+    origin.commit("Add a guide")
+    mirror.sync(force=True)
+
+    commits = list(mirror.iter_commits())
+
+    assert [commit["message"] for commit in commits] == ["Add a guide", "Greet the world", "Initial commit"]
+    assert [commit["author"] for commit in commits] == ["Carol", "Bob", "Alice"]
+    assert commits[0]["email"] == "carol@example.com"
+    assert commits[-1]["date"] == "2023-11-14T22:13:20Z"
+    assert commits[0]["url"] == f"https://github.com/acme/widgets/commit/{commits[0]['sha']}"
+    assert [commit["sha"] for commit in mirror.iter_commits(max_commits=1)] == [commits[0]["sha"]]
+
+
+def test_iter_commits_line_stats(origin, mirror):
+    origin.write("src/app.py", "print('hello, world')\nprint('again')\n")
+    origin.write("logo.bin", "\x00\x01binary\x00")
+    origin.commit("Greet twice")
+    mirror.sync(force=True)
+
+    commits = list(mirror.iter_commits())
+    aggregator = CommitAggregator()
+    for commit in commits:
+        aggregator.add(commit)
+
+    assert [(commit["additions"], commit["deletions"]) for commit in commits] == [(2, 1), (2, 0)]
+    assert aggregator.additions_by_author == {"bob": 2, "alice": 2}
+    assert aggregator.deletions_by_author == {"bob": 1, "alice": 0}
+
+
+def test_iter_commits_async(origin, mirror, monkeypatch):
+    monkeypatch.setattr(git_mirror, "get_mirror", lambda owner, repo, token=None: mirror)
+
+    async def collect():
+        return [commit async for commit in git_mirror.iter_commits_git_async("acme", "widgets")]
+
+    assert asyncio.run(collect()) == list(mirror.iter_commits())
+
+
+def test_iter_commits_between(origin, mirror):
+    base = mirror.head_sha()
+    origin.write("a.txt", "a\n")
+    origin.commit("Add a")
+    origin.write("b.txt", "b\n")
+    head = origin.commit("Add b")
+    mirror.sync(force=True)
+
+    assert [commit["message"] for commit in mirror.iter_commits_between(base, head)] == ["Add b", "Add a"]
+    assert mirror.iter_commits_between(head, base) is None
+
+
+def test_commit_diff_rename(origin, mirror):
+    origin.write("src/app.py", "print('hello')\n" * 20)
+    origin.commit("Grow app")
+    git(origin.work, "mv", "src/app.py", "src/main.py")
+    origin.write("src/main.py", "print('bye')\n", mode="a")
+    sha = origin.commit("Rename app")
+    mirror.sync(force=True)
+
+    diff = mirror.commit_diff(sha)
+
+    assert diff["commit"]["message"] == "Rename app"
+    assert [(f["filename"], f["status"], f["additions"], f["deletions"]) for f in diff["files"]] == [
+        ("src/main.py", "renamed", 1, 0)
+    ]
+    assert diff["files"][0]["patch"].startswith("@@")
+    assert "+print('bye')" in diff["files"][0]["patch"]
+    assert (diff["total_additions"], diff["total_deletions"]) == (1, 0)
+
+
+def test_commit_diff_binary_and_mode_change(origin, mirror):
+    origin.write("logo.bin", "\x00\x01\x02binary\x00")
+    origin.write("src/app.py", "print('hello')\nprint('again')\n")
+    os.chmod(origin.work / "README.md", 0o755)
+    sha = origin.commit("Add a logo, make README executable")
+    mirror.sync(force=True)
+
+    files = {f["filename"]: f for f in mirror.commit_diff(sha)["files"]}
+
+    assert set(files) == {"README.md", "logo.bin", "src/app.py"}
+    assert (files["logo.bin"]["status"], files["logo.bin"]["additions"], files["logo.bin"]["patch"]) == (
+        "added", 0, ""
+    )
+    assert (files["README.md"]["status"], files["README.md"]["additions"], files["README.md"]["patch"]) == (
+        "modified", 0, ""
+    )
+    # Patches stay aligned with their files around the entries without hunks
+    assert (files["src/app.py"]["additions"], files["src/app.py"]["deletions"]) == (1, 0)
+    assert files["src/app.py"]["patch"].startswith("@@")
+    assert "+print('again')" in files["src/app.py"]["patch"]
+
+
+def test_commit_diff_root_commit(origin, mirror):
+    diff = mirror.commit_diff(mirror.head_sha())
+
+    assert sorted(f["filename"] for f in diff["files"]) == ["README.md", "src/app.py"]
+    assert all(f["status"] == "added" for f in diff["files"])
+
+
+def test_incremental_sync(origin, tmp_path, monkeypatch):
+    monkeypatch.setattr(git_mirror, "GIT_FETCH_INTERVAL", 3600)
+    mirror = GitMirror("acme", "widgets", root=str(tmp_path / "mirrors"), clone_base=origin.clone_base)
+
+    assert mirror.sync() == "cloned"
+    assert mirror.sync() == "fresh"
+
+    origin.write("new.txt", "new\n")
+    head = origin.commit("Add new file")
+    # Within GIT_FETCH_INTERVAL the mirror is served as is
+    assert mirror.head_sha() != head
+
+    os.utime(mirror._marker, (0, 0))
+    assert mirror.sync() == "fetched"
+    assert mirror.head_sha() == head
+    assert len(list(mirror.iter_commits())) == 2
+
+
+@pytest.mark.parametrize("revision", ["--output=INJECTED", "-p", "--all", "", "main\0"])
+def test_option_like_revisions_are_rejected(origin, mirror, tmp_path, monkeypatch, revision):
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.raises(ValueError):
+        check_revision(revision)
+    with pytest.raises(ValueError):
+        mirror.head_sha(revision)
+    with pytest.raises(ValueError):
+        list(mirror.iter_commits(revision))
+    with pytest.raises(ValueError):
+        mirror.commit_diff(revision)
+    with pytest.raises(ValueError):
+        mirror.iter_commits_between(revision, "main")
+
+    assert not (tmp_path / "INJECTED").exists()
+    assert not os.path.exists(os.path.join(mirror.path, "INJECTED"))
+
+
+@pytest.mark.parametrize("name", ["..", ".", "a/b", "../etc", "-x/", "", "repo name"])
+def test_invalid_names_are_rejected(tmp_path, name):
+    with pytest.raises(ValueError):
+        check_name(name)
+    with pytest.raises(ValueError):
+        GitMirror("acme", name, root=str(tmp_path))
+
+
+def test_diff_tools_read_the_mirror(origin, mirror, monkeypatch):
+    import tool_output
+    origin.write("src/app.py", "print('hello')\nprint('again')\n")
+    sha = origin.commit("Say it again")
+    mirror.sync(force=True)
+    monkeypatch.setattr(git_mirror, "get_mirror", lambda owner, repo, token=None: mirror)
+    monkeypatch.setattr(tool_output, "_fetch_commit_diff", git_mirror.get_commit_diff_git_async)
+
+    diff = asyncio.run(tool_output.get_commit_diff("acme", "widgets", sha, detail="full"))
+
+    assert diff["commit"]["sha"] == sha
+    assert [(f["filename"], f["additions"]) for f in diff["files"]] == [("src/app.py", 1)]
+    assert "+print('again')" in diff["files"][0]["patch"]
+
+
+def test_token_is_sent_as_header_not_argument(tmp_path, monkeypatch):
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen.append(self.headers.get("Authorization"))
+            self.send_response(404)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    commands = []
+    run = subprocess.run
+    monkeypatch.setattr(git_mirror.subprocess, "run",
+                        lambda args, **kwargs: commands.append(args) or run(args, **kwargs))
+    try:
+        mirror = GitMirror("acme", "private", root=str(tmp_path),
+                           clone_base=f"http://127.0.0.1:{server.server_address[1]}")
+        with pytest.raises(Exception):
+            mirror.check_access("secret-token")
+    finally:
+        server.shutdown()
+
+    credentials = base64.b64encode(b"x-access-token:secret-token").decode("ascii")
+    assert f"Basic {credentials}" in seen
+    assert commands and not any(credentials in arg or "secret-token" in arg for args in commands for arg in args)
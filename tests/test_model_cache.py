@@ -0,0 +1,93 @@
+import asyncio
+
+from autogen_core.models import CreateResult, SystemMessage, UserMessage
+
+from agents import CachingChatCompletionClient, MODEL_NAME
+from fake_model import FakeChatCompletionClient
+from github_cache import MemoryCacheBackend
+from model_cache import ModelCache
+
+TOOL = {
+    "name": "get_recent_commits",
+    "description": "Get recent commits from a repository.",
+    "parameters": {
+        "type": "object",
+        "properties": {"owner": {"type": "string"}, "repo": {"type": "string"}, "count": {"type": "integer"}},
+        "required": ["owner", "repo"],
+    },
+}
+MESSAGES = [
+    SystemMessage(content="You analyse contributions."),
+    UserMessage(content="Describe the work.\n\nRepository: acme/widgets\nAuthor: alice\n\nreport", source="user"),
+]
+
+
+def caching_client(temperature=None):
+    model = FakeChatCompletionClient(first_token_latency=0, tokens_per_second=1e9)
+    return model, CachingChatCompletionClient(model, ModelCache(MemoryCacheBackend()), MODEL_NAME, temperature)
+
+
+def test_repeated_call_is_served_from_cache():
+    model, client = caching_client()
+
+    async def run():
+        first = await client.create(MESSAGES, tools=[TOOL])
+        second = await client.create(MESSAGES, tools=[TOOL])
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert model.calls == 1
+    assert not first.cached
+    assert second.cached
+    assert second.finish_reason == first.finish_reason == "function_calls"
+    assert second.content == first.content
+
+
+def test_streamed_call_is_served_from_cache():
+    model, client = caching_client()
+
+    async def run():
+        await client.create(MESSAGES)
+        return [chunk async for chunk in client.create_stream(MESSAGES)]
+
+    chunks = asyncio.run(run())
+
+    assert model.calls == 1
+    assert isinstance(chunks[-1], CreateResult) and chunks[-1].cached
+    assert chunks[0] == chunks[-1].content
+
+
+def test_reflection_never_shares_a_tool_turn_key():
+    model, client = caching_client()
+
+    async def run():
+        tool_turn = await client.create(MESSAGES, tools=[TOOL])
+        reflection = await client.create(MESSAGES, tools=[TOOL], tool_choice="none")
+        # Asked again, each call still gets its own answer
+        return (
+            tool_turn, reflection,
+            await client.create(MESSAGES, tools=[TOOL]),
+            await client.create(MESSAGES, tools=[TOOL], tool_choice="none"),
+        )
+
+    tool_turn, reflection, tool_turn_again, reflection_again = asyncio.run(run())
+
+    assert model.calls == 2
+    assert tool_turn.finish_reason == "function_calls"
+    assert reflection.finish_reason == "stop" and isinstance(reflection.content, str)
+    assert tool_turn_again.cached and tool_turn_again.content == tool_turn.content
+    assert reflection_again.cached and reflection_again.content == reflection.content
+
+
+def test_different_call_options_miss():
+    model, client = caching_client(temperature=0.0)
+
+    async def run():
+        await client.create(MESSAGES)
+        await client.create(MESSAGES, extra_create_args={"temperature": 0.7})
+        await client.create(MESSAGES[:1] + [UserMessage(content="Something else", source="user")])
+
+    asyncio.run(run())
+
+    assert model.calls == 3
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from rate_limit import SECONDARY_LIMIT_WAIT, RateLimitScheduler, RateLimitWaitTooLong
+
+TOKEN = "test-token"
+
+
+def budget_headers(remaining: int, reset_in: float, limit: int = 5000) -> dict:
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(time.time() + reset_in)),
+    }
+
+
+def test_requests_go_straight_through_with_budget_left():
+    scheduler = RateLimitScheduler(reserve=100)
+    scheduler.record(TOKEN, 200, budget_headers(remaining=4000, reset_in=3600))
+
+    assert [scheduler.acquire(TOKEN) for _ in range(5)] == [0.0] * 5
+
+
+def test_low_budget_is_spread_over_the_window():
+    scheduler = RateLimitScheduler(reserve=100, max_wait=600)
+    scheduler.record(TOKEN, 200, budget_headers(remaining=10, reset_in=100))
+
+    waits = [scheduler.acquire(TOKEN) for _ in range(3)]
+
+    assert waits[0] == pytest.approx(0.0, abs=1.0)
+    # Each slot is roughly (time to reset / remaining) after the previous one
+    assert waits[1] - waits[0] == pytest.approx(10.0, abs=1.5)
+    assert waits[2] - waits[1] > waits[1] - waits[0]
+
+
+def test_exhausted_budget_waits_for_the_reset():
+    scheduler = RateLimitScheduler(max_wait=600)
+    scheduler.record(TOKEN, 200, budget_headers(remaining=0, reset_in=30))
+
+    assert scheduler.acquire(TOKEN) == pytest.approx(30.0, abs=1.5)
+
+
+def test_wait_beyond_the_maximum_raises():
+    scheduler = RateLimitScheduler(max_wait=60)
+    scheduler.record(TOKEN, 403, budget_headers(remaining=0, reset_in=900))
+
+    with pytest.raises(RateLimitWaitTooLong):
+        scheduler.acquire(TOKEN)
+    # Another token (and GraphQL's separate budget) are unaffected
+    assert scheduler.acquire("other-token") == 0.0
+    assert scheduler.acquire(TOKEN, resource="graphql") == 0.0
+
+
+def test_new_reset_window_clears_queued_slots():
+    scheduler = RateLimitScheduler(reserve=100, max_wait=600)
+    scheduler.record(TOKEN, 200, budget_headers(remaining=5, reset_in=100))
+    for _ in range(3):
+        scheduler.acquire(TOKEN)
+
+    scheduler.record(TOKEN, 200, budget_headers(remaining=5000, reset_in=3600))
+
+    assert scheduler.acquire(TOKEN) == 0.0
+
+
+@pytest.mark.parametrize("status, headers, body, delay", [
+    (429, {"Retry-After": "7"}, "", 7.0),
+    (403, {"Retry-After": "soon"}, "", SECONDARY_LIMIT_WAIT),
+    (403, {}, "You have exceeded a secondary rate limit", SECONDARY_LIMIT_WAIT),
+    (429, {}, "", SECONDARY_LIMIT_WAIT),
+])
+def test_rate_limited_responses_retry_after_the_requested_wait(status, headers, body, delay):
+    scheduler = RateLimitScheduler(max_wait=120)
+
+    assert scheduler.retry_delay(TOKEN, 0, status, headers, body) == delay
+
+
+def test_server_errors_back_off_exponentially_with_jitter():
+    scheduler = RateLimitScheduler(retry_attempts=5, backoff_base=0.5, backoff_max=3)
+
+    for attempt, cap in enumerate([0.5, 1.0, 2.0, 3.0, 3.0]):
+        delays = [scheduler.retry_delay(TOKEN, attempt, 502, {}) for _ in range(50)]
+        assert all(0 <= delay <= cap for delay in delays)
+    assert scheduler.retry_delay(TOKEN, 5, 502, {}) is None
+    [budget] = scheduler.budgets().values()
+    assert budget["retries"] == 250
+
+
+def test_non_retryable_responses():
+    scheduler = RateLimitScheduler(max_wait=60)
+
+    assert scheduler.retry_delay(TOKEN, 0, 404, {}) is None
+    assert scheduler.retry_delay(TOKEN, 0, 403, {}, "Resource not accessible") is None
+    # Honouring this one would exceed the maximum wait
+    assert scheduler.retry_delay(TOKEN, 0, 403, budget_headers(remaining=0, reset_in=900)) is None
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from github_cache import MemoryCacheBackend
+from result_cache import ResultCache
+
+
+class Computation:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"run": self.calls}
+
+
+def test_concurrent_misses_compute_once():
+    cache, compute = ResultCache(MemoryCacheBackend()), Computation()
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(5)))
+
+    assert asyncio.run(run()) == [{"run": 1}] * 5
+    assert compute.calls == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_errors_reach_waiters_and_are_not_cached():
+    cache = ResultCache(MemoryCacheBackend())
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("agent failed")
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("key", failing) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+    assert cache.get("key") is None
+
+
+def test_cancelled_leader_hands_over_to_a_waiter():
+    cache, compute = ResultCache(MemoryCacheBackend()), Computation()
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get_or_compute("key", compute)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(run()) == [{"run": 2}] * 2
+    assert compute.calls == 2
+
+
+def test_cancelled_waiter_leaves_the_computation_running():
+    cache, compute = ResultCache(MemoryCacheBackend()), Computation()
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        return await leader
+
+    assert asyncio.run(run()) == {"run": 1}
+    assert cache.get("key") == {"run": 1}
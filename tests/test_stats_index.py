@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+import github_cache
+import stats_index
+from github_stub import commit_sha
+
+TOKEN = "test-token"
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    cache = github_cache.ResponseCache(github_cache.MemoryCacheBackend(), ttl=3600)
+    monkeypatch.setattr(github_cache, "get_response_cache", lambda: cache)
+    return cache
+
+
+def test_branch_head_sees_a_push_within_the_cache_ttl(github_api, response_cache, monkeypatch):
+    monkeypatch.setitem(github_api.repos, "small", github_api.repos["small"])
+    count = github_api.repos["small"]
+
+    assert stats_index.branch_head("bench", "small", token=TOKEN) == commit_sha("small", count - 1)
+    assert stats_index.branch_head("bench", "small", token=TOKEN) == commit_sha("small", count - 1)
+    assert response_cache.stats()["revalidations"] == 1
+
+    github_api.repos["small"] = count + 1
+    assert stats_index.branch_head("bench", "small", token=TOKEN) == commit_sha("small", count)
+    assert asyncio.run(stats_index.branch_head_async("bench", "small", token=TOKEN)) == commit_sha("small", count)
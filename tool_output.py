@@ -0,0 +1,487 @@
+import asyncio
+import contextlib
+import contextvars
+import fnmatch
+import json
+import logging
+import os
+import posixpath
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from contribution import GITHUB_COMMITS_BACKEND
+from file_stream import stream_file_content_async
+from git_mirror import get_commit_diff_git_async
+from githubmcp_async import gather_bounded, get_commit_diff_async
+import telemetry
+
+# Tool output budgets, overridable from the environment
+TOOL_DIFF_DETAIL = os.getenv("TOOL_DIFF_DETAIL", "stats")  # stats | sampled | full
+TOOL_PATCH_TOKENS = int(os.getenv("TOOL_PATCH_TOKENS", "400"))
+TOOL_OUTPUT_TOKENS = int(os.getenv("TOOL_OUTPUT_TOKENS", "4000"))
+TOOL_FILE_TOKENS = int(os.getenv("TOOL_FILE_TOKENS", "2000"))
+TOOL_TOKENIZER = os.getenv("TOOL_TOKENIZER", "o200k_base")  # tiktoken encoding of gpt-4o
+
+# Bytes streamed per token of file budget: generous, so the token budget and
+# not the byte cap decides where a window ends
+BYTES_PER_TOKEN = 8
+
+# Estimated tokens per changed line of a patch that wasn't fetched (the line plus its share of context)
+PATCH_TOKENS_PER_LINE = 12
+
+DIFF_DETAILS = ("stats", "sampled", "full")
+
+# Files whose patches say nothing about the author's work
+LOCKFILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb",
+    "poetry.lock", "pipfile.lock", "pdm.lock", "uv.lock", "cargo.lock", "go.sum",
+    "composer.lock", "gemfile.lock", "podfile.lock", "pubspec.lock", "mix.lock", "packages.lock.json",
+}
+GENERATED_PATTERNS = (
+    "*.min.js", "*.min.css", "*.map", "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "*.g.dart",
+    "*.designer.cs", "*.generated.*", "*.snap",
+)
+GENERATED_DIRS = {"dist", "build", "vendor", "node_modules", "__generated__", "generated", ".next", "target"}
+BINARY_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tiff", ".psd", ".pdf",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".jar", ".war", ".whl", ".egg",
+    ".exe", ".dll", ".so", ".dylib", ".a", ".o", ".class", ".pyc", ".wasm", ".bin",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot", ".mp3", ".mp4", ".mov", ".avi", ".wav", ".ogg",
+    ".sqlite", ".sqlite3", ".db", ".parquet", ".pkl", ".npy", ".npz", ".h5", ".onnx", ".pt",
+}
+
+logger = telemetry.get_logger("tool_output")
+
+# With the git backend, diffs come from the same local mirror as the history
+_fetch_commit_diff = get_commit_diff_git_async if GITHUB_COMMITS_BACKEND.lower() == "git" else get_commit_diff_async
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """The tiktoken encoding, or False if it can't be loaded (e.g. no network to fetch it)."""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TOOL_TOKENIZER)
+                except Exception as e:
+                    telemetry.log_event(
+                        logger, "Tokenizer unavailable, estimating token counts", logging.WARNING,
+                        tokenizer=TOOL_TOKENIZER, error=str(e)
+                    )
+                    _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Number of model tokens in `text` (about 4 characters per token if tiktoken is unavailable)."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def payload_tokens(value: Any) -> int:
+    """Tokens a tool result costs once serialized into the model context."""
+    return count_tokens(value if isinstance(value, str) else json.dumps(value, default=str))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of `text` (cut at a line end where possible) within `max_tokens`."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding:
+        prefix = encoding.decode(encoding.encode(text, disallowed_special=())[:max(0, max_tokens)])
+    else:
+        prefix = text[:max(0, max_tokens) * 4]
+    cut = prefix.rfind("\n")
+    return prefix[:cut + 1] if cut > 0 else prefix
+
+
+def skip_reason(filename: str, patch: Optional[str] = None) -> Optional[str]:
+    """Why a file's patch isn't worth showing ("lockfile", "generated", "binary"), or None."""
+    path = (filename or "").replace("\\", "/")
+    name = posixpath.basename(path).lower()
+    if name in LOCKFILES:
+        return "lockfile"
+    if any(fnmatch.fnmatch(name, pattern) for pattern in GENERATED_PATTERNS):
+        return "generated"
+    if any(part.lower() in GENERATED_DIRS for part in path.split("/")[:-1]):
+        return "generated"
+    if posixpath.splitext(name)[1] in BINARY_EXTENSIONS or (patch is not None and "\x00" in patch):
+        return "binary"
+    return None
+
+
+def split_hunks(patch: str) -> List[str]:
+    """Split a unified diff patch into its "@@ ... @@" hunks."""
+    hunks = []
+    for line in patch.splitlines(keepends=True):
+        if line.startswith("@@") or not hunks:
+            hunks.append(line)
+        else:
+            hunks[-1] += line
+    return hunks
+
+
+def sample_patch(patch: str, max_tokens: int) -> Dict[str, Any]:
+    """
+    Fit a patch into `max_tokens`.
+
+    Whole hunks are kept from the top while they fit; if even the first hunk
+    is too large, it is cut at a line boundary.
+
+    Returns:
+        Dictionary with the sampled patch and hunks shown/total
+    """
+    hunks = split_hunks(patch)
+    kept, used = [], 0
+    for hunk in hunks:
+        cost = count_tokens(hunk)
+        if used + cost > max_tokens:
+            break
+        kept.append(hunk)
+        used += cost
+    if not kept and hunks:
+        kept = [truncate_to_tokens(hunks[0], max_tokens)]
+    return {
+        "patch": "".join(kept),
+        "hunks_shown": len(kept),
+        "hunks_total": len(hunks),
+        "truncated": len(kept) < len(hunks) or bool(kept and kept[-1] != hunks[len(kept) - 1]),
+    }
+
+
+_request_usage: contextvars.ContextVar = contextvars.ContextVar("tool_token_usage", default=None)
+
+
+class TokenLedger:
+    """Process-wide counts of tool output tokens before and after shaping."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "original_tokens": 0, "returned_tokens": 0}
+
+    def record(self, original: int, returned: int):
+        with self._lock:
+            self._counters["calls"] += 1
+            self._counters["original_tokens"] += original
+            self._counters["returned_tokens"] += returned
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["saved_tokens"] = stats["original_tokens"] - stats["returned_tokens"]
+        # Reported without loading it: /debug shouldn't pull in tiktoken (or fetch its encoding)
+        stats["tokenizer"] = "not loaded" if _encoding is None else (TOOL_TOKENIZER if _encoding else "estimate")
+        return stats
+
+
+_ledger = TokenLedger()
+
+
+def _record(result: dict, original: int) -> dict:
+    """Attach token accounting to a shaped result and count it for the request and process."""
+    returned = payload_tokens(result)
+    result["tokens"] = {"original": original, "returned": returned, "saved": max(0, original - returned)}
+    _ledger.record(original, returned)
+    usage = _request_usage.get()
+    if usage is not None:
+        usage["calls"] += 1
+        usage["original_tokens"] += original
+        usage["returned_tokens"] += returned
+    return result
+
+
+@contextlib.contextmanager
+def track_tool_tokens() -> Iterator[Dict[str, int]]:
+    """
+    Count the shaped tool outputs produced within this context (e.g. one analysis request).
+
+    Yields:
+        Dictionary of calls/original_tokens/returned_tokens, filled in as tools run
+    """
+    usage = {"calls": 0, "original_tokens": 0, "returned_tokens": 0}
+    reset = _request_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _request_usage.reset(reset)
+
+
+def tool_token_stats() -> Dict[str, Any]:
+    """Process-wide tool output token counters for /debug."""
+    return _ledger.stats()
+
+
+def shape_commit_diff(diff: dict, detail: str = TOOL_DIFF_DETAIL, files: Optional[List[str]] = None,
+                      max_tokens: int = TOOL_OUTPUT_TOKENS, patch_tokens: int = TOOL_PATCH_TOKENS) -> dict:
+    """
+    Reduce a get_commit_diff result to what fits the model's token budget.
+
+    Args:
+        diff: Full get_commit_diff result
+        detail: "stats" (per-file counts only), "sampled" (budgeted patches) or "full"
+        files: Only include these filenames; their patches are shown even at "stats" detail
+        max_tokens: Budget for all patches together
+        patch_tokens: Budget per file patch at "sampled" detail
+
+    Returns:
+        Dictionary in get_commit_diff's shape; a file whose patch was left out
+        or cut says so in "skipped" or "truncated", and "expand" tells the
+        model how to ask for more
+    """
+    if detail not in DIFF_DETAILS:
+        raise ValueError(f"Unknown diff detail: {detail} (expected one of {', '.join(DIFF_DETAILS)})")
+    selected = set(files or [])
+    shaped_files = []
+    remaining = max_tokens
+    withheld = False
+
+    for file_change in diff["files"]:
+        if selected and file_change["filename"] not in selected:
+            continue
+        patch = file_change.get("patch") or ""
+        shaped = {name: value for name, value in file_change.items() if name != "patch"}
+        # Asking for a file by name is the on-demand expansion of its patch
+        file_detail = "full" if selected and detail == "stats" else detail
+        reason = skip_reason(file_change["filename"], patch)
+        # At "stats" detail the diff may have been fetched without patches
+        has_patch = bool(patch) if "patch" in file_change else bool(file_change["additions"] or file_change["deletions"])
+
+        if not has_patch:
+            pass
+        elif file_detail == "stats":
+            withheld = True
+        elif reason and not selected:
+            shaped["skipped"] = reason
+            withheld = True
+        elif remaining <= 0:
+            shaped["skipped"] = "token budget"
+            withheld = True
+        else:
+            budget = remaining if file_detail == "full" else min(patch_tokens, remaining)
+            sampled = sample_patch(patch, budget)
+            shaped["patch"] = sampled["patch"]
+            if sampled["truncated"]:
+                shaped.update(truncated=True, hunks_shown=sampled["hunks_shown"], hunks_total=sampled["hunks_total"])
+                withheld = True
+            remaining -= count_tokens(sampled["patch"])
+        shaped_files.append(shaped)
+
+    omitted = len(diff["files"]) - len(shaped_files)
+    result = {
+        "commit": diff["commit"],
+        "files": shaped_files,
+        "total_additions": diff["total_additions"],
+        "total_deletions": diff["total_deletions"],
+        "detail": detail,
+    }
+    if omitted:
+        result["files_omitted"] = omitted
+    if withheld or omitted:
+        result["expand"] = (
+            "Call get_commit_diff again with files=[...] to see specific patches, "
+            "or detail='sampled'/'full' for all of them"
+        )
+    return result
+
+
+def shape_file_slice(file: dict, max_tokens: int = TOOL_FILE_TOKENS) -> dict:
+    """
+    Fit a stream_file_content line window to the model's token budget.
+
+    Args:
+        file: stream_file_content result for a line window
+        max_tokens: Budget for the returned content
+
+    Returns:
+        Dictionary in get_file_content's shape; when only part of the file is
+        returned, the line window shown and "next_start_line" to continue from
+    """
+    shaped = {name: value for name, value in file.items() if name not in ("content", "binary", "truncated")}
+    if file["binary"]:
+        shaped["skipped"] = "binary"
+        return shaped
+
+    content = truncate_to_tokens(file["content"], max_tokens)
+    if content != file["content"]:
+        end = file["start_line"] + content.count("\n") - (1 if content.endswith("\n") else 0)
+        shaped.pop("total_lines", None)
+        shaped.update(end_line=end, next_start_line=end + 1)
+    shaped["content"] = content
+    if shaped["start_line"] == 1 and "next_start_line" not in shaped:
+        # The whole file: the window fields would only cost tokens
+        for name in ("start_line", "end_line", "total_lines"):
+            shaped.pop(name, None)
+    return shaped
+
+
+def _file_tokens(file: dict) -> int:
+    """Tokens the whole file would have cost, extrapolated from the window when only part was read."""
+    if file["binary"]:
+        return (file.get("size") or 0) // 4
+    window_bytes = len(file["content"].encode("utf-8"))
+    if not file.get("size") or not window_bytes:
+        return payload_tokens(file)
+    return max(payload_tokens(file), count_tokens(file["content"]) * file["size"] // window_bytes)
+
+
+def _diff_tokens(diff: dict) -> int:
+    """
+    Tokens the unshaped diff would have cost, estimated without tokenizing its patches.
+
+    Patches count about 4 characters per token, or PATCH_TOKENS_PER_LINE per
+    changed line when they weren't fetched; only the file metadata is tokenized.
+    """
+    files = []
+    patch_tokens = 0
+    for file_change in diff["files"]:
+        if "patch" in file_change:
+            patch_tokens += (len(file_change["patch"] or "") + 3) // 4
+        else:
+            patch_tokens += (file_change["additions"] + file_change["deletions"]) * PATCH_TOKENS_PER_LINE
+        files.append({name: value for name, value in file_change.items() if name != "patch"})
+    return payload_tokens(dict(diff, files=files)) + patch_tokens
+
+
+async def _shaped_diff(owner: str, repo: str, commit_sha: str, detail: str, files: Optional[List[str]],
+                       max_tokens: int, token: str) -> dict:
+    if detail not in DIFF_DETAILS:
+        raise ValueError(f"Unknown diff detail: {detail} (expected one of {', '.join(DIFF_DETAILS)})")
+    # Patches are only fetched (and inflated from the content cache) when some may be shown
+    diff = await _fetch_commit_diff(owner, repo, commit_sha, include_patch=detail != "stats" or bool(files),
+                                    token=token)
+    # Tokenizing patch hunks is CPU-bound, so shaping runs in a worker thread
+    shaped, original = await asyncio.to_thread(
+        lambda: (shape_commit_diff(diff, detail=detail, files=files, max_tokens=max_tokens), _diff_tokens(diff))
+    )
+    return _record(shaped, original)
+
+
+async def _file_window(owner: str, repo: str, path: str, branch: str, start_line: int, max_tokens: int,
+                       token: str) -> dict:
+    reason = skip_reason(path)
+    if reason in ("binary", "lockfile"):
+        # Not worth fetching at all
+        skipped = {"path": path, "skipped": reason}
+        return _record(skipped, payload_tokens(skipped))
+    # Streams just enough of the file for the window (at most BYTES_PER_TOKEN bytes per token of budget)
+    file = await stream_file_content_async(owner, repo, path, branch=branch, start_line=start_line,
+                                           max_bytes=max_tokens * BYTES_PER_TOKEN, token=token)
+    return _record(shape_file_slice(file, max_tokens), _file_tokens(file))
+
+
+async def get_commit_diff(owner: str, repo: str, commit_sha: str, detail: str = TOOL_DIFF_DETAIL,
+                          files: Optional[List[str]] = None, token: str = None) -> dict:
+    """
+    Get a commit's changed files, with patches fitted to a token budget.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        commit_sha: Commit SHA hash
+        detail: "stats" for per-file line counts only (default), "sampled" for budgeted patches, "full" for whole patches
+        files: Filenames whose patches to show (expands them even at "stats" detail)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        Dictionary with commit diff information and token counts
+    """
+    return await _shaped_diff(owner, repo, commit_sha, detail, files, TOOL_OUTPUT_TOKENS, token)
+
+
+async def get_commit_diffs(owner: str, repo: str, commit_shas: List[str], detail: str = TOOL_DIFF_DETAIL,
+                           token: str = None) -> List[dict]:
+    """
+    Get changed files for several commits at once (fetched concurrently), fitted to a token budget.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        commit_shas: Commit SHA hashes
+        detail: "stats" for per-file line counts only (default), "sampled" or "full" for patches
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        List of commit diff dictionaries in the order requested; a commit that
+        could not be fetched is reported as {"sha": ..., "error": ...}
+    """
+    # The overall budget is shared between the commits
+    per_commit = max(1, TOOL_OUTPUT_TOKENS // max(1, len(commit_shas)))
+
+    results = await gather_bounded([
+        lambda sha=sha: _shaped_diff(owner, repo, sha, detail, None, per_commit, token) for sha in commit_shas
+    ])
+    return [
+        {"sha": sha, "error": str(result)} if isinstance(result, Exception) else result
+        for sha, result in zip(commit_shas, results)
+    ]
+
+
+async def get_file_content(owner: str, repo: str, file_path: str, branch: str = "main", start_line: int = 1,
+                           token: str = None) -> dict:
+    """
+    Get content of a file, windowed to a token budget.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        file_path: Path to file in repository
+        branch: Branch name (default: main)
+        start_line: First line to return (default: 1); use next_start_line from a previous call to continue
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        Dictionary with file content, the line window shown and token counts
+    """
+    return await _file_window(owner, repo, file_path, branch, start_line, TOOL_FILE_TOKENS, token)
+
+
+async def get_file_contents(owner: str, repo: str, file_paths: List[str], branch: str = "main",
+                            token: str = None) -> List[dict]:
+    """
+    Get contents of several files at once (fetched concurrently), windowed to a token budget.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        file_paths: Paths to files in repository
+        branch: Branch name (default: main)
+        token: GitHub Personal Access Token (optional)
+
+    Returns:
+        List of file dictionaries in the order requested; a file that could
+        not be fetched is reported as {"path": ..., "error": ...}
+    """
+    per_file = max(1, TOOL_FILE_TOKENS // max(1, len(file_paths)))
+
+    results = await gather_bounded([
+        lambda path=path: _file_window(owner, repo, path, branch, 1, per_file, token) for path in file_paths
+    ])
+    return [
+        {"path": path, "error": str(result)} if isinstance(result, Exception) else result
+        for path, result in zip(file_paths, results)
+    ]
+
+
+__all__ = [
+    'count_tokens',
+    'skip_reason',
+    'sample_patch',
+    'shape_commit_diff',
+    'shape_file_slice',
+    'track_tool_tokens',
+    'tool_token_stats',
+    'get_commit_diff',
+    'get_commit_diffs',
+    'get_file_content',
+    'get_file_contents'
+]
@@ -27,43 +27,72 @@
 #             )
 #         )
 
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Optional
+
 from autogen_agentchat.agents import AssistantAgent
 from autogen_core import CancellationToken
-from autogen_agentchat.ui import Console
 
-async def run_mcp_agent(mcp_agent: AssistantAgent, task: str):
-    """Run main MCP agent with all tools enabled and return results as JSON"""
-    print("\n=== MCP AGENT ACTIVE ===")
-    print(f"\nProcessing task: {task}")
+import telemetry
+
+logger = telemetry.get_logger("agent")
+
+# Agent messages that carry its answer: model text, or tool results when reflection is off
+ANSWER_MESSAGE_TYPES = ('TextMessage', 'ToolCallSummaryMessage')
+
+
+@contextmanager
+def _deadline(timeout: Optional[float]):
+    """CancellationToken that cancels itself after `timeout` seconds (never when None)."""
+    token = CancellationToken()
+    handle = asyncio.get_running_loop().call_later(timeout, token.cancel) if timeout else None
+    try:
+        yield token
+    finally:
+        if handle is not None:
+            handle.cancel()
+
+
+async def run_mcp_agent(mcp_agent: AssistantAgent, task: str, timeout: Optional[float] = None):
+    """
+    Run main MCP agent with all tools enabled and return results as JSON
+
+    After `timeout` seconds the run is cancelled (the pending model call or
+    tool with it) and an error result is returned, like any other failure.
+    """
+    telemetry.log_event(logger, "Agent task started", task_chars=len(task), timeout=timeout)
     
     try:
-        # Collect all messages from the stream
-        
-        result = await Console(
-            mcp_agent.run_stream(
-                task=task,
-                cancellation_token=CancellationToken(),
-            )
-        )
+        # Messages are collected without echoing them to the console: the
+        # agent.run span and its children record what happened and how long it took
+        with telemetry.span("agent.run", timeout=timeout) as span, _deadline(timeout) as token:
+            run = asyncio.ensure_future(mcp_agent.run(task=task, cancellation_token=token))
+            token.link_future(run)
+            try:
+                result = await run
+            except asyncio.CancelledError:
+                if not token.is_cancelled():
+                    raise
+                raise TimeoutError(f"Agent did not finish within {timeout:g}s")
+            span.set(messages=len(result.messages))
 
         messages = result.messages
         
         final_response = "No response generated"
         for message in reversed(messages):
-            if (hasattr(message, 'type') and message.type == 'TextMessage' 
+            if (hasattr(message, 'type') and message.type in ANSWER_MESSAGE_TYPES
                 and hasattr(message, 'source') and message.source != 'user'):
                 final_response = message.content
                 break
 
-        print("Response by runner: ", final_response)
+        telemetry.log_event(logger, "Agent task finished", logging.DEBUG, response=final_response)
         # Return structured results
         return final_response
         
     except Exception as e:
-        print(f"\n=== ERROR IN AGENT ===")
-        print(f"Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        telemetry.log_event(logger, "Agent task failed", logging.ERROR, exc_info=True, error=str(e))
         
         return {
             "success": False,
@@ -71,4 +100,51 @@ async def run_mcp_agent(mcp_agent: AssistantAgent, task: str):
             "messages": [],
             "final_response": f"Error: {str(e)}",
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+async def stream_mcp_agent(mcp_agent: AssistantAgent, task: str, timeout: Optional[float] = None):
+    """
+    Run the agent and yield its progress as event dictionaries while it runs.
+
+    Yields {"event": ..., "data": ...} items: "tool_call" when the model requests
+    a tool, "tool_result" when it returns, "token" for each streamed model chunk
+    (requires an agent created with model_client_stream=True) and a final
+    "final_response" carrying the same text run_mcp_agent would return.
+
+    If the agent is still running after `timeout` seconds it is cancelled and
+    the last event is "agent_timeout" instead of "final_response".
+    """
+    telemetry.log_event(logger, "Agent task started", task_chars=len(task), stream=True, timeout=timeout)
+    
+    final_response = "No response generated"
+    span = telemetry.open_span("agent.run", stream=True, timeout=timeout)
+    try:
+        with _deadline(timeout) as token:
+            async for item in mcp_agent.run_stream(task=task, cancellation_token=token):
+                item_type = getattr(item, 'type', None)
+                if item_type == 'ModelClientStreamingChunkEvent':
+                    yield {"event": "token", "data": {"content": item.content}}
+                elif item_type == 'ToolCallRequestEvent':
+                    for call in item.content:
+                        yield {"event": "tool_call", "data": {"id": call.id, "name": call.name, "arguments": call.arguments}}
+                elif item_type == 'ToolCallExecutionEvent':
+                    for result in item.content:
+                        yield {"event": "tool_result", "data": {"id": result.call_id, "name": result.name, "is_error": bool(result.is_error)}}
+                elif item_type in ANSWER_MESSAGE_TYPES and getattr(item, 'source', 'user') != 'user':
+                    final_response = item.content
+    except asyncio.CancelledError as e:
+        if not token.is_cancelled():
+            telemetry.close_span(span, e)
+            raise
+        error = TimeoutError(f"Agent did not finish within {timeout:g}s")
+        telemetry.close_span(span, error)
+        telemetry.log_event(logger, "Agent task failed", logging.ERROR, error=str(error))
+        yield {"event": "agent_timeout", "data": {"timeout": timeout, "error": str(error)}}
+        return
+    except BaseException as e:
+        telemetry.close_span(span, e)
+        raise
+    telemetry.close_span(span)
+    
+    telemetry.log_event(logger, "Agent task finished", logging.DEBUG, response=final_response)
+    yield {"event": "final_response", "data": {"content": final_response}}